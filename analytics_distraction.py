@@ -3,8 +3,10 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
-import json
 from datetime import datetime
+import numpy as np
+from tick_runs import load_ticks
+from session_loader import load_sessions
 
 def generate_distraction_heatmap():
     if not os.path.exists('analytics_output'):
@@ -12,20 +14,9 @@ def generate_distraction_heatmap():
 
     # Load session start times
     session_starts = {}
-    if os.path.exists('bbd_data'):
-        for f in os.listdir('bbd_data'):
-            if f.endswith('.json'):
-                try:
-                    with open(os.path.join('bbd_data', f), 'r') as jf:
-                        d = json.load(jf)
-                        # Handle singleton lists if they exist
-                        if isinstance(d, list) and len(d) == 1:
-                            d = d[0]
-                        sid = d.get('session_id')
-                        st = d.get('start_time')
-                        if sid and st:
-                            session_starts[sid] = pd.to_datetime(st)
-                except: pass
+    for session in load_sessions('bbd_data'):
+        if session.start_time:
+            session_starts[session.session_id] = pd.to_datetime(session.start_time)
 
     if not session_starts:
         print("No valid session JSONs found to map timestamps.")
@@ -58,6 +49,7 @@ def generate_distraction_heatmap():
     window_ticks_post = 500
 
     results = []
+    session_ticks = {}   # session_id -> (ticks, idle mask), decoded once per session
 
     try:
         conn_ticks = sqlite3.connect('combat_telemetry.db')
@@ -76,23 +68,25 @@ def generate_distraction_heatmap():
             
             sighting_tick = int(elapsed_sec / 0.6)
             
-            # Fetch ticks for this session
-            ticks_df = pd.read_sql_query(
-                "SELECT tick_number, state FROM combat_ticks WHERE session_id = ?", 
-                conn_ticks, params=(sid,)
-            )
-            if ticks_df.empty: continue
+            # Decode this session's run-length encoded ticks (see tick_runs.py)
+            if sid not in session_ticks:
+                ticks, codes, names = load_ticks(conn_ticks, sid)
+                idle = codes == names.index('idle') if 'idle' in names else np.zeros(len(ticks), dtype=bool)
+                session_ticks[sid] = (ticks, idle)
+            ticks, idle = session_ticks[sid]
+            if not len(ticks): continue
             
             # Split into inside-window and outside-window
             min_tick = sighting_tick - window_ticks_pre
             max_tick = sighting_tick + window_ticks_post
             
-            in_window = ticks_df[(ticks_df['tick_number'] >= min_tick) & (ticks_df['tick_number'] <= max_tick)]
-            out_window = ticks_df[(ticks_df['tick_number'] < min_tick) | (ticks_df['tick_number'] > max_tick)]
+            in_window = (ticks >= min_tick) & (ticks <= max_tick)
+            n_in = int(in_window.sum())
+            n_out = len(ticks) - n_in
             
-            if not in_window.empty and not out_window.empty:
-                in_idle = len(in_window[in_window['state'] == 'idle']) / len(in_window)
-                out_idle = len(out_window[out_window['state'] == 'idle']) / len(out_window)
+            if n_in and n_out:
+                in_idle = int(idle[in_window].sum()) / n_in
+                out_idle = int(idle[~in_window].sum()) / n_out
                 
                 results.append({
                     'Category': cat,
@@ -1,35 +1,28 @@
 import sqlite3
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+from tick_runs import load_runs
 
 def generate_downtime_histogram():
     if not os.path.exists('analytics_output'):
         os.makedirs('analytics_output')
 
     conn = sqlite3.connect('combat_telemetry.db')
-    df = pd.read_sql_query("SELECT * FROM combat_ticks ORDER BY session_id, tick_number", conn)
+    runs = load_runs(conn)
     conn.close()
 
-    if df.empty:
+    if not runs:
         print("No combat ticks found in database.")
         return
 
-    # To calculate downtime gaps, we find all 'idle' streaks
+    # Ticks are stored as runs (see tick_runs.py), so every 'idle' run is one
+    # downtime streak. A lost heartbeat splits a streak rather than padding it.
     gap_lengths = []
     
-    for session_id, group in df.groupby('session_id'):
-        current_streak = 0
-        for state in group['state']:
-            if state == 'idle':
-                current_streak += 1
-            else:
-                if current_streak > 0:
-                    gap_lengths.append(current_streak)
-                    current_streak = 0
-        if current_streak > 0:
-            gap_lengths.append(current_streak)
+    for starts, lengths, codes, names in runs.values():
+        if 'idle' in names:
+            gap_lengths.extend(lengths[codes == names.index('idle')].tolist())
 
     if not gap_lengths:
         print("No idle downtime found.")
@@ -3,6 +3,7 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+from tick_runs import load_runs, state_counts
 
 def generate_efficiency_scatter():
     if not os.path.exists('analytics_output'):
@@ -19,9 +20,12 @@ def generate_efficiency_scatter():
 
     try:
         conn = sqlite3.connect('combat_telemetry.db')
-        ticks_df = pd.read_sql_query(
-            "SELECT session_id, state, COUNT(*) as qty FROM combat_ticks GROUP BY session_id, state", 
-            conn
+        # Per-state tick totals come straight from the run lengths (see tick_runs.py)
+        ticks_df = pd.DataFrame(
+            [{'session_id': sid, 'state': state, 'qty': qty}
+             for sid, (starts, lengths, codes, names) in load_runs(conn).items()
+             for state, qty in state_counts((starts, lengths, codes), names).items()],
+            columns=['session_id', 'state', 'qty']
         )
         conn.close()
     except Exception as e:
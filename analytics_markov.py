@@ -4,32 +4,51 @@ import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+from tick_runs import load_runs
 
 def generate_markov_matrix():
     if not os.path.exists('analytics_output'):
         os.makedirs('analytics_output')
 
     conn = sqlite3.connect('combat_telemetry.db')
-    df = pd.read_sql_query("SELECT * FROM combat_ticks ORDER BY session_id, tick_number", conn)
+    runs = load_runs(conn)
     conn.close()
 
-    if df.empty:
+    if not runs:
         print("No combat ticks found in database.")
         return
 
-    # Create next state column grouped by session
-    df['next_state'] = df.groupby('session_id')['state'].shift(-1)
-    df = df.dropna(subset=['next_state'])
-
-    # Filter out out-of-bounds states if they exist
+    # Transitions are counted straight from the run-length encoded ticks
+    # (see tick_runs.py): a run of n ticks holds n-1 self-transitions, and
+    # back-to-back runs add one transition between their states
     valid_states = ['attack', 'cooldown', 'idle']
-    df = df[df['state'].isin(valid_states) & df['next_state'].isin(valid_states)]
+    matrix = np.zeros((len(valid_states), len(valid_states)), dtype=np.int64)
+    total = skipped = 0
+    for starts, lengths, codes, names in runs.values():
+        if not len(starts):
+            continue
+        # Session state codes -> position in valid_states (-1 filters out anything else)
+        lookup = np.array([valid_states.index(n) if n in valid_states else -1 for n in names])
+        idx = lookup[codes]
+        keep = idx >= 0
+        np.add.at(matrix, (idx[keep], idx[keep]), lengths[keep] - 1)
+        total += int((lengths - 1).sum())
+
+        # A hole in the tick sequence is a dropped UDP heartbeat (see tick_loss.py),
+        # not an idle tick: only count transitions between consecutive ticks
+        contiguous = starts[1:] == starts[:-1] + lengths[:-1]
+        skipped += int((~contiguous).sum())
+        total += len(contiguous)
+        src, dst = idx[:-1][contiguous], idx[1:][contiguous]
+        keep = (src >= 0) & (dst >= 0)
+        np.add.at(matrix, (src[keep], dst[keep]), 1)
+
+    if skipped:
+        print(f"Skipped {skipped} transitions across lost ticks ({skipped / total:.2%})")
 
     # Calculate transition probabilities
-    transitions = pd.crosstab(df['state'], df['next_state'], normalize='index')
-    
-    # Reorder columns to standard format
-    transitions = transitions.reindex(index=valid_states, columns=valid_states, fill_value=0)
+    transitions = pd.DataFrame(matrix, index=valid_states, columns=valid_states)
+    transitions = transitions.div(transitions.sum(axis=1).replace(0, 1), axis=0)
 
     plt.figure(figsize=(8, 6))
     sns.heatmap(transitions, annot=True, cmap='Blues', fmt='.2%', cbar=False)
@@ -0,0 +1,314 @@
+"""
+ANALYTICS STORE
+===============
+
+Columnar (Parquet) export of finished sessions for analytics, partitioned by
+session start date:
+
+  analytics_store/<dataset>/date=YYYY-MM-DD/<session_id>.parquet
+  analytics_store/census_roster.parquet        (rewritten every run)
+  analytics_store/_manifest.json               (sessions already exported)
+
+Datasets (one file per session each):
+  sessions       one row: times, counters, profit, config / theo stats as JSON
+  loot           item, qty
+  hitsplats      ts_ms, tick, damage, dragon_hp_before
+  combat_ticks   tick, state (decoded from combat_runs, see tick_runs.py)
+  profit_deltas  tick, delta_gp
+  sightings      username, world, ts_ms, gear_json (census.db)
+
+Every row also carries session_id. Exports are incremental: a session is
+written once, after its document has an end_time and its journal is gone,
+and recorded in the manifest; later runs only add new sessions (--force
+rewrites everything). Files are written to a temp name and renamed, and the
+manifest is updated after each session, so an interrupted export simply
+redoes that session next time. combat_telemetry.db and census.db are only
+opened read-only; the telemetry schema must already be current (the tracker
+migrates it at startup).
+
+Loader API (pyarrow):
+  load_table(dataset, start=None, end=None, sessions=None, columns=None) -> pyarrow.Table
+  load_numpy(dataset, columns, ...)                                   -> {column: ndarray}
+  load_roster()                                                       -> pyarrow.Table
+
+start / end are inclusive "YYYY-MM-DD" strings and prune whole date
+directories before any file is opened.
+
+USAGE:
+  > python analytics_store.py            # export new sessions
+  > python analytics_store.py --force
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from session_journal import journal_path
+from session_loader import load_sessions
+from telemetry_schema import LATEST_VERSION, iso_to_ms, schema_version
+from tick_runs import load_ticks
+
+# --- CONFIG ---
+STORE_DIR = "analytics_store"
+DATA_DIR = "bbd_data"
+TELEMETRY_DB = "combat_telemetry.db"
+CENSUS_DB = "census.db"
+MANIFEST = "_manifest.json"
+MANIFEST_VERSION = 1
+COMPRESSION = "zstd"
+
+DATASETS = ("sessions", "loot", "hitsplats", "combat_ticks", "profit_deltas", "sightings")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("analytics_store needs pyarrow (pip install pyarrow)")
+
+
+def _schemas():
+    sid = ("session_id", pa.dictionary(pa.int32(), pa.string()))
+    return {
+        "sessions": pa.schema([sid, ("start_ms", pa.int64()), ("end_ms", pa.int64()),
+                               ("total_kills", pa.int32()), ("total_attacks", pa.int32()),
+                               ("active_seconds", pa.float64()), ("net_profit", pa.int64()),
+                               ("experiment_name", pa.string()), ("mode", pa.string()),
+                               ("config_json", pa.string()), ("theoretical_json", pa.string())]),
+        "loot": pa.schema([sid, ("item", pa.string()), ("qty", pa.int64())]),
+        "hitsplats": pa.schema([sid, ("ts_ms", pa.int64()), ("tick", pa.int64()),
+                                ("damage", pa.int32()), ("dragon_hp_before", pa.int32())]),
+        "combat_ticks": pa.schema([sid, ("tick", pa.int64()), ("state", pa.dictionary(pa.int8(), pa.string()))]),
+        "profit_deltas": pa.schema([sid, ("tick", pa.int64()), ("delta_gp", pa.int64())]),
+        "sightings": pa.schema([sid, ("username", pa.string()), ("world", pa.int32()),
+                                ("ts_ms", pa.int64()), ("gear_json", pa.string())]),
+    }
+
+
+# --- SOURCES ---
+def finished_sessions(data_dir=DATA_DIR):
+    """{session_id: Session} for sessions with an end_time and no live journal (read via session_loader)."""
+    return {s.session_id: s for s in load_sessions(data_dir)
+            if s.start_time and s.end_time and not os.path.exists(journal_path(data_dir, s.session_id))}
+
+
+def _array(values, dtype):
+    if isinstance(values, pa.Array):
+        return values
+    if pa.types.is_dictionary(dtype):
+        return pa.array(values, pa.string()).dictionary_encode().cast(dtype)
+    return pa.array(values, type=dtype)
+
+
+def _table(dataset, session_id, columns):
+    """One session's rows -> Table in the dataset's schema; session_id is a single-entry dictionary column."""
+    schema = _schemas()[dataset]
+    n = len(next(iter(columns.values())))
+    arrays = [pa.DictionaryArray.from_arrays(pa.array(np.zeros(n, np.int32)), pa.array([session_id]))]
+    arrays += [_array(columns[field.name], field.type) for field in list(schema)[1:]]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def session_tables(session_id, session, tel_conn, census_conn):
+    """Builds every dataset's table for one session."""
+    loot = {k: v for k, v in session.loot.items() if not k.startswith("_")}
+    config = session.config
+    tables = {
+        "sessions": _table("sessions", session_id, {
+            "start_ms": [session.start_ms], "end_ms": [session.end_ms],
+            "total_kills": [session.total_kills], "total_attacks": [session.total_attacks or 0],
+            "active_seconds": [float(session.active_seconds)],
+            "net_profit": [session.final_net_profit],
+            "experiment_name": [config.get("experiment_name")], "mode": [config.get("mode")],
+            "config_json": [json.dumps(config, sort_keys=True)],
+            "theoretical_json": [json.dumps(session.theoretical_stats, sort_keys=True)],
+        }),
+        "loot": _table("loot", session_id, {"item": list(loot), "qty": [int(q) for q in loot.values()]}),
+    }
+
+    rows = tel_conn.execute("SELECT ts_ms, tick, damage, dragon_hp_before FROM hitsplats WHERE session_id = ? ORDER BY ts_ms",
+                            (session_id,)).fetchall() if tel_conn else []
+    tables["hitsplats"] = _table("hitsplats", session_id, dict(zip(
+        ("ts_ms", "tick", "damage", "dragon_hp_before"), map(list, zip(*rows)) if rows else ([], [], [], []))))
+
+    if tel_conn:
+        ticks, codes, names = load_ticks(tel_conn, session_id)
+    else:
+        ticks, codes, names = np.empty(0, np.int64), np.empty(0, np.int8), []
+    # Keep the tick_runs codes as the dictionary indices instead of expanding to strings
+    tables["combat_ticks"] = _table("combat_ticks", session_id, {
+        "tick": ticks, "state": pa.DictionaryArray.from_arrays(pa.array(codes, pa.int8()), pa.array(names, pa.string()))})
+
+    rows = tel_conn.execute("SELECT tick_number, delta_gp FROM profit_deltas WHERE session_id = ? ORDER BY tick_number",
+                            (session_id,)).fetchall() if tel_conn else []
+    tables["profit_deltas"] = _table("profit_deltas", session_id, dict(zip(
+        ("tick", "delta_gp"), map(list, zip(*rows)) if rows else ([], []))))
+
+    rows = census_conn.execute("SELECT username, world, timestamp, gear_json FROM sightings WHERE session_id = ? ORDER BY timestamp",
+                               (session_id,)).fetchall() if census_conn else []
+    tables["sightings"] = _table("sightings", session_id, {
+        "username": [r[0] for r in rows], "world": [r[1] for r in rows],
+        "ts_ms": [iso_to_ms(str(r[2])) for r in rows], "gear_json": [r[3] for r in rows]})
+    return tables
+
+
+# --- EXPORT ---
+def _read_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            print(f"[STORE] Unreadable {path}; re-exporting everything")
+    return {"version": MANIFEST_VERSION, "sessions": {}}
+
+
+def _dump_json(obj, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=1)
+
+
+def _write_atomic(path, write):
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _connect_ro(path, table):
+    """Read-only connection, or None when the file (or the table the export needs) is missing."""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+        conn.close()
+        return None
+    return conn
+
+
+def _check_telemetry_schema(path):
+    """The export only reads combat_telemetry.db; migrating it is the tracker's job, not ours."""
+    if not os.path.exists(path):
+        return
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        version = schema_version(conn)
+    finally:
+        conn.close()
+    if version < LATEST_VERSION:
+        raise RuntimeError(f"{path} is at schema v{version} but the export needs v{LATEST_VERSION}; "
+                           f"run the tracker or `python telemetry_schema.py` to migrate it first")
+
+
+def export(data_dir=DATA_DIR, telemetry_db=TELEMETRY_DB, census_db=CENSUS_DB, out_dir=STORE_DIR, force=False):
+    """Writes every finished session not yet in the manifest. Returns the number exported."""
+    _require_pyarrow()
+    _check_telemetry_schema(telemetry_db)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _read_manifest(out_dir)
+    if force:
+        manifest["sessions"] = {}
+
+    pending = {sid: s for sid, s in finished_sessions(data_dir).items() if sid not in manifest["sessions"]}
+    tel_conn = _connect_ro(telemetry_db, "combat_runs")
+    census_conn = _connect_ro(census_db, "sightings")
+
+    start = time.perf_counter()
+    try:
+        for sid in sorted(pending):
+            session = pending[sid]
+            date = session.start.strftime("%Y-%m-%d")
+            counts = {}
+            for dataset, table in session_tables(sid, session, tel_conn, census_conn).items():
+                folder = os.path.join(out_dir, dataset, f"date={date}")
+                os.makedirs(folder, exist_ok=True)
+                _write_atomic(os.path.join(folder, f"{sid}.parquet"),
+                              lambda tmp, t=table: pq.write_table(t, tmp, compression=COMPRESSION))
+                counts[dataset] = table.num_rows
+            manifest["sessions"][sid] = {"date": date, "rows": counts}
+            _write_atomic(os.path.join(out_dir, MANIFEST), lambda tmp: _dump_json(manifest, tmp))
+
+        # The roster is small and its statuses change after the fact, so it is rewritten whole
+        if census_conn:
+            roster = census_conn.execute("SELECT username, status, combat_level, total_sightings FROM roster").fetchall()
+            table = pa.table({"username": [r[0] for r in roster], "status": [r[1] for r in roster],
+                              "combat_level": pa.array([r[2] for r in roster], pa.int32()),
+                              "total_sightings": pa.array([r[3] for r in roster], pa.int64())})
+            _write_atomic(os.path.join(out_dir, "census_roster.parquet"),
+                          lambda tmp: pq.write_table(table, tmp, compression=COMPRESSION))
+    finally:
+        for conn in (tel_conn, census_conn):
+            if conn:
+                conn.close()
+
+    print(f"[STORE] Exported {len(pending)} new session(s) in {time.perf_counter() - start:.2f}s "
+          f"({len(manifest['sessions'])} in {out_dir})")
+    return len(pending)
+
+
+# --- LOADER API ---
+def load_table(dataset, start=None, end=None, sessions=None, columns=None, store_dir=STORE_DIR):
+    """One dataset as a pyarrow.Table, pruned to [start, end] dates and/or a set of session ids."""
+    _require_pyarrow()
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset {dataset!r} (expected one of {', '.join(DATASETS)})")
+    schema = _schemas()[dataset]
+    root = os.path.join(store_dir, dataset)
+    if not os.path.isdir(root):
+        return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+    dataset_ = ds.dataset(root, format="parquet", partitioning=partitioning, schema=schema.append(pa.field("date", pa.string())))
+    expr = None
+    for cond in ((ds.field("date") >= start) if start else None,
+                 (ds.field("date") <= end) if end else None,
+                 ds.field("session_id").isin(list(sessions)) if sessions else None):
+        if cond is not None:
+            expr = cond if expr is None else expr & cond
+    return dataset_.to_table(columns=columns, filter=expr)
+
+
+def load_numpy(dataset, columns, **filters):
+    """{column: numpy array}; dictionary columns (session_id, state) come back as strings."""
+    table = load_table(dataset, columns=list(columns), **filters)
+    out = {}
+    for name in columns:
+        col = table.column(name)
+        if pa.types.is_dictionary(col.type):
+            col = col.cast(col.type.value_type)
+        out[name] = col.to_numpy(zero_copy_only=False)
+    return out
+
+
+def load_roster(store_dir=STORE_DIR):
+    _require_pyarrow()
+    return pq.read_table(os.path.join(store_dir, "census_roster.parquet"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental Parquet export of finished sessions")
+    parser.add_argument('--force', action='store_true', help="Re-export every session")
+    parser.add_argument('--out', default=STORE_DIR)
+    args = parser.parse_args()
+    if pa is None:
+        print("[STORE] pyarrow not installed; skipping export")   # don't stop the pipeline loop
+        return
+    try:
+        export(out_dir=args.out, force=args.force)
+    except RuntimeError as e:
+        print(f"[STORE] {e}")   # same: report it and let the pipeline carry on
+
+
+if __name__ == "__main__":
+    main()
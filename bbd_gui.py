@@ -3,13 +3,18 @@ import os
 import json
 import glob
 import csv
+import sqlite3
 from datetime import datetime, timedelta
 import keyboard
 
+from item_catalog import load_catalog
+import session_store
+from hit_summary import latest_summary, BIN_LABELS
+
 try:
-    from bbd_tracker import DROP_TABLE
+    from tracker_core import DROP_TABLE
 except ImportError:
-    print("Warning: Could not import DROP_TABLE from bbd_tracker.py")
+    print("Warning: Could not import DROP_TABLE from tracker_core.py")
     DROP_TABLE = {}
 
 # --- CONFIG ---
@@ -43,7 +48,7 @@ class BBDGUI:
         # State Variables
         self.sessions = []
         self.next_session_val = "0001"
-        self.item_map = {}
+        self.catalog = load_catalog()
         self.prices = {}
         self.gpph_data = []
         self.last_snapshot_mtime = 0.0
@@ -94,18 +99,9 @@ class BBDGUI:
                 return 
             self.last_snapshot_mtime = current_mtime
 
-        print("[I/O] Parsing items.csv and snapshot directory...") 
-        self.item_map.clear()
+        print("[I/O] Parsing snapshot directory...") 
         self.prices.clear()
         
-        if os.path.exists("items.csv"):
-            with open("items.csv", 'r', encoding='utf-8') as f:
-                for row in csv.DictReader(f):
-                    self.item_map[row['name'].lower()] = {
-                        'id': int(row['id']),
-                        'highalch': int(row['highalch']) if row['highalch'] else 0
-                    }
-        
         if os.path.exists(snapshot_dir):
             files = glob.glob(os.path.join(snapshot_dir, "prices_*.csv"))
             if files:
@@ -129,14 +125,7 @@ class BBDGUI:
                 pass
 
     def get_item_value(self, name):
-        name_lower = name.lower()
-        if name_lower in self.item_map:
-            item_id = self.item_map[name_lower]['id']
-            val = self.prices.get(item_id, 0)
-            if val == 0:
-                val = self.item_map[name_lower]['highalch']
-            return val
-        return 0
+        return self.catalog.price(name, self.prices)
 
     def load_session_data(self):
         self.sessions = []
@@ -154,63 +143,51 @@ class BBDGUI:
                     except Exception:
                         pass
 
-        files = glob.glob(os.path.join(DATA_DIR, "*.json"))
-        for f in files:
-            try:
-                with open(f, 'r') as file:
-                    data = json.load(file)
-                    sess_name = data.get('config', {}).get('experiment_name', '????')
-                    start_str = data.get('start_time')
-                    end_str = data.get('end_time')
-                    kills = data.get('total_kills', 0)
-
-                    start_dt = datetime.fromisoformat(start_str) if start_str else datetime.now()
-                    end_dt = datetime.fromisoformat(end_str) if end_str else datetime.now()
-                    duration_sec = (end_dt - start_dt).total_seconds()
-
-                    total_attacks = data.get('total_attacks', None) 
-                    active_seconds = data.get('active_seconds', 0)
-                    theo = data.get('theoretical_stats', {})
-
-                    bank_sec, trips = 0, 0
-                    away_ts = None
-                    for e in data.get('event_timeline',[]):
-                        if e['type'] == 'phase':
-                            ts = datetime.fromisoformat(e['timestamp'])
-                            if "AWAY" in e['value']: away_ts = ts
-                            elif "KILLING" in e['value'] and away_ts:
-                                bank_sec += (ts - away_ts).total_seconds()
-                                trips += 1
-                                away_ts = None 
-
-                    gross_gp = 0
-                    for item, qty in data.get('loot_summary', {}).items():
-                        gross_gp += self.get_item_value(item) * qty
-                        
-                    net_profit, duration_gpph = None, None
-                    for g in self.gpph_data:
-                        if abs((start_dt - g['time']).total_seconds()) < 300:
-                            net_profit = g['profit']
-                            duration_gpph = g['duration']
-                            break
-
-                    self.sessions.append({
-                        'id': data.get('session_id'),
-                        'name': sess_name,
-                        'date': start_dt,
-                        'duration_sec': duration_sec,
-                        'active_sec': active_seconds,
-                        'attacks': total_attacks,
-                        'kills': kills,
-                        'bank_sec': bank_sec,
-                        'trips': trips,
-                        'gross_gp': gross_gp,
-                        'net_profit': net_profit,
-                        'theo_ttk': theo.get('ttk', 0), 'theo_dps': theo.get('dps', 0), 'theo_acc': theo.get('accuracy', 0),
-                        'duration_gpph': duration_gpph
-                    })
-            except Exception:
-                pass
+        try:
+            conn = session_store.open_store(data_dir=DATA_DIR)
+        except sqlite3.Error as e:
+            print(f"[GUI] Session store unavailable: {e}")
+            return
+        try:
+            summaries = session_store.list_sessions(conn)
+            loot = session_store.load_loot(conn)
+            phases = session_store.load_events(conn, types=["phase"])
+        finally:
+            conn.close()
+
+        for data in summaries:
+            sid = data['session_id']
+            start_str = data['start_time']
+            end_str = data['end_time']
+            start_dt = datetime.fromisoformat(start_str) if start_str else datetime.now()
+            end_dt = datetime.fromisoformat(end_str) if end_str else datetime.now()
+            theo = data['theoretical_stats']
+
+            bank_sec, trips = session_store.bank_trips(phases.get(sid, []))
+            gross_gp = sum(self.get_item_value(item) * qty for item, qty in loot.get(sid, {}).items())
+
+            net_profit, duration_gpph = None, None
+            for g in self.gpph_data:
+                if abs((start_dt - g['time']).total_seconds()) < 300:
+                    net_profit = g['profit']
+                    duration_gpph = g['duration']
+                    break
+
+            self.sessions.append({
+                'id': sid,
+                'name': data['experiment_name'] or '????',
+                'date': start_dt,
+                'duration_sec': (end_dt - start_dt).total_seconds(),
+                'active_sec': data['active_seconds'] or 0,
+                'attacks': data['total_attacks'],
+                'kills': data['total_kills'] or 0,
+                'bank_sec': bank_sec,
+                'trips': trips,
+                'gross_gp': gross_gp,
+                'net_profit': net_profit,
+                'theo_ttk': theo.get('ttk', 0), 'theo_dps': theo.get('dps', 0), 'theo_acc': theo.get('accuracy', 0),
+                'duration_gpph': duration_gpph
+            })
 
         self.sessions.sort(key=lambda x: x['date'], reverse=True)
 
@@ -529,24 +506,20 @@ class BBDGUI:
             return
             
         try:
+            # One row of running aggregates, kept current by the telemetry writer
             conn = sqlite3.connect("combat_telemetry.db")
-            cur = conn.cursor()
-            cur.execute("SELECT session_id FROM hitsplats ORDER BY id DESC LIMIT 1")
-            res = cur.fetchone()
-            if not res:
-                self.draw_text(c, 10, 10, "No attacks logged yet.", "gray")
-                conn.close()
-                return
-                
-            latest_session = res[0]
-            cur.execute("SELECT damage FROM hitsplats WHERE session_id = ?", (latest_session,))
-            hits = [row[0] for row in cur.fetchall()]
+            summary = latest_summary(conn)
             conn.close()
         except Exception as e:
             self.draw_text(c, 10, 10, f"DB Error: {e}", "red")
             return
 
-        if not hits:
+        if not summary:
+            self.draw_text(c, 10, 10, "No attacks logged yet.", "gray")
+            return
+
+        latest_session = summary['session_id']
+        if not summary['hits']:
             self.draw_text(c, 10, 10, "No attacks logged in current session.", "gray")
             return
 
@@ -562,12 +535,8 @@ class BBDGUI:
             if active_session['kills'] > 0: 
                 act_ttk = active_session['active_sec'] / active_session['kills']
 
-        bolts_fired = len(hits)
-        zeroes = sum(1 for h in hits if h == 0)
-        total_dmg = sum(hits)
-        
-        act_acc = ((bolts_fired - zeroes) / bolts_fired) * 100 if bolts_fired > 0 else 0
-        act_dps = total_dmg / (bolts_fired * 3.0) if bolts_fired > 0 else 0
+        act_acc = summary['accuracy']
+        act_dps = summary['dps']
         
         d_dps = act_dps - theo_dps if theo_dps > 0 else 0
         d_acc = act_acc - theo_acc if theo_acc > 0 else 0
@@ -588,20 +557,11 @@ class BBDGUI:
         draw_stat(120, "Acc", f"{act_acc:.0f}%", d_acc, is_ttk=False)
         draw_stat(230, "TTK", f"{act_ttk:.1f}s", d_ttk, is_ttk=True)
 
-        bins = [0] * 7
-        for h in hits:
-            if h == 0: bins[0] += 1
-            elif h <= 10: bins[1] += 1
-            elif h <= 20: bins[2] += 1
-            elif h <= 30: bins[3] += 1
-            elif h <= 40: bins[4] += 1
-            elif h <= 50: bins[5] += 1
-            else: bins[6] += 1
-            
+        bins = summary['bins']
         max_bin = max(bins) if max(bins) > 0 else 1
 
         bar_w = 28; gap = 12; start_x = 45; base_y = 80; max_h = 35   
-        labels = ["0", "1-10", "11-20", "21-30", "31-40", "41-50", "51+"]
+        labels = BIN_LABELS
         colors = ["#FFFFFF", "#444444", "#555555", "#666666", "#777777", "#888888", "#999999"]
         
         c.create_line(start_x - 5, base_y, start_x + (bar_w + gap)*7, base_y, fill="#555555") 
@@ -254,22 +254,15 @@ else:
 # --- BUILD THE TABS ---
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["The Verdict (MLR)", "Optimizer", "Experiment Matrix", "Wealth Tracker", "Visual Loadouts", "OSRS 100 Index"])
 
-import base64
-from pathlib import Path
+from icon_atlas import load_atlas
+
+# Built/loaded once per process; reruns reuse the pre-encoded data URIs
+ICON_ATLAS = load_atlas()
 
 def get_image_base64(item_name):
     if not item_name or item_name.lower() in ['none', 'nan', 'unknown', '']: 
         item_name = "placeholder"
-    clean_name = item_name.replace(' ', '_') + ".png"
-    filepath = Path("bbd_data/icons") / clean_name
-    if not filepath.exists():
-        filepath = Path("bbd_data/icons/placeholder.png")
-    try:
-        with open(filepath, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode()
-        return f"data:image/png;base64,{encoded}"
-    except Exception:
-        return ""
+    return ICON_ATLAS.data_uri(item_name) or ICON_ATLAS.data_uri("placeholder")
         
 def build_osrs_grid(equipment):
     def get_slot_html(item_name, img_b64):
@@ -748,20 +741,15 @@ with tab5:
     st.header("Tested Gear Setups (Worn Equipment)")
     st.write("Visual breakdown of all unique loadouts deployed in your dataset.")
     
-    import glob
-    import json
+    from session_loader import load_sessions
     
     @st.cache_data
     def load_raw_json_loadouts():
         loadouts = {}
-        json_files = glob.glob("bbd_data/session_*.json")
-        for f in json_files:
+        for session in load_sessions("bbd_data"):
             try:
-                with open(f, 'r', encoding='utf-8') as file:
-                    data = json.load(file)
-                
-                config = data.get('config', {})
-                duration_ms = data.get('session_time_ms', 0)
+                config = session.config
+                duration_ms = session.extra.get('session_time_ms', 0)
                 duration_hrs = duration_ms / 3600000.0 if duration_ms > 0 else 0.0
                 
                 eq = {}
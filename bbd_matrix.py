@@ -4,6 +4,7 @@ import time
 import threading
 import queue
 import keyboard
+from live_feed import iter_events
 
 # --- CONFIG ---
 BACKGROUND_COLOR = "black"
@@ -12,6 +13,9 @@ MAIN_W, MAIN_H = 2560, 1440
 SIDE_W, SIDE_H = 1080, 1920
 SIDE_ORIGIN_X = MAIN_W   
 SIDE_ORIGIN_Y = 0
+FEED_URL = "http://127.0.0.1:5000/stream"
+HP_URL = "http://127.0.0.1:5000/hp"
+POLL_FALLBACK_SEC = 5.0
 
 class OverlayWindow(tk.Toplevel):
     def __init__(self, master, width, height, x, y, title):
@@ -47,13 +51,15 @@ class BBDMatrix:
         self.is_draining = False
         self.drain_index = 0
         self.was_session_running = False  
+        self.server_state = {}
+        self.last_seq = 0
         
         self.draw_ticks()
         self.draw_vaults()
 
-        # Start HTTP Polling Daemon
+        # Start Live Feed Daemon (server push, replaces /hp polling)
         self.http_queue = queue.Queue()
-        threading.Thread(target=self.http_polling_daemon, daemon=True).start()
+        threading.Thread(target=self.feed_daemon, daemon=True).start()
 
         keyboard.add_hotkey("ctrl+l", self.toggle_view)
         keyboard.add_hotkey("ctrl+q", self.close_app)
@@ -71,23 +77,63 @@ class BBDMatrix:
             self.current_view = "Matrix"
         self.draw_ticks()
 
-    def http_polling_daemon(self):
+    def feed_daemon(self):
         while True:
             try:
-                resp = requests.get("http://127.0.0.1:5000/hp", timeout=0.1)
-                self.http_queue.put(resp.json())
+                for event, data in iter_events(FEED_URL):
+                    self.http_queue.put((event, data))
             except Exception:
                 pass
-            time.sleep(0.05) 
+            # Stream unavailable: fall back to cursor-based polling for a while
+            self.poll_since(POLL_FALLBACK_SEC)
+
+    def poll_since(self, duration):
+        # /hp?since=<seq> only returns stream entries newer than our cursor
+        session = requests.Session()
+        deadline = time.time() + duration
+        while time.time() < deadline:
+            try:
+                data = session.get(HP_URL, params={"since": self.last_seq}, timeout=0.1).json()
+                stream = data.pop("udp_stream", [])
+                self.http_queue.put(("state", data))
+                for entry in stream:
+                    self.http_queue.put(("tick", entry))
+            except Exception:
+                pass
+            time.sleep(0.05)
 
     def run_tick_loop(self):
+        # Merge every pushed message since the last frame into one state view
         data = None
+        new_ticks = []
         try:
             while True:
-                data = self.http_queue.get_nowait()
+                event, payload = self.http_queue.get_nowait()
+                if event == "snapshot":
+                    self.server_state = {k: v for k, v in payload.items() if k != "udp_stream"}
+                    new_ticks = list(payload.get("udp_stream", []))
+                elif event == "state":
+                    self.server_state.update(payload)
+
+                # Head seq behind our cursor means the tracker restarted
+                if payload.get("udp_seq", self.last_seq) < self.last_seq:
+                    self.last_seq = 0
+                elif event == "tick":
+                    new_ticks.append(payload)
+                data = self.server_state
         except queue.Empty:
             pass
 
+        # Entries we've already consumed (snapshot replays after a reconnect)
+        # are skipped by sequence number rather than rescanning tick numbers.
+        fresh_ticks = []
+        for entry in new_ticks:
+            seq = entry.get("seq", 0)
+            if seq > self.last_seq:
+                fresh_ticks.append(entry)
+                self.last_seq = seq
+        new_ticks = fresh_ticks
+
         if data:
             is_running = data.get("session_running", False)
             if is_running and not self.was_session_running:
@@ -108,7 +154,7 @@ class BBDMatrix:
                     self.gp_backlog += (total_profit - self.last_total_profit)
                     self.last_total_profit = total_profit
 
-                udp_stream = data.get("udp_stream", [])
+                udp_stream = new_ticks
                 server_phase = data.get("phase", "IDLE")
 
                 for udp_payload in udp_stream:
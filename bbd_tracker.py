@@ -1,29 +1,35 @@
 import customtkinter as ctk
 import threading
 import queue
-from flask import Flask, request, jsonify
 import datetime
 import json
 import time
 import os
-from PIL import Image
-from scipy.stats import binom
+import argparse
+import statistics
+from stats import luck_engine
 from census_manager import CensusManager 
 import pygame
-import sqlite3
 import socket
-import logging
 from cdps_simulator import simulate_bbd_combat
-
-log = logging.getLogger('werkzeug')
-log.setLevel(logging.ERROR)
+from ingest_server import IngestServer
+from telemetry_writer import TelemetryWriter
+from telemetry_schema import migrate as migrate_telemetry_db
+from live_feed import LiveFeed
+from tick_ring import TickRing
+from capture import CaptureWriter
+import metrics
+from metrics import Counter, Gauge, Histogram
+from loot_aggregate import LootAggregate
+from icon_atlas import load_atlas
+from tracker_core import TrackerCore, DROP_TABLE, DATA_DIR
 
 # --- CONFIG ---
 HOST = '127.0.0.1'
 PORT = 5000
-DATA_DIR = "bbd_data"
 IMG_DIR = "item_images"
 DPS_PROFILES_FILE = "dps_profiles.json"
+FRAME_SAMPLES = 500  # Rolling window of UI refresh timings reported at session end
 
 if not os.path.exists(DATA_DIR): os.makedirs(DATA_DIR)
 if not os.path.exists(IMG_DIR): os.makedirs(IMG_DIR)
@@ -45,104 +51,10 @@ except Exception as e:
     print(f"[AUDIO] Failed to init mixer: {e}")
     kill_sound = None
 
-# --- MASTER DROP TABLE ---
-DROP_TABLE = {
-    "Dragon bones":       {"rate": 1.0, "qty": 1, "cat": "Guaranteed"},
-    "Black dragonhide":   {"rate": 1.0, "qty": 2, "cat": "Guaranteed"},
-    
-    # Uniques (1/512)
-    "Dragon platelegs":   {"rate": 1/512, "qty": 1, "cat": "Unique"},
-    "Dragon plateskirt":  {"rate": 1/512, "qty": 1, "cat": "Unique"},
-    "Dragon spear":       {"rate": 1/512, "qty": 1, "cat": "Unique"}, 
-    "Uncut dragonstone":  {"rate": 1/512, "qty": 1, "cat": "Unique"},
-    
-    # Weapons/Armor
-    "Rune spear":         {"rate": 1/12.8, "qty": 1, "cat": "Gear"},
-    "Rune platelegs":     {"rate": 1/18.29, "qty": 1, "cat": "Gear"},
-    "Rune full helm":     {"rate": 1/21.33, "qty": 2, "cat": "Gear"},
-    "Rune dart":          {"rate": 1/25.6, "qty": 20, "cat": "Gear"},
-    "Rune longsword":     {"rate": 1/25.6, "qty": 1, "cat": "Gear"},
-    "Black d'hide body":  {"rate": 1/64, "qty": 1, "cat": "Gear"},
-    "Rune knife":         {"rate": 1/64, "qty": 25, "cat": "Gear"},
-    "Rune thrownaxe":     {"rate": 1/64, "qty": 30, "cat": "Gear"},
-    "Black d'hide vambraces": {"rate": 1/128, "qty": 1, "cat": "Gear"},
-    "Rune platebody":     {"rate": 1/128, "qty": 1, "cat": "Gear"},
-    "Dragon med helm":    {"rate": 1/128, "qty": 1, "cat": "Gear"},
-    "Dragon longsword":   {"rate": 1/128, "qty": 1, "cat": "Gear"},
-    "Dragon dagger":      {"rate": 1/128, "qty": 1, "cat": "Gear"},
-
-    # Runes/Ammo
-    "Rune javelin":       {"rate": 1/16, "qty": 50, "cat": "Ammo"},
-    "Blood rune":         {"rate": 1/16, "qty": 50, "cat": "Ammo"},
-    "Soul rune":          {"rate": 1/16, "qty": 50, "cat": "Ammo"},
-    "Death rune":         {"rate": 1/18.29, "qty": 75, "cat": "Ammo"},
-    "Law rune":           {"rate": 1/18.29, "qty": 75, "cat": "Ammo"},
-    "Rune arrow":         {"rate": 1/18.29, "qty": 75, "cat": "Ammo"},
-
-    # Materials
-    "Lava scale":         {"rate": 1/32, "qty": 5, "cat": "Mats"},
-    "Dragon dart tip":    {"rate": 1/42.67, "qty": 40, "cat": "Mats"},
-    "Runite ore":         {"rate": 1/64, "qty": 3, "cat": "Mats"},
-    "Dragon arrowtips":   {"rate": 1/64, "qty": 40, "cat": "Mats"},
-    "Dragon javelin tips":{"rate": 1/64, "qty": 40, "cat": "Mats"},
-
-    # Coins
-    "Coins":              {"rate": 1/10.66, "qty": 400, "cat": "Coins"},
-
-    # Other
-    "Anglerfish":         {"rate": 1/16, "qty": 2, "cat": "Other"},
-
-    # RDT / Rare
-    "Loop half of key":    {"rate": 1/378, "qty": 1, "cat": "RDT"},
-    "Tooth half of key":   {"rate": 1/378, "qty": 1, "cat": "RDT"},
-    "Shield left half":    {"rate": 1/15738, "qty": 1, "cat": "RDT"},
-    "Uncut sapphire":      {"rate": 1/154, "qty": 1, "cat": "RDT"},
-    "Uncut emerald":       {"rate": 1/309, "qty": 1, "cat": "RDT"},
-    "Uncut ruby":          {"rate": 1/618, "qty": 1, "cat": "RDT"},
-    "Uncut diamond":       {"rate": 1/2473, "qty": 1, "cat": "RDT"},
-    "Nature talisman":     {"rate": 1/1638, "qty": 1, "cat": "RDT"},
-    "Rune battleaxe":      {"rate": 1/2731, "qty": 1, "cat": "RDT"},
-    "Rune 2h sword":       {"rate": 1/2731, "qty": 1, "cat": "RDT"},
-    "Rune sq shield":      {"rate": 1/4096, "qty": 1, "cat": "RDT"},
-    "Steel arrow":         {"rate": 1/4096, "qty": 150, "cat": "RDT"},
-    "Adamant javelin":     {"rate": 1/4096, "qty": 20, "cat": "RDT"},
-    "Dragonstone":         {"rate": 1/4096, "qty": 1, "cat": "RDT"},
-    
-    # Tertiary
-    "Ensouled dragon head":{"rate": 1/20, "qty": 1, "cat": "Tertiary"},
-    "Clue scroll (hard)":  {"rate": 1/128, "qty": 1, "cat": "Tertiary"},
-    "Clue scroll (elite)": {"rate": 1/250, "qty": 1, "cat": "Tertiary"},
-    "Draconic visage":     {"rate": 1/10000, "qty": 1, "cat": "Tertiary"},
-    "Ancient shard":       {"rate": 1/123, "qty": 1, "cat": "Catacombs"},
-    "Dark totem base":     {"rate": 1/185, "qty": 1, "cat": "Catacombs"},
-    "Dark totem middle":   {"rate": 1/185, "qty": 1, "cat": "Catacombs"},
-    "Dark totem top":      {"rate": 1/185, "qty": 1, "cat": "Catacombs"}
-}
-
-# ID to Name Map
-ITEM_MAP = {
-    536: "Dragon bones", 1747: "Black dragonhide", 13441: "Anglerfish",
-    4087: "Dragon platelegs", 4585: "Dragon plateskirt", 1249: "Dragon spear", 1631: "Uncut dragonstone", 1615: "Uncut dragonstone",
-    11388: "Rune hasta", 1247: "Rune spear", 1079: "Rune platelegs", 1163: "Rune full helm",
-    811: "Rune dart", 1201: "Rune kite", 1303: "Rune longsword", 2503: "Black d'hide body",
-    868: "Rune knife", 805: "Rune thrownaxe", 2491: "Black d'hide vambraces", 1127: "Rune platebody",
-    1149: "Dragon med helm", 1305: "Dragon longsword", 1215: "Dragon dagger",
-    830: "Rune javelin", 565: "Blood rune", 566: "Soul rune", 560: "Death rune", 563: "Law rune", 892: "Rune arrow",
-    11993: "Lava scale", 11992: "Lava scale", 11232: "Dragon dart tip", 452: "Runite ore", 451: "Runite ore",
-    11237: "Dragon arrowtips", 19582: "Dragon javelin tips",
-    11286: "Draconic visage", 2722: "Clue scroll (hard)", 12073: "Clue scroll (elite)", 13510: "Ensouled dragon head", 13511: "Ensouled dragon head",
-    19677: "Ancient shard", 19679: "Dark totem base", 19681: "Dark totem middle", 19683: "Dark totem top",
-    995: "Coins",
-    987: "Loop half of key", 985: "Tooth half of key", 2366: "Shield left half",
-    1623: "Uncut sapphire", 1621: "Uncut emerald", 1619: "Uncut ruby", 1617: "Uncut diamond",
-    1462: "Nature talisman", 1373: "Rune battleaxe", 1319: "Rune 2h sword", 1185: "Rune sq shield", 886: "Steel arrow", 829: "Adamant javelin", 1615:"Dragonstone",
-
-
-}
-
-# --- FLASK SERVER ---
-server = Flask(__name__)
+# --- INGEST SERVER ---
+server = IngestServer(HOST, PORT)
 app_instance = None 
+core = None  # TrackerCore: session state lives here, the Tk app only renders it (see tracker_core.py)
 
 LIVE_HP_STATE = {
     "current": 0, 
@@ -150,65 +62,85 @@ LIVE_HP_STATE = {
     "active": False, 
     "phase": "IDLE", 
     "last_attack": 0,
-    "udp_stream": [],
     "total_profit": 0,
     "drain_triggered": False,
     "session_running": False
 }
 
-def init_telemetry_db():
-    conn = sqlite3.connect('combat_telemetry.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS hitsplats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT,
-            timestamp DATETIME, damage INTEGER, dragon_hp_before INTEGER)''')
-            
-    c.execute('''CREATE TABLE IF NOT EXISTS sessions (
-            session_id TEXT PRIMARY KEY, start_time DATETIME, end_time DATETIME,
-            duration_sec REAL, active_sec REAL, total_attacks INTEGER, 
-            total_kills INTEGER, net_profit INTEGER)''')
-            
-    # --- ANALYTICS TABLES ---
-    c.execute('''CREATE TABLE IF NOT EXISTS combat_ticks (
-            session_id TEXT, tick_number INTEGER, state TEXT)''')
-            
-    c.execute('''CREATE TABLE IF NOT EXISTS profit_deltas (
-            session_id TEXT, tick_number INTEGER, delta_gp INTEGER)''')
-            
-    conn.commit()
-    conn.close()
-
-init_telemetry_db()
+# Rolling UDP stream for the Matrix UI: 50 ticks (30 seconds of history),
+# sequence-numbered so clients can ask for only what they haven't seen.
+udp_ring = TickRing(50)
+
+def snapshot_live_state():
+    state = dict(LIVE_HP_STATE)
+    state["udp_stream"] = udp_ring.latest()
+    state["udp_seq"] = udp_ring.seq
+    if core:
+        state["session_running"] = core.is_active
+    return state
+
+# --- LIVE PUSH FEED ---
+# Overlays subscribe to /stream and receive only what changed, instead of
+# polling /hp for the full dictionary.
+feed = LiveFeed(snapshot=snapshot_live_state)
+
+def set_live_state(**changes):
+    LIVE_HP_STATE.update(changes)
+    feed.publish_state(changes)
+
+def publish_tick(payload):
+    udp_ring.append(payload)
+    feed.publish("tick", payload)
+
+# --- TELEMETRY SCHEMA ---
+# Tables, indexes and WAL are versioned migrations (see telemetry_schema.py)
+migrate_telemetry_db('combat_telemetry.db')
+
+# --- TELEMETRY WRITER ---
+# Hitsplats, closed tape ticks and profit deltas are all group-committed by one
+# background thread (see telemetry_writer.py) instead of per-request transactions.
+telemetry = TelemetryWriter('combat_telemetry.db')
+
+# --- METRICS (GET /metrics, see metrics.py) ---
+udp_received = Counter("bbd_udp_datagrams_received_total", "UDP datagrams read from the shadow port")
+udp_parsed = Counter("bbd_udp_datagrams_parsed_total", "UDP datagrams decoded as JSON and queued")
+udp_failed = Counter("bbd_udp_datagrams_failed_total", "UDP datagrams that failed to decode")
+tk_hop_hist = Histogram("bbd_tk_hop_ms", "Tracker core notification -> handled on the Tk thread")
+event_requests = Counter("bbd_event_requests_total", "POST /event requests")
+hp_requests = Counter("bbd_hp_requests_total", "GET /hp requests")
+Gauge("bbd_telemetry_queue_depth", "Rows waiting for the telemetry writer", telemetry.queue.qsize)
+Gauge("bbd_telemetry_rows_written", "Rows committed by the telemetry writer", lambda: telemetry.rows_written)
+Gauge("bbd_telemetry_rows_dropped", "Rows dropped by the telemetry writer", lambda: telemetry.rows_dropped)
+
+Gauge("bbd_core_queue_depth", "Events and UDP payloads waiting for the tracker core", lambda: core.queue_depth() if core else 0)
+Gauge("bbd_udp_ticks_lost", "Heartbeat ticks lost in the current session", lambda: core.tick_loss.lost if core else 0)
+
+# --- UI NOTIFICATIONS ---
+# The core calls this on its own thread; the Tk app drains the queue every 50ms
+ui_events = queue.Queue()
+
+def queue_ui_event(event, data):
+    ui_events.put((time.perf_counter(), event, data))
 
 @server.route('/event', methods=['POST'])
-def handle_event():
+def handle_event(data):
     global LIVE_HP_STATE
-    data = request.json
+    event_requests.inc()
     ev_type = data.get('event')
-    payload = data.get('payload')
+    payload = data.get('payload') or {}
 
     # --- COMBAT TELEMETRY ---
     if ev_type == 'combat_telemetry':
-        if app_instance and app_instance.is_active and app_instance.session_id:
-            try:
-                conn = sqlite3.connect('combat_telemetry.db')
-                c = conn.cursor()
-                c.execute("""INSERT INTO hitsplats (session_id, timestamp, damage, dragon_hp_before) 
-                             VALUES (?, ?, ?, ?)""", 
-                          (app_instance.session_id, datetime.datetime.now().isoformat(), 
-                           payload.get('damage', 0), payload.get('hp_before', -1)))
-                conn.commit()
-                conn.close()
-            except Exception as e:
-                print(f"[TELEMETRY ERROR] SQLite insert failed: {e}")
-        return jsonify({"status": "logged"})
+        if core.is_active and core.session_id:
+            # Epoch ms plus the newest heartbeat tick (None before the first one arrives)
+            telemetry.write_hitsplat(core.session_id, int(time.time() * 1000), core.current_tick or None,
+                                     payload.get('damage', 0), payload.get('hp_before', -1))
+        return {"status": "logged"}
 
     # --- HP UPDATE CATCH ---
     if ev_type == 'hp_update':
         # Explicit whitelist to prevent Java payloads from overwriting the economy
-        for k in ['current', 'max', 'active']:
-            if k in payload:
-                LIVE_HP_STATE[k] = payload[k]
+        set_live_state(**{k: payload[k] for k in ['current', 'max', 'active'] if k in payload})
 
     # --- AUDIO TRIGGER ---
     if ev_type == 'notification':
@@ -219,31 +151,61 @@ def handle_event():
 
     # --- END SESSION HANDSHAKE ---
     if ev_type == 'drain_complete':
-        if app_instance and app_instance.is_active:
-            final_gp = payload.get("final_vault_gp", 0)
-            # Route back to main Tkinter thread to finalize the save with the GP payload
-            app_instance.after(0, lambda: app_instance.finalize_stop(final_gp))
-        return jsonify({"status": "ok"})
-    
-    if app_instance:
-        # Safely route the event processing back to the main Tkinter thread
-        app_instance.after(0, lambda e=ev_type, p=payload: app_instance.process_event(e, p))
-    return jsonify({"status": "ok"})
+        # Finalize the save with the GP payload (a no-op if no session is running)
+        core.command("finalize_stop", final_vault_gp=payload.get("final_vault_gp", 0))
+        return {"status": "ok"}
+
+    # Session state is only touched on the core thread; this just enqueues
+    core.submit_event(ev_type, payload)
+    return {"status": "ok"}
+
+@server.route('/session', methods=['POST'])
+def handle_session(data):
+    # Remote start/stop, e.g. for --headless. Stop begins the conveyor drain
+    # exactly like the STOP button; the overlay's drain_complete finalizes it.
+    action = data.get('action')
+    if action == 'start':
+        core.command("start_session")
+    elif action == 'stop':
+        core.command("stop_session")
+    else:
+        return {"status": "error", "error": f"unknown action: {action}"}
+    return {"status": "ok"}
 
 @server.route('/hp', methods=['GET'])
-def get_hp():
+def get_hp(query):
+    hp_requests.inc()
     # Inject the master control panel's active state into the payload
-    if app_instance:
-        LIVE_HP_STATE["session_running"] = app_instance.is_active
-    return jsonify(LIVE_HP_STATE)
+    if core:
+        LIVE_HP_STATE["session_running"] = core.is_active
+    state = dict(LIVE_HP_STATE)
+
+    # /hp?since=<seq> returns only stream entries newer than the client's cursor
+    if "since" in query:
+        state["udp_stream"], state["udp_seq"], state["udp_gap"] = udp_ring.since(int(query["since"]))
+    else:
+        state["udp_stream"] = udp_ring.latest()
+        state["udp_seq"] = udp_ring.seq
+    return state
+
+@server.route('/metrics', methods=['GET'])
+def get_metrics(query):
+    # Plain-text Prometheus exposition format
+    return metrics.render()
+
+@server.stream_route('/stream')
+def stream_live_state(query):
+    # Server-Sent Events: a full snapshot first, then `state` deltas and `tick` entries
+    return feed.subscribe(query)
 
 def run_server():
-    server.run(host=HOST, port=PORT, debug=False, use_reloader=False)
+    print(f"[HTTP] Ingest server listening on {HOST}:{PORT}")
+    server.serve_forever()
 
 # --- UDP LISTENER (PHASE 1) ---
 UDP_HOST = '127.0.0.1'
 UDP_PORT = 5005
-udp_queue = queue.Queue()
+capture = None  # CaptureWriter when started with --capture (see capture.py)
 
 def start_udp_listener():
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -253,14 +215,15 @@ def start_udp_listener():
     while True:
         try:
             data, addr = sock.recvfrom(4096)
+            udp_received.inc()
+            if capture: capture.record_udp(data)
             message = data.decode('utf-8')
             payload = json.loads(message)
             
-            udp_queue.put(payload)
-            
-            # Print strictly to console to verify the pipe is working
-            print(f"[UDP] {payload}")
+            core.submit_udp(payload)
+            udp_parsed.inc()
         except Exception as e:
+            udp_failed.inc()
             print(f"[UDP Error] {e}")
 
 # --- UI COMPONENT: COLLAPSIBLE FRAME ---
@@ -290,7 +253,7 @@ class CollapsibleFrame(ctk.CTkFrame):
 
 # --- GUI APP ---
 class BBDTrackerApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, core):
         super().__init__()
         self.title("BBD Laboratory v12 (Census Fix)")
         self.geometry("1400x900")
@@ -300,20 +263,18 @@ class BBDTrackerApp(ctk.CTk):
         self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # --- INITIALIZE MANAGERS FIRST ---
-        self.census = CensusManager()
-
-        # State
-        self.is_active = False
-        self.start_time = None
-        self.kill_count = 0
-        self.current_phase = "IDLE"
-        self.event_log = []
-        self.loot_tracker = {}
-        self.session_id = None
+        self.core = core
+        self.census = core.census
+
+        # UI state (session state lives in the core)
+        self.atlas = load_atlas()    # every icon is in memory; rendering never hits the disk
         self.img_cache = {}
-        self.sighting_cache = {} 
-        self.session_tape = {}  
-        self.current_tick = 0
+        self.all_time = LootAggregate(DATA_DIR)
+        self.loot_tables = {}    # parent frame -> retained rows (see render_table)
+        self.census_cards = {}   # census column -> {username: card widgets}
+        self.census_view_key = None
+        self.frame_times = []    # refresh_all_tables wall time per frame (ms)
+        self.pushed_config = None
 
         self.setup_ui()
         self.update_timer()
@@ -321,55 +282,58 @@ class BBDTrackerApp(ctk.CTk):
 
         self.dps_profiles = self.load_dps_profiles()
         self.check_dps_profile()
-        
-        threading.Thread(target=run_server, daemon=True).start()
-        threading.Thread(target=start_udp_listener, daemon=True).start()
 
-        self.process_udp_queue()
+        self.process_core_events()
 
-    def process_udp_queue(self):
+    def process_core_events(self):
+        # Notifications published by the core thread, applied to the widgets here
         try:
             while True:
-                payload = udp_queue.get_nowait()
-                ev_type = payload.get("event")
-                
-                # --- PHASE 6: THE IRON GATE & RAM BUFFER ---
-                if self.is_active:
-                    if ev_type == "tick_heartbeat":
-                        self.current_tick = payload.get("tick", self.current_tick)
-                        state = payload.get("state", "idle")
-                        
-                        # Initialize or update the state
-                        if self.current_tick not in self.session_tape:
-                            self.session_tape[self.current_tick] = {"state": state, "gp": 0}
-                        else:
-                            self.session_tape[self.current_tick]["state"] = state
-                            
-                    elif ev_type == "net_profit_delta":
-                        val = payload.get("value", 0)
-                        LIVE_HP_STATE["total_profit"] = LIVE_HP_STATE.get("total_profit", 0) + val
-                        print(f"[ECONOMY] Rx Drop: {val:,} GP | New Total: {LIVE_HP_STATE['total_profit']:,} GP")
-                        
-                        # Attach gold to the current tick (handling UDP race conditions)
-                        if self.current_tick not in self.session_tape:
-                            self.session_tape[self.current_tick] = {"state": "idle", "gp": 0}
-                        self.session_tape[self.current_tick]["gp"] += val
-
-                # --- THE ROLLING STREAM (For the Matrix UI) ---
-                if ev_type != "net_profit_delta":
-                    # Get the current stream, or initialize an empty list
-                    stream = LIVE_HP_STATE.get("udp_stream", [])
-                    stream.append(payload)
-                    
-                    # Cap the memory buffer at 50 ticks (30 seconds of history)
-                    if len(stream) > 50:
-                        stream.pop(0)
-                        
-                    LIVE_HP_STATE["udp_stream"] = stream
-                    
+                queued, event, data = ui_events.get_nowait()
+                tk_hop_hist.observe((time.perf_counter() - queued) * 1000)
+                self.on_core_event(event, data)
         except queue.Empty:
             pass
-        self.after(50, self.process_udp_queue)
+        self.after(50, self.process_core_events)
+
+    def on_core_event(self, event, data):
+        if event == "log":
+            self.log_box.insert("end", f"{data}\n")
+            self.log_box.see("end")
+
+        elif event == "phase":
+            self.lbl_phase.configure(text=data, text_color="#d32f2f" if data == "KILLING" else "gray")
+
+        elif event == "kills":
+            self.lbl_kills.configure(text=str(data))
+
+        elif event in ("session_started", "session_resumed"):
+            if event == "session_started":
+                self.log_box.delete("1.0", "end")
+                if self.gear_frame.is_expanded:
+                    self.gear_frame.toggle()
+            else:
+                self.apply_config(data["config"])
+            self.frame_times = []
+            self.lbl_phase.configure(text="AWAY", text_color="gray")
+            self.lbl_kills.configure(text=str(self.core.kill_count))
+            self.btn_start.configure(state="disabled")
+            self.btn_stop.configure(state="normal")
+            self.btn_manual_kill.configure(state="normal", fg_color="#d32f2f")
+            self.refresh_all_tables()
+
+        elif event == "draining":
+            # Lock the UI while the overlay sweeps the conveyor
+            self.btn_stop.configure(state="disabled", text="⏳ DRAINING...")
+            self.btn_manual_kill.configure(state="disabled", fg_color="#333")
+            # Queued ahead of finalize_stop, so it lands in the saved event log
+            self.core.command("log_event", type_="system", val=f"UI refresh: {self.describe_frame_times()}")
+
+        elif event == "session_ended":
+            self.btn_start.configure(state="normal")
+            self.btn_stop.configure(state="disabled", text="⏹ STOP & SAVE")
+            self.btn_manual_kill.configure(state="disabled", fg_color="#333")
+            self.refresh_all_tables()
 
     def setup_ui(self):
         self.grid_columnconfigure(0, weight=1) 
@@ -638,46 +602,81 @@ class BBDTrackerApp(ctk.CTk):
         return scroll
 
     def refresh_census(self):
-        # Clear
-        for scroll in [self.col_inbox, self.col_suspect, self.col_real]:
-            for w in scroll.winfo_children(): w.destroy()
-
         # --- FIX: Pass Session Start Time ---
         # Only show "Inbox" items that have been seen SINCE we clicked Start Session.
         # This keeps the inbox clean from yesterday's clutter.
-        if self.is_active and self.start_time:
-             session_start_dt = datetime.datetime.fromtimestamp(self.start_time)
+        if self.core.is_active and self.core.start_time:
+             session_start_dt = datetime.datetime.fromtimestamp(self.core.start_time)
         else:
              session_start_dt = None
 
         inbox_data = self.census.get_inbox(session_start_time=session_start_dt)
-        for row in inbox_data:
-            self.create_player_card(self.col_inbox, row, is_inbox=True)
 
-        # Suspects/Real lists persist (we want to see them even if not seen today)
-        suspect_data = self.census.get_category("SUSPECT")
-        for row in suspect_data:
-            self.create_player_card(self.col_suspect, row, is_inbox=False)
+        # Nothing written since the last paint: keep the cards as they are
+        view_key = (self.census.version, session_start_dt)
+        if view_key == self.census_view_key:
+            return
+        self.census_view_key = view_key
 
-        real_data = self.census.get_category("REAL")
-        for row in real_data:
-            self.create_player_card(self.col_real, row, is_inbox=False)
+        self.patch_census_column(self.col_inbox, inbox_data, is_inbox=True)
 
-    def create_player_card(self, parent, row, is_inbox):
+        # Suspects/Real lists persist (we want to see them even if not seen today)
+        self.patch_census_column(self.col_suspect, self.census.get_category("SUSPECT"), is_inbox=False)
+        self.patch_census_column(self.col_real, self.census.get_category("REAL"), is_inbox=False)
+
+    def patch_census_column(self, scroll, rows, is_inbox):
+        # Only cards that entered/left the column are created/destroyed; changed
+        # rows update their labels in place, and the column is re-packed only
+        # if the order moved.
+        cards = self.census_cards.setdefault(scroll, {})
+        wanted = [row[0] for row in rows]
+        wanted_set = set(wanted)
+
+        for username in [u for u in cards if u not in wanted_set]:
+            cards.pop(username)["card"].destroy()
+
+        for row in rows:
+            card = cards.get(row[0])
+            if card is None:
+                cards[row[0]] = self.create_player_card(scroll, row, is_inbox)
+            elif card["row"] != row:
+                self.update_player_card(card, row)
+
+        if list(cards) != wanted:
+            for username in wanted:
+                cards[username]["card"].pack_forget()
+            for username in wanted:
+                cards[username]["card"].pack(fill="x", pady=2, padx=2)
+            self.census_cards[scroll] = {u: cards[u] for u in wanted}
+
+    def player_card_text(self, row):
         username, combat, sightings, last_seen, status, notes = row
         
-        card = ctk.CTkFrame(parent, fg_color="#333")
-        card.pack(fill="x", pady=2, padx=2)
-        
         # Format Time
         try:
             dt = datetime.datetime.fromisoformat(last_seen.split('.')[0])
             time_str = dt.strftime("%H:%M") 
         except:
             time_str = "??"
+        return f"{username} (Lvl {combat})", f"Seen: {sightings}x | {time_str}"
 
-        ctk.CTkLabel(card, text=f"{username} (Lvl {combat})", font=("Arial", 11, "bold")).pack(anchor="w", padx=5)
-        ctk.CTkLabel(card, text=f"Seen: {sightings}x | {time_str}", font=("Arial", 10), text_color="gray").pack(anchor="w", padx=5)
+    def update_player_card(self, card, row):
+        title, info = self.player_card_text(row)
+        card["title"].configure(text=title)
+        card["info"].configure(text=info)
+        card["row"] = row
+
+    def create_player_card(self, parent, row, is_inbox):
+        username = row[0]
+        title, info = self.player_card_text(row)
+        
+        card = ctk.CTkFrame(parent, fg_color="#333")
+        card.pack(fill="x", pady=2, padx=2)
+
+        lbl_title = ctk.CTkLabel(card, text=title, font=("Arial", 11, "bold"))
+        lbl_title.pack(anchor="w", padx=5)
+        lbl_info = ctk.CTkLabel(card, text=info, font=("Arial", 10), text_color="gray")
+        lbl_info.pack(anchor="w", padx=5)
 
         btns = ctk.CTkFrame(card, fg_color="transparent", height=20)
         btns.pack(fill="x", padx=2, pady=2)
@@ -694,6 +693,8 @@ class BBDTrackerApp(ctk.CTk):
             ctk.CTkButton(btns, text="DEL", width=30, height=20, fg_color="#444", 
                           command=lambda u=username: self.move_player(u, "TRASH")).pack(side="right", padx=1)
 
+        return {"card": card, "title": lbl_title, "info": lbl_info, "row": row}
+
     def move_player(self, username, new_status):
         self.census.update_status(username, new_status)
         self.refresh_census()
@@ -717,161 +718,65 @@ class BBDTrackerApp(ctk.CTk):
 
     def load_image(self, item_name):
         if item_name in self.img_cache: return self.img_cache[item_name]
-        filename = item_name.lower().replace(" ", "_").replace("'", "").replace("-", "_") + ".png"
-        path = os.path.join(IMG_DIR, filename)
-        if os.path.exists(path):
-            try:
-                img = Image.open(path)
-                ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=(32, 32))
-                self.img_cache[item_name] = ctk_img
-                return ctk_img
-            except: pass
-        return None
+        img = self.atlas.image(item_name)
+        ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=(32, 32)) if img else None
+        self.img_cache[item_name] = ctk_img
+        return ctk_img
 
 
     # --- LOGIC ---
     def start_session(self):
-        self.is_active = True
-        self.start_time = time.time()
-        self.kill_count = 0
-        self.loot_tracker = {}
-        self.event_log = []
-        self.session_tape = {}  # Unified RAM buffer: {tick_num: {"state": "idle", "gp": 0}}
-        self.current_tick = 0
-        
-        # --- PHASE 6 FIX: Force initial transit state & economy reset ---
-        self.current_phase = "AWAY"
-        LIVE_HP_STATE["phase"] = "AWAY"
-        
-        # Hard-reset the economy accumulators so we always start clean
-        LIVE_HP_STATE["total_profit"] = 0 
-        LIVE_HP_STATE["udp_stream"] = []
-        
-        self.lbl_phase.configure(text="AWAY", text_color="gray")
-        self.session_id = f"session_{int(self.start_time)}"
-        self.sighting_cache = {}
-        
-        self.attack_count = 0
-        self.active_seconds_bank = 0.0
-        self.last_phase_timestamp = time.time()
-                
-        self.btn_start.configure(state="disabled")
-        self.btn_stop.configure(state="normal")
-        self.btn_manual_kill.configure(state="normal", fg_color="#d32f2f")
-        self.log_box.delete("1.0", "end")
-        
-        mode = self.mode_selector.get()
-        self.log_event("session_start", f"Session Started ({mode})")
-        
-        if self.gear_frame.is_expanded:
-            self.gear_frame.toggle()
-            
-        self.refresh_all_tables()
+        self.pushed_config = self.collect_config()
+        config_data, theoretical_stats = self.pushed_config
+        self.core.command("start_session", config=config_data, theoretical_stats=theoretical_stats)
 
     def stop_session(self):
-        if not self.is_active: return
-        
-        # 1. Lock the UI and initiate the drain
-        self.btn_stop.configure(state="disabled", text="⏳ DRAINING...")
-        self.btn_manual_kill.configure(state="disabled", fg_color="#333")
-        
-        # Signal the GUI overlay to begin the sweep
-        global LIVE_HP_STATE
-        LIVE_HP_STATE["drain_triggered"] = True
-        self.log_event("system", "Initiating Conveyor Drain...")
-
-    def finalize_stop(self, final_vault_gp=0):
-        # 2. Execute the save once the GUI confirms the vaults are full
-        self.is_active = False
-        self.btn_start.configure(state="normal")
-        self.btn_stop.configure(state="disabled", text="⏹ STOP & SAVE")
-        
-        global LIVE_HP_STATE
-        LIVE_HP_STATE["drain_triggered"] = False 
-        LIVE_HP_STATE["total_profit"] = 0 # Reset Flask accumulator for next session
-        
-        # --- PHASE 5: SQLITE PERSISTENCE ---
-        end_time = time.time()
-        duration_sec = end_time - self.start_time if self.start_time else 0
-        
-        try:
-            conn = sqlite3.connect('combat_telemetry.db')
-            c = conn.cursor()
-            c.execute("""INSERT INTO sessions (session_id, start_time, end_time, duration_sec, active_sec, total_attacks, total_kills, net_profit)
-                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                      (self.session_id, datetime.datetime.fromtimestamp(self.start_time).isoformat(), 
-                       datetime.datetime.fromtimestamp(end_time).isoformat(), duration_sec, 
-                       self.active_seconds_bank, self.attack_count, self.kill_count, final_vault_gp))
-            
-            # --- PARSE THE UNIFIED TAPE FOR SQLITE ---
-            tick_dump = []
-            profit_dump = []
-            for tick_num, data in self.session_tape.items():
-                tick_dump.append((self.session_id, tick_num, data["state"]))
-                if data["gp"] != 0:
-                    profit_dump.append((self.session_id, tick_num, data["gp"]))
-                    
-            c.executemany("INSERT INTO combat_ticks (session_id, tick_number, state) VALUES (?, ?, ?)", tick_dump)
-            c.executemany("INSERT INTO profit_deltas (session_id, tick_number, delta_gp) VALUES (?, ?, ?)", profit_dump)
-            
-            conn.commit()
-            conn.close()
-            self.log_event("system", f"SQLite Vault Saved: {final_vault_gp:,} GP")
-        except Exception as e:
-            self.log_event("error", f"SQLite Save Failed: {e}")
+        self.core.command("stop_session")
 
-        # Inject final GP into the JSON payload before saving
-        self.loot_tracker["_final_net_profit"] = final_vault_gp
-        
-        self.log_event("session_end", "Session Ended (Conveyor Swept)")
-        self.save_data()
-        self.refresh_all_tables()
+    def manual_kill(self):
+        self.core.command("manual_kill")
+
+    def push_config(self):
+        # The core journals config changes; only send it when a widget changed
+        config = self.collect_config()
+        if config != self.pushed_config:
+            self.pushed_config = config
+            self.core.command("set_config", config=config[0], theoretical_stats=config[1])
 
     def on_close(self):
-        if self.is_active: self.stop_session()
+        if self.core.is_active: self.stop_session()
+        self.core.command("shutdown")
+        self.core.join(timeout=2)
+        self.census.close()
+        if capture:
+            capture.close()
+            print(f"[CAPTURE] {capture.describe()}")
         self.destroy()
 
-    def get_iso_time(self):
-        return datetime.datetime.now().isoformat()
-
-    def log_event(self, type_, val):
-        ts_iso = self.get_iso_time()
-        ts_display = datetime.datetime.now().strftime("%H:%M:%S")
-        self.log_box.insert("end", f"[{ts_display}] {val}\n")
-        self.log_box.see("end")
-        self.event_log.append({"timestamp": ts_iso, "type": type_, "value": val})
-
-    def save_data(self, silent=False):
-        if not self.session_id: return
-        
-        # --- Calculate current active time if we are currently KILLING ---
-        current_active_bonus = 0.0
-        if self.current_phase == "KILLING":
-            current_active_bonus = time.time() - self.last_phase_timestamp
-            
-        total_active_seconds = self.active_seconds_bank + current_active_bonus
-        # ----------------------------------------------------------------------
-
-        config_data = {
-            "experiment_name": self.entry_exp_name.get(),
-            "mode": self.mode_selector.get(),
-            "weapon": self.cfg_weapon.get(),
-            "head": self.cfg_head.get(),
-            "body": self.cfg_body.get(),
-            "legs": self.cfg_legs.get(),
-            "hands": self.cfg_hands.get(),
-            "ammo": self.cfg_ammo.get(),
-            "ring": self.cfg_ring.get(),
-            "back": self.cfg_back.get(),
-            "feet": self.cfg_feet.get(),
-            "prayer": self.cfg_pray.get(),
-            "tele": self.cfg_tele.get(),
-            "bank": self.cfg_bank.get(), 
+    def config_fields(self):
+        return {
+            "experiment_name": self.entry_exp_name,
+            "mode": self.mode_selector,
+            "weapon": self.cfg_weapon,
+            "head": self.cfg_head,
+            "body": self.cfg_body,
+            "legs": self.cfg_legs,
+            "hands": self.cfg_hands,
+            "ammo": self.cfg_ammo,
+            "ring": self.cfg_ring,
+            "back": self.cfg_back,
+            "feet": self.cfg_feet,
+            "prayer": self.cfg_pray,
+            "tele": self.cfg_tele,
+            "bank": self.cfg_bank, 
             # --- NEW FIELD ---
-            "bones": self.cfg_bones.get(),
-            "pray_restore": self.cfg_pray_restore.get(),
+            "bones": self.cfg_bones,
+            "pray_restore": self.cfg_pray_restore,
         }
 
+    def collect_config(self):
+        config_data = {key: widget.get() for key, widget in self.config_fields().items()}
+
         theoretical_stats = {}
         try:
             theoretical_stats = {
@@ -885,53 +790,45 @@ class BBDTrackerApp(ctk.CTk):
                 "pray_bonus": float(self.ent_pray_bonus.get() or 0)
             }
         except: pass
+        return config_data, theoretical_stats
 
-        data = {
-            "session_id": self.session_id,
-            "start_time": datetime.datetime.fromtimestamp(self.start_time).isoformat(),
-            "end_time": self.get_iso_time(),
-            "total_kills": self.kill_count,
-            "total_attacks": self.attack_count,
-            "active_seconds": total_active_seconds,
-            "config": config_data,
-            "theoretical_stats": theoretical_stats,
-            "loot_summary": self.loot_tracker,
-            "event_timeline": self.event_log,
-            "game_tape": self.session_tape
-        }
-        
-        with open(f"{DATA_DIR}/{self.session_id}.json", 'w') as f:
-            json.dump(data, f, indent=4)
-            
-        if not silent:
-            self.log_event("system", "Data Saved Successfully.")
+    def apply_config(self, config):
+        for key, widget in self.config_fields().items():
+            value = config.get(key)
+            if value is None: continue
+            if key == "experiment_name":
+                widget.delete(0, "end"); widget.insert(0, value)
+            else:
+                widget.set(value)
 
     def update_timer(self):
-        if self.is_active and self.start_time:
-            elapsed = time.time() - self.start_time
+        view = self.core.view()
+        if view["is_active"] and view["start_time"]:
+            elapsed = time.time() - view["start_time"]
             m, s = divmod(elapsed, 60)
             h, m = divmod(m, 60)
             self.lbl_timer.configure(text=f"{int(h):02d}:{int(m):02d}:{int(s):02d}")
             if elapsed > 0:
-                self.lbl_kph.configure(text=f"{(self.kill_count / (elapsed/3600)):.2f}")
+                self.lbl_kph.configure(text=f"{(view['kill_count'] / (elapsed/3600)):.2f}")
         self.after(1000, self.update_timer)
 
     def start_ui_refresh_loop(self):
-        if self.is_active:
+        if self.core.is_active:
+            self.push_config()
             self.refresh_all_tables()
         self.after(3000, self.start_ui_refresh_loop) # Throttle teardown to every 3 seconds
 
-    def add_loot(self, item_name, qty):
-        self.loot_tracker[item_name] = self.loot_tracker.get(item_name, 0) + qty
-
     # --- AGGREGATION & RENDERING ---
     
     def refresh_all_tables(self):
+        frame_start = time.perf_counter()
+        view = self.core.view()
+
         # 1. Render Current Session
-        self.render_table(self.scroll_current, self.loot_tracker, self.kill_count, show_all=False)
+        self.render_table(self.scroll_current, view["loot"], view["kill_count"], show_all=False)
         
         # 2. Calculate All-Time Stats
-        all_time_kills, all_time_loot = self.calculate_all_time_stats()
+        all_time_kills, all_time_loot = self.calculate_all_time_stats(view)
         
         # 3. Render All-Time
         self.render_table(self.scroll_all_time, all_time_loot, all_time_kills, show_all=True)
@@ -939,40 +836,42 @@ class BBDTrackerApp(ctk.CTk):
         # 4. Refresh Census
         self.refresh_census()
 
-        # --- LIVE AUTO-SAVE ---
-        if self.is_active:
-            self.save_data(silent=True)
-
-    def calculate_all_time_stats(self):
-        total_kills = 0
-        total_loot = {}
-
-        for filename in os.listdir(DATA_DIR):
-            if filename.endswith(".json"):
-                try:
-                    with open(os.path.join(DATA_DIR, filename), 'r') as f:
-                        data = json.load(f)
-                        total_kills += data.get("total_kills", 0)
-                        session_loot = data.get("loot_summary", {})
-                        for item, qty in session_loot.items():
-                            total_loot[item] = total_loot.get(item, 0) + qty
-                except:
-                    pass
-        
-        if self.is_active:
-            if f"{self.session_id}.json" not in os.listdir(DATA_DIR):
-                total_kills += self.kill_count
-                for item, qty in self.loot_tracker.items():
-                    total_loot[item] = total_loot.get(item, 0) + qty
+        self.frame_times.append((time.perf_counter() - frame_start) * 1000)
+        if len(self.frame_times) > FRAME_SAMPLES:
+            del self.frame_times[:-FRAME_SAMPLES]
+
+    def calculate_all_time_stats(self, view):
+        # Materialized totals: only session files whose mtime/size changed are re-read
+        self.all_time.refresh()
+
+        if not view["is_active"]:
+            return self.all_time.totals()
+
+        # The live session's file on disk lags the journal; count it from memory instead
+        total_kills, total_loot = self.all_time.totals(exclude=f"{view['session_id']}.json")
+        total_kills += view["kill_count"]
+        for item, qty in view["loot"].items():
+            total_loot[item] = total_loot.get(item, 0) + qty
 
         return total_kills, total_loot
 
+    def describe_frame_times(self):
+        if not self.frame_times:
+            return "no frames"
+        ft = sorted(self.frame_times)
+        p95 = ft[min(len(ft) - 1, int(len(ft) * 0.95))]
+        return f"{len(ft)} frames, avg {statistics.fmean(ft):.1f}ms, p95 {p95:.1f}ms, max {ft[-1]:.1f}ms"
+
     def render_table(self, parent_frame, loot_data, kills, show_all=False):
-        for widget in parent_frame.winfo_children(): widget.destroy()
-        
-        headers = ["", "Item", "Actual", "Expected", "Luck"]
-        for i, h in enumerate(headers):
-            ctk.CTkLabel(parent_frame, text=h, font=("Arial", 12, "bold")).grid(row=0, column=i, padx=5, pady=5, sticky="w")
+        # Retained table: each row's widgets are created once and only the
+        # cells whose text/colour changed are reconfigured on later refreshes.
+        table = self.loot_tables.get(parent_frame)
+        if table is None:
+            headers = ["", "Item", "Actual", "Expected", "Luck"]
+            for i, h in enumerate(headers):
+                ctk.CTkLabel(parent_frame, text=h, font=("Arial", 12, "bold")).grid(row=0, column=i, padx=5, pady=5, sticky="w")
+            table = self.loot_tables[parent_frame] = {"rows": {}, "order": []}
+        rows = table["rows"]
 
         if show_all:
             items_to_show = list(DROP_TABLE.keys())
@@ -981,7 +880,19 @@ class BBDTrackerApp(ctk.CTk):
 
         sorted_items = sorted(items_to_show, key=lambda x: (DROP_TABLE.get(x, {}).get("cat", "Z") != "Unique", x))
 
-        row_idx = 1
+        # One vectorized, memoized CDF call for every item that can have luck
+        luck = {}
+        if kills > 0:
+            rates, observed = {}, {}
+            for name in sorted_items:
+                info = DROP_TABLE.get(name, {})
+                rate = info.get("rate", 0)
+                if 0 < rate < 1.0:
+                    rates[name] = rate
+                    observed[name] = int(loot_data.get(name, 0) / info.get("qty", 1))
+            luck = luck_engine.percentiles(kills, observed, rates)
+
+        visible = []
         for name in sorted_items:
             actual = loot_data.get(name, 0)
             drop_info = DROP_TABLE.get(name, {})
@@ -990,16 +901,22 @@ class BBDTrackerApp(ctk.CTk):
             
             if not show_all and actual == 0 and drop_info.get("cat") not in ["Unique", "Guaranteed"]: 
                 continue
+            visible.append(name)
+
+            row = rows.get(name)
+            if row is None:
+                row = rows[name] = self.create_loot_row(parent_frame, name)
+            if row["key"] == (actual, kills):
+                continue
+            row["key"] = (actual, kills)
 
             expected = kills * rate * avg_qty
             
             luck_text = "-"
             luck_color = "gray"
             
-            if kills > 0 and rate > 0 and rate < 1.0:
-                events_actual = actual / avg_qty
-                cdf = binom.cdf(int(events_actual), kills, rate)
-                percentile = cdf * 100
+            if name in luck:
+                percentile = luck[name]
                 
                 if actual > expected:
                     luck_text = f"Top {100-percentile:.1f}%"
@@ -1013,85 +930,101 @@ class BBDTrackerApp(ctk.CTk):
 
             text_color = "white" if actual > 0 else "gray"
 
-            img = self.load_image(name)
-            if img: ctk.CTkLabel(parent_frame, text="", image=img).grid(row=row_idx, column=0, padx=2, pady=2)
-            else: ctk.CTkLabel(parent_frame, text="?").grid(row=row_idx, column=0, padx=2, pady=2)
-
-            ctk.CTkLabel(parent_frame, text=name, anchor="w", text_color=text_color).grid(row=row_idx, column=1, sticky="w", padx=5)
-            ctk.CTkLabel(parent_frame, text=str(actual), text_color=text_color).grid(row=row_idx, column=2, padx=5)
-            ctk.CTkLabel(parent_frame, text=f"{expected:.1f}", text_color=text_color).grid(row=row_idx, column=3, padx=5)
-            ctk.CTkLabel(parent_frame, text=luck_text, text_color=luck_color).grid(row=row_idx, column=4, padx=5)
-            row_idx += 1
-
-    def manual_kill(self):
-        self.process_kill(manual=True)
-
-    def process_kill(self, loot_items=None, manual=False):
-        self.kill_count += 1
-        self.lbl_kills.configure(text=str(self.kill_count))
-        source = "Manual" if manual else "Auto"
-        
-        self.log_event("kill", f"Kill Confirmed ({source})")
-        
-        # Guaranteed
-        self.add_loot("Dragon bones", 1)
-        self.add_loot("Black dragonhide", 2)
-        
-        # Variable
-        if loot_items:
-            for item in loot_items:
-                i_id = item.get('id')
-                qty = item.get('qty')
-                name = ITEM_MAP.get(i_id, f"Item {i_id}")
-                
-                if name not in ["Dragon bones", "Black dragonhide"]:
-                    self.add_loot(name, qty)
-                    self.log_event("loot", f"-> {qty}x {name}")
-
-    def process_event(self, event_type, payload):
-        if not self.is_active: return
-        
-        # --- NEW: Catch Attack ---
-        if event_type == "player_attack":
-            self.attack_count += 1
-            LIVE_HP_STATE["last_attack"] = time.time()
-
-        elif event_type == "phase_change":
-            in_zone = payload.get("in_zone")
-            phase = "KILLING" if in_zone else "AWAY"
-            if phase != self.current_phase:
-                
-                # --- Calculate elapsed time before switching phases ---
-                now = time.time()
-                if self.current_phase == "KILLING":
-                    self.active_seconds_bank += (now - self.last_phase_timestamp)
-                self.last_phase_timestamp = now
-                # -----------------------------------------------------------
-                
-                self.current_phase = phase
-                LIVE_HP_STATE["phase"] = phase
-                self.lbl_phase.configure(text=phase, text_color="#d32f2f" if in_zone else "gray")
-                self.log_event("phase", f"Phase Changed: {phase}")
-                self.save_data(silent=True) # Save quietly on phase change
-                
-        elif event_type == "loot_event":
-            self.process_kill(loot_items=payload.get("items", []))
-            
-        elif event_type == "player_spawn":
-            # --- CENSUS INTEGRATION ---
-            result = self.census.log_sighting(
-                self.session_id, 
-                payload['name'], 
-                payload['combat'], 
-                payload['world'], 
-                payload.get('gear', [])
+            cells = (
+                (text_color, None),
+                (text_color, str(actual)),
+                (text_color, f"{expected:.1f}"),
+                (luck_color, luck_text),
             )
-            
-            if result:
-                if result['roster_status'] == 'NEW':
-                    self.log_event("census", f"New Player: {payload['name']}")
+            for i, (color, text) in enumerate(cells):
+                if row["cells"][i] != (color, text):
+                    label = row["widgets"][i + 1]
+                    if text is None: label.configure(text_color=color)
+                    else: label.configure(text=text, text_color=color)
+                    row["cells"][i] = (color, text)
+
+        # Re-grid only when the set or order of visible rows changed
+        if visible != table["order"]:
+            for name in table["order"]:
+                if name not in visible:
+                    for w in rows[name]["widgets"]: w.grid_remove()
+            for row_idx, name in enumerate(visible, start=1):
+                icon, name_lbl, actual_lbl, exp_lbl, luck_lbl = rows[name]["widgets"]
+                icon.grid(row=row_idx, column=0, padx=2, pady=2)
+                name_lbl.grid(row=row_idx, column=1, sticky="w", padx=5)
+                actual_lbl.grid(row=row_idx, column=2, padx=5)
+                exp_lbl.grid(row=row_idx, column=3, padx=5)
+                luck_lbl.grid(row=row_idx, column=4, padx=5)
+            table["order"] = visible
+
+    def create_loot_row(self, parent_frame, name):
+        img = self.load_image(name)
+        if img: icon = ctk.CTkLabel(parent_frame, text="", image=img)
+        else: icon = ctk.CTkLabel(parent_frame, text="?")
+        widgets = (
+            icon,
+            ctk.CTkLabel(parent_frame, text=name, anchor="w"),
+            ctk.CTkLabel(parent_frame, text=""),
+            ctk.CTkLabel(parent_frame, text=""),
+            ctk.CTkLabel(parent_frame, text=""),
+        )
+        return {"widgets": widgets, "cells": [None] * 4, "key": None}
+
+def run_headless(config_path=None, start=False):
+    # No Tk at all: the core runs on its own thread and its log goes to the console
+    core.subscribe(lambda event, data: print(f"[CORE] {data}") if event == "log" else None)
+    core.start()
+    core.command("recover_crashed_sessions")
+
+    if start:
+        config, theoretical_stats = {}, {}
+        if config_path:
+            # Same shape as a session document, so a previous session JSON can be reused
+            with open(config_path, "r") as f:
+                doc = json.load(f)
+            config, theoretical_stats = doc.get("config", {}), doc.get("theoretical_stats", {})
+        core.command("start_session", config=config, theoretical_stats=theoretical_stats)
+
+    print("[HEADLESS] Tracker running; POST /session {\"action\": \"start\"|\"stop\"} or Ctrl+C to finish.")
+    try:
+        while core.thread.is_alive():
+            core.join(0.5)
+    except KeyboardInterrupt:
+        # No overlay to wait for: finalize with the live economy total
+        core.command("finalize_stop", final_vault_gp=LIVE_HP_STATE.get("total_profit", 0))
+        core.command("shutdown")
+        core.join()
+
+    core.census.close()
+    if capture:
+        capture.close()
+        print(f"[CAPTURE] {capture.describe()}")
 
 if __name__ == "__main__":
-    app = BBDTrackerApp()
-    app_instance = app
-    app.mainloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="BBD session tracker")
+    parser.add_argument('--capture', metavar='PATH', help="Record every /event body and UDP datagram to a capture file for replay_capture.py")
+    parser.add_argument('--headless', action='store_true', help="Run the server and tracker core without the Tk window")
+    parser.add_argument('--start', action='store_true', help="With --headless, begin a session immediately")
+    parser.add_argument('--config', metavar='JSON', help="With --start, session config (a previous session JSON works)")
+    args = parser.parse_args()
+
+    if args.capture:
+        capture = CaptureWriter(args.capture)
+        server.tap = capture.record_http
+        print(f"[CAPTURE] Recording telemetry to {args.capture}")
+
+    core = TrackerCore(DATA_DIR, telemetry=telemetry, census=CensusManager(), set_live_state=set_live_state,
+                       publish_tick=publish_tick, clear_ticks=udp_ring.clear)
+    telemetry.start()
+    threading.Thread(target=run_server, daemon=True).start()
+    threading.Thread(target=start_udp_listener, daemon=True).start()
+
+    if args.headless:
+        run_headless(args.config, args.start)
+    else:
+        core.subscribe(queue_ui_event)
+        app = BBDTrackerApp(core)
+        app_instance = app
+        core.start()
+        core.command("recover_crashed_sessions")
+        app.mainloop()
\ No newline at end of file
@@ -1,12 +1,11 @@
-import json
 import os
-import glob
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.font_manager as fm
 import numpy as np
 import config
+import session_store
 
 # --- CONFIGURATION ---
 DATA_DIR = "bbd_data"
@@ -27,50 +26,48 @@ except:
     label_font = fm.FontProperties(family='sans-serif', weight='bold', size=12)
 
 def load_sessions():
-    files = glob.glob(os.path.join(DATA_DIR, "*.json"))
-    sessions = []
+    conn = session_store.open_store(data_dir=DATA_DIR)
+    try:
+        summaries = session_store.list_sessions(conn, min_kills=5)
+        configs = session_store.load_config(conn)
+        events = session_store.load_events(conn)
+    finally:
+        conn.close()
 
-    for f in files:
-        try:
-            with open(f, 'r') as file:
-                data = json.load(file)
-                if data.get('total_kills', 0) < 5: continue
+    sessions = []
+    for data in summaries:
+        sid = data['session_id']
+        start_ms = data['start_ms']
+        if start_ms is None or data['end_ms'] is None: continue
+        config = configs.get(sid, {})
+
+        # Parse Events (minutes since the session started)
+        parsed_events = []
+        kill_timestamps = []
+        for ts_ms, ts, type_, value in events.get(sid, []):
+            if ts_ms is None: continue
+            delta_min = (ts_ms - start_ms) / 60000
+
+            parsed_events.append({
+                'type': type_,
+                'val': value if value is not None else '',
+                'min': delta_min,
+                'ts': pd.to_datetime(ts)
+            })
+
+            if type_ == 'kill':
+                kill_timestamps.append(delta_min)
+
+        sessions.append({
+            "id": sid,
+            "name": config.get('experiment_name', 'Unnamed'),
+            "weapon": config.get('weapon', 'Unknown'),
+            "kills": sorted(kill_timestamps),
+            "events": parsed_events,
+            "total": data['total_kills'],
+            "duration": (data['end_ms'] - start_ms) / 60000
+        })
 
-                # Parse Timestamps
-                start_time = pd.to_datetime(data['start_time'])
-                end_time = pd.to_datetime(data['end_time'])
-                
-                # Parse Events
-                raw_events = data.get('event_timeline', []) or data.get('events', [])
-                parsed_events = []
-                kill_timestamps = []
-
-                for e in raw_events:
-                    ts = pd.to_datetime(e['timestamp'])
-                    delta_min = (ts - start_time).total_seconds() / 60
-                    
-                    parsed_events.append({
-                        'type': e['type'],
-                        'val': e.get('value', ''),
-                        'min': delta_min,
-                        'ts': ts
-                    })
-                    
-                    if e['type'] == 'kill':
-                        kill_timestamps.append(delta_min)
-
-                sessions.append({
-                    "id": data.get('session_id'),
-                    "name": data.get('config', {}).get('experiment_name', 'Unnamed'),
-                    "weapon": data.get('config', {}).get('weapon', 'Unknown'),
-                    "kills": sorted(kill_timestamps),
-                    "events": parsed_events,
-                    "total": data.get('total_kills'),
-                    "duration": (end_time - start_time).total_seconds() / 60
-                })
-        except Exception as e:
-            print(f"Error reading {f}: {e}")
-            
     return sessions
 
 # --- CHART 1: VELOCITY (Existing) ---
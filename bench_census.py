@@ -0,0 +1,128 @@
+"""
+CENSUS BENCHMARK
+================
+
+Replays a crowded-zone spawn burst against a throwaway census.db and reports
+log_sighting throughput and per-call latency.
+
+Two strategies are compared:
+  * legacy  - new connection per spawn, un-indexed duplicate SELECT, up to
+              four statements and a commit per call (the old CensusManager)
+  * batched - the current CensusManager: one connection, per-session
+              seen-set, batched UPSERTs
+
+The workload draws spawns from a pool of players across a few worlds, so
+most calls are flicker duplicates, as when processPlayerSighting fires for
+every player in the zone each time the scene reloads.
+
+USAGE:
+  > python bench_census.py                          # both modes, 20k spawns
+  > python bench_census.py --spawns 100000 --players 2000 --history 200000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from census_manager import CensusManager
+
+
+def legacy_log_sighting(db_path, session_id, name, combat_level, world, gear_ids):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    now = datetime.datetime.now()
+    c.execute("SELECT id FROM sightings WHERE username = ? AND session_id = ? AND world = ?", (name, session_id, world))
+    is_duplicate = c.fetchone() is not None
+    c.execute("SELECT total_sightings, status FROM roster WHERE username = ?", (name,))
+    row = c.fetchone()
+    if row:
+        if row[1] == 'TRASH' and not is_duplicate:
+            c.execute("UPDATE roster SET status = 'NEW' WHERE username = ?", (name,))
+        if not is_duplicate:
+            c.execute("UPDATE roster SET latest_seen = ?, total_sightings = total_sightings + 1, combat_level = ? WHERE username = ?",
+                      (now, combat_level, name))
+        else:
+            c.execute("UPDATE roster SET latest_seen = ? WHERE username = ?", (now, name))
+    else:
+        c.execute("INSERT INTO roster (username, status, combat_level, first_seen, latest_seen, total_sightings) VALUES (?, 'NEW', ?, ?, ?, 1)",
+                  (name, combat_level, now, now))
+    if not is_duplicate:
+        c.execute("INSERT INTO sightings (username, session_id, world, timestamp, gear_json) VALUES (?, ?, ?, ?, ?)",
+                  (name, session_id, world, now, json.dumps(gear_ids)))
+    conn.commit()
+    conn.close()
+
+
+def build_db(path, history, players):
+    """Creates the schema in its pre-index form, with `history` old sightings."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute('''CREATE TABLE roster (username TEXT PRIMARY KEY, status TEXT DEFAULT 'NEW', combat_level INTEGER,
+                    first_seen DATETIME, latest_seen DATETIME, total_sightings INTEGER DEFAULT 0, notes TEXT)''')
+    conn.execute('''CREATE TABLE sightings (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, session_id TEXT,
+                    world INTEGER, timestamp DATETIME, gear_json TEXT)''')
+    now = datetime.datetime.now()
+    conn.executemany("INSERT INTO sightings (username, session_id, world, timestamp, gear_json) VALUES (?, ?, ?, ?, '[]')",
+                     ((f"old_{i % players}", f"old_session_{i // players}", 300 + i % 5, now) for i in range(history)))
+    conn.commit()
+    conn.close()
+
+
+def workload(spawns, players, worlds):
+    rng = random.Random(7)
+    pool = [f"player_{i}" for i in range(players)]
+    return [(rng.choice(pool), rng.randint(60, 126), rng.choice(worlds)) for _ in range(spawns)]
+
+
+def run(mode, spawns, players, history):
+    tmp = tempfile.mkdtemp(prefix="bbd_census_")
+    db_path = os.path.join(tmp, "census.db")
+    build_db(db_path, history, players)
+    calls = workload(spawns, players, [301, 302, 303])
+    session_id = "bench_session"
+    latencies = []
+
+    census = CensusManager(db_path) if mode == "batched" else None
+    start = time.perf_counter()
+    for name, combat, world in calls:
+        t0 = time.perf_counter()
+        if census:
+            census.log_sighting(session_id, name, combat, world, [])
+        else:
+            legacy_log_sighting(db_path, session_id, name, combat, world, [])
+        latencies.append((time.perf_counter() - t0) * 1000)
+    if census:
+        census.close()
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT COUNT(*) FROM sightings WHERE session_id = ?", (session_id,)).fetchone()[0]
+    conn.close()
+
+    latencies.sort()
+    print(f"[{mode:>7}] {spawns} spawns in {elapsed:.2f}s -> {spawns / elapsed * 60:,.0f} spawns/min | "
+          f"p50 {statistics.median(latencies):.3f}ms  p99 {latencies[int(len(latencies) * 0.99)]:.3f}ms  "
+          f"max {latencies[-1]:.2f}ms | session sightings: {rows}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CensusManager log_sighting benchmark")
+    parser.add_argument('--mode', choices=['legacy', 'batched', 'both'], default='both')
+    parser.add_argument('--spawns', type=int, default=20000)
+    parser.add_argument('--players', type=int, default=400)
+    parser.add_argument('--history', type=int, default=100000, help="Pre-existing sightings rows")
+    args = parser.parse_args()
+
+    modes = ['legacy', 'batched'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        run(mode, args.spawns, args.players, args.history)
+
+
+if __name__ == "__main__":
+    main()
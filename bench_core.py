@@ -0,0 +1,109 @@
+"""
+TRACKER CORE BENCHMARK
+======================
+
+CPU cost of pure event processing in tracker_core.TrackerCore, with no Tk,
+no sockets and no HTTP in the way.
+
+A synthetic session is generated up front (tick heartbeats, profit deltas,
+phase changes, loot events, player spawns, attacks) and submitted to the
+core's queue, then drained synchronously on this thread. Reported numbers
+cover the whole path an event takes inside the tracker: dispatch, tape,
+loot/kill counting, journal appends and periodic checkpoints, and the
+final save when the session is finalized.
+
+Everything is written to a throwaway directory. By default the telemetry
+writer and census are left out so only the core itself is measured;
+--census adds a real CensusManager on a scratch census.db.
+
+USAGE:
+  > python bench_core.py                             # 100k ticks
+  > python bench_core.py --ticks 500000 --census
+  > python bench_core.py --loss 0.01
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from census_manager import CensusManager
+from telemetry_schema import migrate
+from tracker_core import TrackerCore
+
+
+def workload(ticks, players, loss=0.0):
+    rng = random.Random(11)
+    events = []
+    in_zone = False
+    for tick in range(1000, 1000 + ticks):
+        attacking = rng.random() < 0.4
+        if rng.random() >= loss:
+            events.append(("udp", {"event": "tick_heartbeat", "tick": tick, "state": "attack" if attacking else "idle"}))
+        if attacking:
+            events.append(("event", ("player_attack", {})))
+        if rng.random() < 0.05:
+            events.append(("udp", {"event": "net_profit_delta", "value": rng.randint(18000, 105000)}))
+        if rng.random() < 0.02:
+            events.append(("event", ("loot_event", {"items": [{"id": 536, "qty": 1}, {"id": 1747, "qty": 2},
+                                                              {"id": rng.choice([560, 563, 892, 452]), "qty": 75}]})))
+        if rng.random() < 0.01:
+            in_zone = not in_zone
+            events.append(("event", ("phase_change", {"in_zone": in_zone})))
+        if players and rng.random() < 0.05:
+            events.append(("event", ("player_spawn", {"name": f"player_{rng.randint(0, players - 1)}",
+                                                      "combat": rng.randint(60, 126), "world": 302, "gear": []})))
+    return events
+
+
+def run(ticks, use_census, players, loss=0.0):
+    tmp = tempfile.mkdtemp(prefix="bbd_core_")
+    db_path = os.path.join(tmp, "combat_telemetry.db")
+    migrate(db_path, quiet=True)
+
+    census = CensusManager(os.path.join(tmp, "census.db")) if use_census else None
+    published = []
+    events = workload(ticks, players if use_census else 0, loss)
+    # Everything is queued before draining, so the UDP buffer must hold the whole session
+    core = TrackerCore(tmp, census=census, publish_tick=published.append, db_path=db_path,
+                       session_db=os.path.join(tmp, "bbd_sessions.db"), udp_queue_max=len(events))
+    core.start_session(config={"mode": "Benchmark"})
+
+    start = time.perf_counter()
+    for kind, data in events:
+        if kind == "udp":
+            core.submit_udp(data)
+        else:
+            core.submit_event(*data)
+    submitted = time.perf_counter()
+    core.drain()
+    processed = core.processed
+    drained = time.perf_counter()
+    core.finalize_stop(final_vault_gp=core.total_profit)
+    done = time.perf_counter()
+
+    if census:
+        census.close()
+
+    print(f"[CORE] {processed} events ({ticks} ticks, {core.kill_count} kills, {len(core.loot_tracker)} loot lines"
+          f"{', census on' if census else ''})")
+    print(f"[CORE] submit {(submitted - start) * 1e6 / processed:.2f}us/event | "
+          f"process {(drained - submitted) * 1e6 / processed:.2f}us/event -> {processed / (drained - submitted):,.0f} events/s")
+    summary = core.loss_summary()
+    print(f"[CORE] heartbeat loss: {summary['ticks_lost']} lost in {summary['gaps']} gaps ({summary['loss_pct']}%)")
+    print(f"[CORE] finalize + save {(done - drained) * 1000:.1f}ms | published {len(published)} ticks | data in {tmp}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrackerCore event processing benchmark")
+    parser.add_argument('--ticks', type=int, default=100000, help="Game ticks in the synthetic session")
+    parser.add_argument('--census', action='store_true', help="Include player_spawn events against a scratch census.db")
+    parser.add_argument('--players', type=int, default=400)
+    parser.add_argument('--loss', type=float, default=0.0, help="Fraction of heartbeats to drop (exercises tick_loss)")
+    args = parser.parse_args()
+    run(args.ticks, args.census, args.players, args.loss)
+
+
+if __name__ == "__main__":
+    main()
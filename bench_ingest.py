@@ -0,0 +1,146 @@
+"""
+INGEST BENCHMARK
+================
+
+Measures sustained /event throughput of the asyncio ingest server under a
+hitsplat burst, against a throwaway SQLite file.
+
+Two persistence strategies are compared:
+  * legacy  - connect / INSERT / commit / close inside the request handler
+              (what the Flask route used to do)
+  * queued  - the handler only enqueues the row; a writer thread group-commits
+
+USAGE:
+  > python bench_ingest.py                      # both modes, 8 clients, 5s each
+  > python bench_ingest.py --mode queued --clients 32 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from ingest_server import IngestServer
+
+HOST = "127.0.0.1"
+
+
+def init_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE IF NOT EXISTS hitsplats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT,
+            timestamp DATETIME, damage INTEGER, dragon_hp_before INTEGER)''')
+    conn.commit()
+    conn.close()
+
+
+def build_server(mode, db_path, port):
+    server = IngestServer(HOST, port)
+    rows = queue.Queue()
+
+    def writer():
+        conn = sqlite3.connect(db_path)
+        while True:
+            batch = [rows.get()]
+            try:
+                while True:
+                    batch.append(rows.get_nowait())
+            except queue.Empty:
+                pass
+            conn.executemany("INSERT INTO hitsplats (session_id, timestamp, damage, dragon_hp_before) VALUES (?, ?, ?, ?)", batch)
+            conn.commit()
+
+    @server.route('/event', methods=['POST'])
+    def handle_event(data):
+        payload = data.get('payload') or {}
+        row = ("bench", time.time(), payload.get('damage', 0), payload.get('hp_before', -1))
+        if mode == "legacy":
+            conn = sqlite3.connect(db_path)
+            conn.execute("INSERT INTO hitsplats (session_id, timestamp, damage, dragon_hp_before) VALUES (?, ?, ?, ?)", row)
+            conn.commit()
+            conn.close()
+        else:
+            rows.put(row)
+        return {"status": "logged"}
+
+    if mode == "queued":
+        threading.Thread(target=writer, daemon=True).start()
+    return server, rows
+
+
+async def client(port, deadline, latencies):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    body = json.dumps({"event": "combat_telemetry", "payload": {"damage": 42, "hp_before": 315}}).encode()
+    request = (f"POST /event HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+    sent = 0
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - t0)
+        sent += 1
+    writer.close()
+    return sent
+
+
+async def run(mode, clients, seconds, port):
+    tmp = tempfile.mkdtemp(prefix="bbd_bench_")
+    db_path = os.path.join(tmp, "combat_telemetry.db")
+    init_db(db_path)
+
+    server, rows = build_server(mode, db_path, port)
+    srv = await server.start()
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    counts = await asyncio.gather(*(client(port, deadline, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - t0
+
+    # Let the writer catch up so persisted rows are counted honestly
+    drain_start = time.perf_counter()
+    while not rows.empty():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    drain = time.perf_counter() - drain_start
+
+    srv.close()
+    await srv.wait_closed()
+
+    conn = sqlite3.connect(db_path)
+    persisted = conn.execute("SELECT COUNT(*) FROM hitsplats").fetchone()[0]
+    conn.close()
+
+    total = sum(counts)
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    print(f"[{mode:>6}] {total:>8,} events in {elapsed:.2f}s = {total / elapsed:>9,.0f} ev/s | "
+          f"p50 {p50:.3f} ms | p99 {p99:.3f} ms | persisted {persisted:,} (writer drain {drain * 1000:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BBD ingest server throughput benchmark")
+    parser.add_argument('--mode', choices=['legacy', 'queued', 'both'], default='both')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    modes = ['legacy', 'queued'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        asyncio.run(run(mode, args.clients, args.seconds, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+TELEMETRY DB QUERY BENCHMARK
+============================
+
+Per-session read latency on combat_telemetry.db before and after the
+telemetry_schema.py migrations, on a synthetic history far larger than a
+real one.
+
+A scratch database is filled at schema v1 (no secondary indexes) with
+--sessions sessions of --ticks heartbeat ticks each, plus the hitsplats and
+profit deltas a session of that length produces. The queries the GUI and
+analytics scripts run are timed against random sessions, the database is
+migrated to v2 (indexes) and the same queries are timed again.
+
+Finally the database is migrated to the latest version: ticks are compacted
+into run-length encoded combat_runs rows (v3, see tick_runs.py) and read
+through the NumPy decoder, and hitsplat times are read from the integer
+ts_ms column (v4). The on-disk size of the tick storage is reported before
+and after.
+
+USAGE:
+  > python bench_telemetry_db.py                          # 200 x 15k ticks (~3M tick rows)
+  > python bench_telemetry_db.py --sessions 500 --keep
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import telemetry_schema
+import tick_runs
+
+STATES = ("attack", "idle", "eat", "bank", "walk")
+
+QUERIES = [
+    ("latest session (gui)", "SELECT session_id FROM hitsplats ORDER BY id DESC LIMIT 1", False),
+    ("hit damage (gui)", "SELECT damage FROM hitsplats WHERE session_id = ?", True),
+    ("hit timeline (tick latency)", "SELECT timestamp, dragon_hp_before FROM hitsplats WHERE session_id = ? ORDER BY timestamp", True),
+    ("last tick", "SELECT MAX(tick_number) FROM combat_ticks WHERE session_id = ?", True),
+    ("state counts (efficiency)", "SELECT state, COUNT(*) FROM combat_ticks WHERE session_id = ? GROUP BY state", True),
+    ("tick states (distraction)", "SELECT tick_number, state FROM combat_ticks WHERE session_id = ? ORDER BY tick_number", True),
+    ("profit deltas", "SELECT tick_number, delta_gp FROM profit_deltas WHERE session_id = ? ORDER BY tick_number", True),
+]
+
+# The same reads on the latest schema: ticks compacted into combat_runs (v3),
+# hitsplat time as integer epoch ms (v4)
+LATEST_QUERIES = [
+    ("hit timeline (tick latency)", "SELECT ts_ms, dragon_hp_before FROM hitsplats WHERE session_id = ? ORDER BY ts_ms", True),
+    ("last tick", lambda conn, sid: conn.execute("SELECT last_tick FROM combat_runs WHERE session_id = ?", (sid,)).fetchall(), True),
+    ("state counts (efficiency)", lambda conn, sid: tick_runs.state_counts(*_split(tick_runs.load_runs(conn, sid)[sid])), True),
+    ("tick states (distraction)", lambda conn, sid: tick_runs.load_ticks(conn, sid)[0], True),
+]
+
+# Whole-history loads (analytics_markov / analytics_downtime)
+HISTORY_SQL = "SELECT * FROM combat_ticks ORDER BY session_id, tick_number"
+
+
+def _split(entry):
+    starts, lengths, codes, names = entry
+    return (starts, lengths, codes), names
+
+
+def populate(db_path, sessions, ticks):
+    telemetry_schema.migrate(db_path, target=1, quiet=True)
+    rng = random.Random(19)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    session_ids = []
+    t0 = 1772377200.0
+    for s in range(sessions):
+        sid = f"session_{1772377200 + s * 7200}"
+        session_ids.append(sid)
+        tick_rows, hit_rows, profit_rows = [], [], []
+        for tick in range(ticks):
+            state = "attack" if rng.random() < 0.45 else rng.choice(STATES)
+            tick_rows.append((sid, tick, state))
+            if state == "attack" and rng.random() < 0.9:
+                ts = datetime.fromtimestamp(t0 + s * 7200 + tick * 0.6).isoformat()
+                hit_rows.append((sid, ts, rng.randint(0, 45), rng.randint(1, 315)))
+            if rng.random() < 0.05:
+                profit_rows.append((sid, tick, rng.randint(18000, 105000)))
+        conn.executemany("INSERT INTO combat_ticks (session_id, tick_number, state) VALUES (?, ?, ?)", tick_rows)
+        conn.executemany("INSERT INTO hitsplats (session_id, timestamp, damage, dragon_hp_before) VALUES (?, ?, ?, ?)", hit_rows)
+        conn.executemany("INSERT INTO profit_deltas (session_id, tick_number, delta_gp) VALUES (?, ?, ?)", profit_rows)
+        conn.commit()
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("combat_ticks", "hitsplats", "profit_deltas")}
+    conn.close()
+    return session_ids, counts
+
+
+def time_queries(db_path, session_ids, repeat, queries=QUERIES):
+    rng = random.Random(5)
+    conn = sqlite3.connect(db_path)
+    results = {}
+    for name, query, per_session in queries:
+        samples, rows = [], 0
+        for _ in range(repeat):
+            sid = rng.choice(session_ids)
+            start = time.perf_counter()
+            if callable(query):
+                rows = len(query(conn, sid))
+            else:
+                rows = len(conn.execute(query, (sid,) if per_session else ()).fetchall())
+            samples.append((time.perf_counter() - start) * 1000)
+        if callable(query):
+            plan = "tick_runs decode"
+        else:
+            plan = " | ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + query, (session_ids[0],) if per_session else ()))
+        results[name] = (statistics.median(samples), max(samples), rows, plan)
+    conn.close()
+    return results
+
+
+def time_history(db_path, compacted):
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    if compacted:
+        n = sum(int(entry[1].sum()) for entry in tick_runs.load_runs(conn).values())
+    else:
+        n = len(conn.execute(HISTORY_SQL).fetchall())
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return n, elapsed
+
+
+def tick_storage(db_path):
+    """Bytes of pages holding tick states (staging table + its index + runs)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("""SELECT SUM(pgsize) FROM dbstat
+                              WHERE name IN ('combat_ticks', 'idx_combat_ticks_session', 'combat_runs')""").fetchone()
+    except sqlite3.OperationalError:
+        row = None   # SQLite built without dbstat
+    conn.close()
+    return row[0] if row and row[0] else 0
+
+
+def report(label, results):
+    print(f"\n[{label}]")
+    print(f"  {'query':<30} {'median ms':>10} {'max ms':>9} {'rows':>7}  plan")
+    for name, (median, worst, rows, plan) in results.items():
+        print(f"  {name:<30} {median:>10.3f} {worst:>9.3f} {rows:>7}  {plan}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="combat_telemetry.db per-session query benchmark")
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--ticks', type=int, default=15000, help="Heartbeat ticks per session")
+    parser.add_argument('--repeat', type=int, default=50, help="Timed runs per query after migrating")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch database")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bbd_teldb_"), "combat_telemetry.db")
+    start = time.perf_counter()
+    session_ids, counts = populate(db_path, args.sessions, args.ticks)
+    print(f"[BENCH] {', '.join(f'{n:,} {t}' for t, n in counts.items())} in {time.perf_counter() - start:.1f}s")
+
+    report("schema v1, no indexes", time_queries(db_path, session_ids, max(3, args.repeat // 10)))
+
+    start = time.perf_counter()
+    telemetry_schema.migrate(db_path, target=2)
+    print(f"\n[BENCH] migrated to v2 in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(db_path) / 1e6:.0f} MB)")
+
+    report("schema v2, covering indexes", time_queries(db_path, session_ids, args.repeat))
+    rows_before, history_before = time_history(db_path, compacted=False)
+    size_before = tick_storage(db_path)
+
+    start = time.perf_counter()
+    version = telemetry_schema.migrate(db_path)
+    telemetry_schema.vacuum(db_path)
+    print(f"\n[BENCH] migrated to v{version} + VACUUM in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(db_path) / 1e6:.0f} MB)")
+
+    report(f"schema v{version}, run-length ticks, epoch-ms hitsplats", time_queries(db_path, session_ids, args.repeat, LATEST_QUERIES))
+    rows_after, history_after = time_history(db_path, compacted=True)
+    size_after = tick_storage(db_path)
+
+    print(f"\n[BENCH] whole tick history ({rows_before:,} ticks): {history_before * 1000:.0f}ms rows -> "
+          f"{history_after * 1000:.0f}ms runs ({rows_after:,} ticks)")
+    if size_before and size_after:
+        print(f"[BENCH] tick storage: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.2f} MB "
+              f"({size_before / size_after:.0f}x smaller)")
+
+    if args.keep:
+        print(f"\n[BENCH] database kept at {db_path}")
+    else:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+if __name__ == "__main__":
+    main()
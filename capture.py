@@ -0,0 +1,91 @@
+"""
+TELEMETRY CAPTURE
+=================
+
+Records everything RuneLite sends to the tracker so a session can be replayed
+offline (see replay_capture.py).
+
+Each record is the raw bytes as they arrived, plus the arrival time relative
+to the start of the capture:
+
+  * HTTP - the body of every POST to the ingest server, with its path
+  * UDP  - every datagram received on the shadow port
+
+File layout: b"BBDCAP01" magic, then repeated records of
+  <f8 t_offset_sec><u1 channel><u2 path_len><u4 body_len> path body
+
+Writes come from the ingest server thread and the UDP thread; a lock keeps
+records whole. The file is flushed every FLUSH_SEC so a crashed tracker still
+leaves a usable capture (a torn final record is ignored on read).
+"""
+
+import struct
+import threading
+import time
+
+MAGIC = b"BBDCAP01"
+RECORD = struct.Struct("<dBHI")
+
+CH_HTTP = 1
+CH_UDP = 2
+
+FLUSH_SEC = 1.0
+
+
+class CaptureWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.lock = threading.Lock()
+        self.t0 = time.perf_counter()
+        self.last_flush = time.time()
+        self.records = {CH_HTTP: 0, CH_UDP: 0}
+
+    def record(self, channel, body, path=""):
+        t = time.perf_counter() - self.t0
+        path_b = path.encode("utf-8")
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(RECORD.pack(t, channel, len(path_b), len(body)))
+            self.file.write(path_b)
+            self.file.write(body)
+            self.records[channel] += 1
+            if time.time() - self.last_flush >= FLUSH_SEC:
+                self.file.flush()
+                self.last_flush = time.time()
+
+    def record_http(self, method, path, body):
+        self.record(CH_HTTP, body, path)
+
+    def record_udp(self, datagram):
+        self.record(CH_UDP, datagram)
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def describe(self):
+        return f"{self.records[CH_HTTP]} HTTP + {self.records[CH_UDP]} UDP records -> {self.path}"
+
+
+def read_capture(path):
+    """Yields (t_offset_sec, channel, path, body) for every complete record."""
+    with open(path, "rb") as f:
+        buf = f.read()
+    if not buf.startswith(MAGIC):
+        raise ValueError(f"{path} is not a BBD capture file")
+
+    offset = len(MAGIC)
+    while offset + RECORD.size <= len(buf):
+        t, channel, path_len, body_len = RECORD.unpack_from(buf, offset)
+        end = offset + RECORD.size + path_len + body_len
+        if end > len(buf):
+            break  # Torn final record
+        offset += RECORD.size
+        route = buf[offset:offset + path_len].decode("utf-8")
+        offset += path_len
+        yield t, channel, route, buf[offset:end]
+        offset = end
@@ -3,21 +3,55 @@ import datetime
 import json
 import os
 import threading
+import time
 
 DB_FILE = "census.db"
+SIGHTING_BATCH = 200        # Pending roster/sighting writes before a forced flush
+SIGHTING_FLUSH_SEC = 1.0    # Max age of a pending write before the next call flushes it
+
+ROSTER_UPSERT = '''INSERT INTO roster (username, status, combat_level, first_seen, latest_seen, total_sightings)
+                   VALUES (?, 'NEW', ?, ?, ?, 1)
+                   ON CONFLICT(username) DO UPDATE SET
+                       latest_seen = excluded.latest_seen,
+                       combat_level = excluded.combat_level,
+                       total_sightings = total_sightings + 1,
+                       status = CASE WHEN status = 'TRASH' THEN 'NEW' ELSE status END'''
+
+SIGHTING_UPSERT = '''INSERT INTO sightings (username, session_id, world, timestamp, gear_json)
+                     VALUES (?, ?, ?, ?, ?)
+                     ON CONFLICT(username, session_id, world) DO NOTHING'''
 
 class CensusManager:
-    def __init__(self):
-        self.lock = threading.Lock()
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+
+        # Per-session seen-set: (name, world) already logged in seen_session
+        self.seen_session = None
+        self.seen = set()
+        # username -> [status, total_sightings] for players touched by this process
+        self.roster_cache = {}
+
+        # Pending writes, flushed in one transaction
+        self.pending_roster = []
+        self.pending_sightings = []
+        self.pending_seen = {}      # username -> latest_seen for flicker duplicates
+        self.last_flush = time.time()
+
+        # Bumped on every committed write; read views are cached per version
+        self.version = 0
+        self.view_cache = {}        # query key -> (version, rows)
+
         self.init_db()
 
     def get_connection(self):
-        return sqlite3.connect(DB_FILE)
+        return self.conn
 
     def init_db(self):
-        conn = self.get_connection()
-        c = conn.cursor()
+        c = self.conn.cursor()
         c.execute("PRAGMA journal_mode=WAL;")
+        c.execute("PRAGMA synchronous=NORMAL;")
         
         c.execute('''CREATE TABLE IF NOT EXISTS roster (
                         username TEXT PRIMARY KEY,
@@ -38,89 +72,116 @@ class CensusManager:
                         gear_json TEXT,
                         FOREIGN KEY(username) REFERENCES roster(username)
                     )''')
+
+        # One sighting per (player, session, world): backs the UPSERT and the per-session lookup
+        try:
+            c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sightings_player_session ON sightings(username, session_id, world)")
+        except sqlite3.IntegrityError:
+            # Older databases may hold flicker duplicates; keep the first sighting of each
+            c.execute('''DELETE FROM sightings WHERE id NOT IN
+                         (SELECT MIN(id) FROM sightings GROUP BY username, session_id, world)''')
+            c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sightings_player_session ON sightings(username, session_id, world)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_sightings_session ON sightings(session_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_roster_status_seen ON roster(status, latest_seen)")
         
-        conn.commit()
-        conn.close()
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+    def flush(self):
+        """Writes all pending roster/sighting changes in one transaction."""
+        with self.lock:
+            if not (self.pending_roster or self.pending_sightings or self.pending_seen):
+                self.last_flush = time.time()
+                return
+            with self.conn:
+                if self.pending_roster:
+                    self.conn.executemany(ROSTER_UPSERT, self.pending_roster)
+                if self.pending_seen:
+                    self.conn.executemany("UPDATE roster SET latest_seen = ? WHERE username = ?",
+                                          [(ts, name) for name, ts in self.pending_seen.items()])
+                if self.pending_sightings:
+                    self.conn.executemany(SIGHTING_UPSERT, self.pending_sightings)
+            self.pending_roster, self.pending_sightings, self.pending_seen = [], [], {}
+            self.last_flush = time.time()
+            self.version += 1
+
+    def _enter_session(self, session_id):
+        # Seed the seen-set from disk so a resumed session doesn't double count
+        self.flush()
+        self.seen_session = session_id
+        rows = self.conn.execute("SELECT username, world FROM sightings WHERE session_id = ?", (session_id,))
+        self.seen = {(name, world) for name, world in rows}
+
+    def _roster_entry(self, name):
+        entry = self.roster_cache.get(name)
+        if entry is None:
+            row = self.conn.execute("SELECT status, total_sightings FROM roster WHERE username = ?", (name,)).fetchone()
+            entry = self.roster_cache[name] = [row[0], row[1]] if row else [None, 0]
+        return entry
 
     def log_sighting(self, session_id, name, combat_level, world, gear_ids):
         """
         Logs a sighting. Handles the logic for "Recurring Trash".
+        Flicker duplicates (same player/world already seen this session) never
+        touch the DB beyond a batched latest_seen bump.
         """
         with self.lock: 
-            conn = self.get_connection()
-            c = conn.cursor()
+            if session_id != self.seen_session:
+                self._enter_session(session_id)
             now = datetime.datetime.now()
-
-            # 1. Check if we have already logged this player in THIS session
-            c.execute('''SELECT id FROM sightings 
-                         WHERE username = ? AND session_id = ? AND world = ?''', 
-                      (name, session_id, world))
-            
-            is_duplicate = c.fetchone() is not None
-
-            # 2. Get current Roster status
-            c.execute("SELECT total_sightings, status FROM roster WHERE username = ?", (name,))
-            row = c.fetchone()
-
-            roster_status = 'NEW'
-            total_sightings = 0
-
-            if row:
-                total_sightings = row[0]
-                roster_status = row[1]
-                
-                # Resurrect trash if it's a new session (and not a duplicate causing the check)
-                if roster_status == 'TRASH' and not is_duplicate:
-                    c.execute("UPDATE roster SET status = 'NEW' WHERE username = ?", (name,))
-                    roster_status = 'NEW'
-
-                # OPTIONAL FIX: Only increment total_sightings if NOT a duplicate
-                # Otherwise, render flickering inflates this number rapidly.
-                if not is_duplicate:
-                    c.execute('''UPDATE roster 
-                                 SET latest_seen = ?, total_sightings = total_sightings + 1, combat_level = ?
-                                 WHERE username = ?''', 
-                              (now, combat_level, name))
-                else:
-                    # Just update the timestamp if it's a duplicate
-                    c.execute("UPDATE roster SET latest_seen = ? WHERE username = ?", (now, name))
+            entry = self._roster_entry(name)
+
+            if (name, world) in self.seen:
+                self.pending_seen[name] = now
+                if entry[0] is None:
+                    # Seen in a previous run of this session but missing from roster
+                    self.pending_roster.append((name, combat_level, now, now))
+                    entry[:] = ['NEW', 1]
+                result = {"status": "duplicate", "roster_status": entry[0], "total_sightings": entry[1]}
             else:
-                # New Player
-                c.execute('''INSERT INTO roster (username, status, combat_level, first_seen, latest_seen, total_sightings)
-                             VALUES (?, 'NEW', ?, ?, ?, 1)''', 
-                          (name, combat_level, now, now))
-                total_sightings = 1
-
-            # 3. Log Sighting (Only if not duplicate)
-            if not is_duplicate:
-                c.execute('''INSERT INTO sightings (username, session_id, world, timestamp, gear_json)
-                             VALUES (?, ?, ?, ?, ?)''',
-                          (name, session_id, world, now, json.dumps(gear_ids)))
-
-            conn.commit()
-            conn.close()
-            
-            return {
-                "status": "logged",
-                "roster_status": roster_status,
-                "total_sightings": total_sightings
-            }
+                self.seen.add((name, world))
+                self.pending_roster.append((name, combat_level, now, now))
+                self.pending_sightings.append((name, session_id, world, now, json.dumps(gear_ids)))
+
+                # Mirror the UPSERT: new players start at 1, recurring trash is resurrected
+                status = 'NEW' if entry[0] in (None, 'TRASH') else entry[0]
+                entry[:] = [status, entry[1] + 1]
+                result = {"status": "logged", "roster_status": status, "total_sightings": entry[1]}
+
+            if (len(self.pending_roster) + len(self.pending_sightings) >= SIGHTING_BATCH
+                    or time.time() - self.last_flush >= SIGHTING_FLUSH_SEC):
+                self.flush()
+            return result
 
     def update_status(self, username, new_status):
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("UPDATE roster SET status = ? WHERE username = ?", (new_status, username))
-        conn.commit()
-        conn.close()
+        with self.lock:
+            self.flush()
+            with self.conn:
+                self.conn.execute("UPDATE roster SET status = ? WHERE username = ?", (new_status, username))
+            entry = self.roster_cache.get(username)
+            if entry:
+                entry[0] = new_status
+            self.version += 1
+
+    def _cached_view(self, key, query, params=()):
+        with self.lock:
+            self.flush()
+            cached = self.view_cache.get(key)
+            if cached and cached[0] == self.version:
+                return cached[1]
+            rows = self.conn.execute(query, params).fetchall()
+            self.view_cache[key] = (self.version, rows)
+            return rows
 
     def get_inbox(self, session_start_time=None):
         """
         Returns NEW players.
         If session_start_time is provided, filters out players NOT seen in this session.
         """
-        conn = self.get_connection()
-        c = conn.cursor()
-        
         query = "SELECT username, combat_level, total_sightings, latest_seen, status, notes FROM roster WHERE status = 'NEW'"
         params = []
 
@@ -130,26 +191,16 @@ class CensusManager:
 
         query += " ORDER BY latest_seen DESC"
 
-        c.execute(query, tuple(params))
-        data = c.fetchall()
-        conn.close()
-        return data
+        return self._cached_view(("inbox", session_start_time), query, tuple(params))
 
     def get_category(self, status):
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute('''SELECT username, combat_level, total_sightings, latest_seen, status, notes 
-                     FROM roster 
-                     WHERE status = ? 
-                     ORDER BY latest_seen DESC''', (status,))
-        data = c.fetchall()
-        conn.close()
-        return data
+        return self._cached_view(("category", status),
+                                 '''SELECT username, combat_level, total_sightings, latest_seen, status, notes 
+                                    FROM roster 
+                                    WHERE status = ? 
+                                    ORDER BY latest_seen DESC''', (status,))
 
     def export_suspects_to_config(self):
-        conn = self.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT username FROM roster WHERE status = 'SUSPECT'")
-        names = [row[0] for row in c.fetchall()]
-        conn.close()
-        return names
\ No newline at end of file
+        with self.lock:
+            self.flush()
+            return [row[0] for row in self.conn.execute("SELECT username FROM roster WHERE status = 'SUSPECT'")]
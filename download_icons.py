@@ -5,6 +5,7 @@ import urllib.parse
 from pathlib import Path
 import pandas as pd
 import time
+from icon_atlas import load_atlas
 
 # Create icons directory if it doesn't exist
 ICON_DIR = Path("bbd_data/icons")
@@ -144,5 +145,8 @@ def main():
         for item in failed:
             print(f" - {item}")
 
+    # Repack so the lab and tracker pick up the new icons from the atlas
+    load_atlas()
+
 if __name__ == "__main__":
     main()
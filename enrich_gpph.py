@@ -1,5 +1,6 @@
 import pandas as pd
 import os
+from item_catalog import load_catalog
 
 # --- CONFIGURATION ---
 SESSIONS = "gpph_sessions.csv"
@@ -15,7 +16,7 @@ def main():
     try:
         df_sess = pd.read_csv(SESSIONS)
         df_ledg = pd.read_csv(LEDGER)
-        df_items = pd.read_csv(ITEMS)
+        catalog = load_catalog(ITEMS)
     except FileNotFoundError as e:
         return print(f"Missing required file: {e}")
 
@@ -23,9 +24,8 @@ def main():
     print("Merging Sessions and Item Names...")
     df = pd.merge(df_ledg, df_sess[['session_uuid', 'name', 'local_start_time', 'wiki_pricing_timestamp']], on='session_uuid', how='left')
     
-    df = pd.merge(df, df_items[['id', 'name']], left_on='item_id', right_on='id', how='left')
-    df.rename(columns={'name_y': 'item_name', 'name_x': 'session_name'}, inplace=True)
-    df.drop(columns=['id'], inplace=True)
+    df.rename(columns={'name': 'session_name'}, inplace=True)
+    df['item_name'] = df['item_id'].map(catalog.name)
 
     # 3. Calculate HOURLY Keys
     print("Mapping 5m Session Times to 1h Market Snapshots...")
@@ -54,7 +54,7 @@ def main():
     # 5. Apply Prices
     def get_price_data(row):
         ts = row['hourly_ts']
-        iid = row['item_id']
+        iid = catalog.unnoted(row['item_id'])  # Noted items trade at the base item's price
         data = price_cache.get(ts, {}).get(iid, {})
         
         # Default to High Price (Buy), fallback to Low (Sell)
@@ -1,7 +1,8 @@
 import pandas as pd
 import os
 from datetime import datetime
-import json
+
+import session_store
 
 # --- CONFIG ---
 TIME_TRACKING_FILE = "reports/time_tracking_history.csv"  # Save your raw data here
@@ -15,22 +16,22 @@ def load_bbd_sessions():
         print("BBD Data directory not found.")
         return sessions
 
-    for f in os.listdir(BBD_DATA_DIR):
-        if f.endswith(".json"):
-            try:
-                with open(os.path.join(BBD_DATA_DIR, f), 'r') as file:
-                    data = json.load(file)
-                    # Parse ISO timestamps
-                    start = datetime.fromisoformat(data['start_time'])
-                    end = datetime.fromisoformat(data['end_time'])
-                    sessions.append({
-                        "id": data['session_id'],
-                        "start": start,
-                        "end": end,
-                        "type": "Brutal Black Dragons"
-                    })
-            except Exception as e:
-                print(f"Skipping broken BBD file {f}: {e}")
+    conn = session_store.open_store(data_dir=BBD_DATA_DIR)
+    try:
+        summaries = session_store.list_sessions(conn)
+    finally:
+        conn.close()
+
+    for data in summaries:
+        if not data['start_time'] or not data['end_time']:
+            print(f"Skipping BBD session {data['session_id']}: missing start/end time")
+            continue
+        sessions.append({
+            "id": data['session_id'],
+            "start": datetime.fromisoformat(data['start_time']),
+            "end": datetime.fromisoformat(data['end_time']),
+            "type": "Brutal Black Dragons"
+        })
     return sessions
 
 def main():
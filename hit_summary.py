@@ -0,0 +1,102 @@
+"""
+HIT SUMMARY
+===========
+
+session_hit_summary: one row of running hitsplat aggregates per session,
+maintained by the telemetry writer in the same transaction as the hitsplat
+rows themselves (one upsert per session per group commit).
+
+  hits, zeros, damage_sum, damage_sq_sum   -> accuracy, DPS, mean, std dev
+  bin_0 .. bin_6                          -> the overlay's damage histogram
+  first_ms, last_ms                       -> epoch ms of the first / newest hit
+
+Bins: 0 | 1-10 | 11-20 | 21-30 | 31-40 | 41-50 | 51+
+
+Readers (bbd_gui's telemetry window, plot_combat_luck) read one row per
+session instead of scanning hitsplats. Schema v5 (telemetry_schema.py)
+creates the table and backfills it from existing hitsplats.
+"""
+
+import math
+
+N_BINS = 7
+BIN_LABELS = ["0", "1-10", "11-20", "21-30", "31-40", "41-50", "51+"]
+BIN_COLUMNS = [f"bin_{i}" for i in range(N_BINS)]
+ATTACK_SEC = 3.0   # Seconds per shot at the 5-tick rapid attack speed
+
+CREATE_SQL = f'''CREATE TABLE IF NOT EXISTS session_hit_summary (
+    session_id TEXT PRIMARY KEY, hits INTEGER, zeros INTEGER, damage_sum INTEGER, damage_sq_sum INTEGER,
+    {", ".join(f"{col} INTEGER" for col in BIN_COLUMNS)}, first_ms INTEGER, last_ms INTEGER)'''
+
+_COUNTERS = ["hits", "zeros", "damage_sum", "damage_sq_sum"] + BIN_COLUMNS
+
+UPSERT_SQL = (f"INSERT INTO session_hit_summary (session_id, {', '.join(_COUNTERS)}, first_ms, last_ms) "
+              f"VALUES ({', '.join('?' * (len(_COUNTERS) + 3))}) "
+              f"ON CONFLICT(session_id) DO UPDATE SET "
+              + ", ".join(f"{col} = {col} + excluded.{col}" for col in _COUNTERS)
+              + ", first_ms = MIN(COALESCE(first_ms, excluded.first_ms), COALESCE(excluded.first_ms, first_ms))"
+              + ", last_ms = MAX(COALESCE(last_ms, excluded.last_ms), COALESCE(excluded.last_ms, last_ms))")
+
+# Same bins as bin_index(), for the backfill
+_BIN_SQL = "CASE WHEN damage = 0 THEN 0 ELSE MIN(MAX((damage - 1) / 10 + 1, 1), 6) END"
+BACKFILL_SQL = (f"INSERT OR REPLACE INTO session_hit_summary (session_id, {', '.join(_COUNTERS)}, first_ms, last_ms) "
+                f"SELECT session_id, COUNT(*), SUM(damage = 0), SUM(damage), SUM(damage * damage), "
+                + ", ".join(f"SUM({_BIN_SQL} = {i})" for i in range(N_BINS))
+                + ", MIN(ts_ms), MAX(ts_ms) FROM hitsplats GROUP BY session_id")
+
+
+def bin_index(damage):
+    if damage == 0:
+        return 0
+    return min(max((damage - 1) // 10 + 1, 1), N_BINS - 1)
+
+
+def aggregate(rows):
+    """hitsplat rows (session_id, ts_ms, tick, damage, hp_before) -> UPSERT_SQL parameter tuples."""
+    sums = {}
+    for session_id, ts_ms, _, damage, _ in rows:
+        acc = sums.get(session_id)
+        if acc is None:
+            acc = sums[session_id] = [0] * len(_COUNTERS) + [ts_ms, ts_ms]
+        acc[0] += 1
+        acc[1] += damage == 0
+        acc[2] += damage
+        acc[3] += damage * damage
+        acc[4 + bin_index(damage)] += 1
+        if ts_ms is not None:
+            acc[-2] = ts_ms if acc[-2] is None else min(acc[-2], ts_ms)
+            acc[-1] = ts_ms if acc[-1] is None else max(acc[-1], ts_ms)
+    return [(session_id, *acc) for session_id, acc in sums.items()]
+
+
+def _row_to_dict(row):
+    session_id, hits, zeros, dmg, sq = row[:5]
+    bins = list(row[5:5 + N_BINS])
+    first_ms, last_ms = row[5 + N_BINS:]
+    mean = dmg / hits if hits else 0.0
+    return {
+        "session_id": session_id, "hits": hits, "zeros": zeros, "damage_sum": dmg, "damage_sq_sum": sq,
+        "bins": bins, "first_ms": first_ms, "last_ms": last_ms,
+        "accuracy": (hits - zeros) / hits * 100 if hits else 0.0,
+        "dps": dmg / (hits * ATTACK_SEC) if hits else 0.0,
+        "mean": mean,
+        "std": math.sqrt(max(sq / hits - mean * mean, 0.0)) if hits else 0.0,
+    }
+
+
+_SELECT = f"SELECT session_id, {', '.join(_COUNTERS)}, first_ms, last_ms FROM session_hit_summary"
+
+
+def latest_summary(conn):
+    """Summary of the session with the newest hitsplat, or None."""
+    row = conn.execute(f"{_SELECT} ORDER BY last_ms DESC LIMIT 1").fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def load_summaries(conn, session_id=None):
+    """{session_id: summary dict} for every session (or one)."""
+    if session_id:
+        rows = conn.execute(f"{_SELECT} WHERE session_id = ?", (session_id,)).fetchall()
+    else:
+        rows = conn.execute(_SELECT).fetchall()
+    return {row[0]: _row_to_dict(row) for row in rows}
@@ -0,0 +1,211 @@
+"""
+ICON ATLAS
+==========
+
+All item icons packed into one image (icon_atlas.png) with a JSON index
+(icon_atlas.json), built once from the icon folders:
+
+  item_images/     loot icons used by the tracker tables
+  bbd_data/icons/  gear icons fetched by download_icons.py for the lab
+
+The index holds each icon's box in the sheet and its original PNG bytes,
+pre-encoded as a data URI, so front ends load the atlas once at startup and
+never touch the filesystem per item:
+
+  atlas.image(name)     PIL crop of the sheet (tracker / Tk)
+  atlas.data_uri(name)  "data:image/png;base64,..." (Streamlit HTML)
+
+Icon names are keyed case-insensitively with spaces, dashes and apostrophes
+normalized, so "Dragon bones", "dragon_bones.png" and "Dragon_bones.png" are
+the same icon. The index records the size and mtime of every source file;
+load_atlas() rebuilds when a folder changes (Pillow is only needed to build
+the sheet or crop it, not to serve data URIs).
+
+USAGE:
+  > python icon_atlas.py            # build if stale
+  > python icon_atlas.py --force
+"""
+
+import argparse
+import base64
+import json
+import os
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ICON_DIRS = ("item_images", os.path.join("bbd_data", "icons"))
+ATLAS_PNG = "icon_atlas.png"
+ATLAS_INDEX = "icon_atlas.json"
+ATLAS_VERSION = 1
+SHEET_WIDTH = 1024   # Icons are shelf-packed into rows of this width
+
+_ATLASES = {}
+
+
+def icon_key(name):
+    """Normalized lookup key for an item name or icon file name."""
+    name = os.path.splitext(name)[0] if name.lower().endswith(".png") else name
+    return name.strip().lower().replace(" ", "_").replace("-", "_").replace("'", "")
+
+
+def _sources(icon_dirs):
+    # key -> (path, size, mtime_ns); earlier folders win on name clashes
+    found = {}
+    for folder in icon_dirs:
+        if not os.path.isdir(folder):
+            continue
+        for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+            if not entry.name.lower().endswith(".png") or not entry.is_file():
+                continue
+            st = entry.stat()
+            found.setdefault(icon_key(entry.name), (entry.path, st.st_size, st.st_mtime_ns))
+    return found
+
+
+def _signature(sources):
+    return [[key, path, size, mtime] for key, (path, size, mtime) in sorted(sources.items())]
+
+
+class IconAtlas:
+    def __init__(self, boxes, uris, sheet_path=None):
+        self.boxes = boxes        # key -> [x, y, w, h]
+        self.uris = uris          # key -> data URI of the original PNG
+        self.sheet_path = sheet_path
+        self._sheet = None
+        self._crops = {}
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, name):
+        return icon_key(name) in self.boxes
+
+    def data_uri(self, name, default=""):
+        return self.uris.get(icon_key(name), default) if name else default
+
+    def image(self, name):
+        """Cropped PIL image for an icon, or None. The sheet is decoded on first use."""
+        key = icon_key(name)
+        if key in self._crops:
+            return self._crops[key]
+        box = self.boxes.get(key)
+        if box is None or Image is None or not self.sheet_path:
+            return None
+        if self._sheet is None:
+            try:
+                with Image.open(self.sheet_path) as sheet:
+                    self._sheet = sheet.convert("RGBA")
+            except OSError as e:
+                print(f"[ATLAS] Could not open {self.sheet_path}: {e}")
+                self.sheet_path = None
+                return None
+        x, y, w, h = box
+        crop = self._sheet.crop((x, y, x + w, y + h))
+        self._crops[key] = crop
+        return crop
+
+
+def build_atlas(icon_dirs=ICON_DIRS, sheet_path=ATLAS_PNG, index_path=ATLAS_INDEX, sources=None):
+    """Packs every icon into one sheet and writes the index. Returns the IconAtlas."""
+    if Image is None:
+        raise RuntimeError("Pillow is required to build the icon atlas")
+    if sources is None:
+        sources = _sources(icon_dirs)
+
+    icons = []
+    uris = {}
+    for key, (path, _, _) in sources.items():
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            with Image.open(path) as img:
+                icons.append((key, img.convert("RGBA")))
+        except OSError as e:
+            print(f"[ATLAS] Skipping {path}: {e}")
+            continue
+        uris[key] = "data:image/png;base64," + base64.b64encode(raw).decode("ascii")
+
+    # Shelf packing: tallest first, left to right, new row when the width runs out
+    icons.sort(key=lambda item: (-item[1].height, item[0]))
+    boxes = {}
+    x = y = shelf_h = 0
+    for key, img in icons:
+        if x + img.width > SHEET_WIDTH and x > 0:
+            x, y = 0, y + shelf_h
+            shelf_h = 0
+        boxes[key] = [x, y, img.width, img.height]
+        x += img.width
+        shelf_h = max(shelf_h, img.height)
+
+    sheet = Image.new("RGBA", (SHEET_WIDTH if y else max(x, 1), max(y + shelf_h, 1)), (0, 0, 0, 0))
+    for key, img in icons:
+        sheet.paste(img, tuple(boxes[key][:2]))
+
+    tmp = sheet_path + ".tmp"
+    sheet.save(tmp, format="PNG", optimize=True)
+    os.replace(tmp, sheet_path)
+
+    index = {"version": ATLAS_VERSION, "sheet": os.path.basename(sheet_path),
+             "sources": _signature(sources), "boxes": boxes, "uris": uris}
+    tmp = index_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, index_path)
+
+    print(f"[ATLAS] Packed {len(boxes)} icons into {sheet_path} ({sheet.width}x{sheet.height})")
+    atlas = IconAtlas(boxes, uris, sheet_path)
+    atlas._sheet = sheet
+    return atlas
+
+
+def load_atlas(icon_dirs=ICON_DIRS, sheet_path=ATLAS_PNG, index_path=ATLAS_INDEX, rebuild=True):
+    """Loads the atlas once per process, rebuilding it first if the icon folders changed."""
+    key = os.path.abspath(index_path)
+    if key in _ATLASES:
+        return _ATLASES[key]
+
+    index = None
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != ATLAS_VERSION:
+                index = None
+        except (OSError, ValueError) as e:
+            print(f"[ATLAS] Ignoring unreadable {index_path}: {e}")
+
+    atlas = None
+    sources = _sources(icon_dirs) if rebuild else None
+    if index is not None and (sources is None or index.get("sources") == _signature(sources)):
+        atlas = IconAtlas(index["boxes"], index["uris"], sheet_path)
+    elif sources and Image is not None:
+        try:
+            atlas = build_atlas(icon_dirs, sheet_path, index_path, sources)
+        except OSError as e:
+            print(f"[ATLAS] Build failed: {e}")
+    elif index is not None:
+        # Stale, but better than nothing when Pillow is missing
+        atlas = IconAtlas(index["boxes"], index["uris"], sheet_path)
+
+    if atlas is None:
+        atlas = IconAtlas({}, {})
+    _ATLASES[key] = atlas
+    return atlas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the packed item icon atlas")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if the index is up to date")
+    args = parser.parse_args()
+    if args.force:
+        build_atlas()
+    else:
+        atlas = load_atlas()
+        print(f"[ATLAS] {len(atlas)} icons available")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+BBD INGEST SERVER
+=================
+
+Minimal asyncio HTTP/1.1 server for the RuneLite telemetry pipe.
+
+Replaces the Flask development server that used to run inside bbd_tracker.py.
+Routes are plain functions registered against (method, path); they receive the
+parsed JSON body (or the query dict for GETs) and return a JSON-serializable
+dict (or a str, sent as text/plain). Handlers must stay cheap: anything that touches disk is expected to be
+handed off to a background writer so the event loop never blocks on fsync.
+
+Keep-alive is supported so OkHttp (RuneLite) and requests.Session clients reuse
+one socket instead of paying a TCP handshake per hitsplat.
+
+Stream routes (@server.stream_route) hold the connection open and write
+Server-Sent Events for as long as their async generator keeps yielding; see
+live_feed.py.
+"""
+
+import asyncio
+import json
+from urllib.parse import urlsplit, parse_qs
+
+from live_feed import format_sse
+
+MAX_BODY_BYTES = 1 << 20
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class IngestServer:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.routes = {}
+        self.streams = {}
+        self.server = None
+        # Optional callable(method, path, body_bytes), invoked for every routed
+        # non-GET request before its handler runs (capture mode, see capture.py)
+        self.tap = None
+
+    def route(self, path, methods=("GET",)):
+        """Decorator mirroring Flask's @server.route(path, methods=[...])."""
+        def register(func):
+            for method in methods:
+                self.routes[(method.upper(), path)] = func
+            return func
+        return register
+
+    def stream_route(self, path):
+        """
+        Registers an async generator factory for a GET path. The factory receives
+        the query dict and yields (event, data) pairs, which are written to the
+        client as text/event-stream until either side hangs up.
+        """
+        def register(func):
+            self.streams[path] = func
+            return func
+        return register
+
+    # --- LIFECYCLE ---
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        return self.server
+
+    async def serve(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def serve_forever(self):
+        """Blocking entry point, meant to be the target of a daemon thread."""
+        asyncio.run(self.serve())
+
+    # --- CONNECTION HANDLING ---
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.send(writer, 400, {"status": "error", "error": "malformed request line"}, keep_alive=False)
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self.send(writer, 400, {"status": "error", "error": "bad content-length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self.send(writer, 413, {"status": "error", "error": "body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                conn_hdr = headers.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keep_alive = conn_hdr == "keep-alive"
+                else:
+                    keep_alive = conn_hdr != "close"
+
+                parts = urlsplit(target)
+                if method.upper() == "GET" and parts.path in self.streams:
+                    await self.stream(reader, writer, parts)
+                    break
+
+                status, result = self.dispatch(method.upper(), target, body)
+                await self.send(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def stream(self, reader, writer, parts):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        events = self.streams[parts.path](query)
+
+        async def pump():
+            async for event, data in events:
+                writer.write(format_sse(event, data))
+                await writer.drain()
+
+        # SSE clients never send anything after the request, so EOF on the read
+        # side means they hung up; stop the generator right away instead of
+        # waiting for the next write to fail.
+        pump_task = asyncio.ensure_future(pump())
+        eof_task = asyncio.ensure_future(reader.read())
+        try:
+            await asyncio.wait({pump_task, eof_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (pump_task, eof_task):
+                task.cancel()
+            await asyncio.gather(pump_task, eof_task, return_exceptions=True)
+            await events.aclose()
+
+    def dispatch(self, method, target, body):
+        parts = urlsplit(target)
+        handler = self.routes.get((method, parts.path))
+        if handler is None:
+            if any(path == parts.path for _, path in self.routes):
+                return 405, {"status": "error", "error": "method not allowed"}
+            return 404, {"status": "error", "error": "not found"}
+
+        try:
+            if method == "GET":
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                return 200, handler(query)
+            if self.tap:
+                self.tap(method, parts.path, body)
+            data = json.loads(body) if body else {}
+            return 200, handler(data)
+        except ValueError as e:
+            return 400, {"status": "error", "error": str(e)}
+        except Exception as e:
+            print(f"[HTTP Error] {method} {parts.path}: {e}")
+            return 500, {"status": "error", "error": str(e)}
+
+    async def send(self, writer, status, result, keep_alive=True):
+        # Handlers normally return dicts (JSON); a str is sent as text/plain (e.g. /metrics)
+        if isinstance(result, str):
+            payload, content_type = result.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            payload, content_type = json.dumps(result).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head + payload)
+        await writer.drain()
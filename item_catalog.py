@@ -0,0 +1,187 @@
+"""
+ITEM CATALOG
+============
+
+One shared, indexed view of items.csv (the OSRS Wiki item mapping) for every
+script that needs item names, IDs or high-alch values.
+
+  name(item_id)      canonical name; noted IDs resolve to their base item
+  id(name)           base (un-noted) ID, case-insensitive
+  unnoted(item_id)   base ID for a noted ID, unchanged otherwise
+  high_alch(item)    by ID or name
+  price(item, prices) / price_map(prices)
+                     GE price from {item_id: gp}, falling back to high alch
+                     (untradeables, missing snapshot rows)
+
+The wiki mapping has no noted IDs, no coins and no untradeables. Noted IDs
+of GE-tradeable items follow the game's convention of base ID + 1, and EXTRA_ITEMS adds the
+untradeable loot the tracker sees at the Catacombs.
+
+The parsed columns are cached next to the CSV (items.catalog, marshal) and
+keyed on the CSV's BLAKE2 hash, so a changed CSV is re-parsed automatically
+and an unchanged one loads in a few milliseconds. load_catalog() memoizes
+per path, so a process parses or loads it at most once.
+"""
+
+import csv
+import hashlib
+import marshal
+import numbers
+import os
+
+ITEMS_CSV = "items.csv"
+CACHE_EXT = ".catalog"
+CACHE_VERSION = 1
+
+# Not in the wiki mapping: (id, name, highalch). An ID whose name already
+# exists in the CSV is an alias for that item.
+EXTRA_ITEMS = (
+    (995, "Coins", 1),
+    (2722, "Clue scroll (hard)", 0),
+    (12073, "Clue scroll (elite)", 0),
+    (13510, "Ensouled dragon head", 390),
+    (11388, "Rune hasta", 0),
+    (19677, "Ancient shard", 0),
+    (19679, "Dark totem base", 0),
+    (19681, "Dark totem middle", 0),
+    (19683, "Dark totem top", 0),
+)
+
+_CATALOGS = {}
+
+
+def _int(value):
+    return int(value) if value else 0
+
+
+class ItemCatalog:
+    def __init__(self, ids, names, members, values, highalch, limits):
+        # Parallel columns; row i is one item
+        self.ids = ids
+        self.names = names
+        self.members = members
+        self.values = values
+        self.highalch = highalch
+        self.limits = limits
+
+        self.by_id = {item_id: i for i, item_id in enumerate(ids)}
+        self.by_name = {}
+        for i, name in enumerate(names):
+            self.by_name.setdefault(name.lower(), i)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, item_id):
+        return self._row(item_id) is not None
+
+    # --- LOOKUPS ---
+    def _row(self, item_id):
+        row = self.by_id.get(item_id)
+        if row is None and self.is_noted(item_id):
+            row = self.by_id[item_id - 1]
+        return row
+
+    def _row_for(self, item):
+        if isinstance(item, str):
+            return self.by_name.get(item.strip().lower())
+        return self._row(item)
+
+    def name(self, item_id, default=None):
+        row = self._row(item_id)
+        return self.names[row] if row is not None else default
+
+    def id(self, name, default=None):
+        row = self.by_name.get(name.strip().lower())
+        return self.ids[row] if row is not None else default
+
+    def is_noted(self, item_id):
+        # Only GE-tradeable items (limit > 0) follow the base + 1 note convention here
+        if item_id in self.by_id or not isinstance(item_id, numbers.Integral):
+            return False
+        base = self.by_id.get(item_id - 1)
+        return base is not None and self.limits[base] > 0
+
+    def unnoted(self, item_id):
+        return item_id - 1 if self.is_noted(item_id) else item_id
+
+    def high_alch(self, item):
+        row = self._row_for(item)
+        return self.highalch[row] if row is not None else 0
+
+    def price(self, item, prices):
+        """GE price from {item_id: gp}, or high alch when there is none."""
+        row = self._row_for(item)
+        if row is None:
+            return 0
+        return prices.get(self.ids[row], 0) or self.highalch[row]
+
+    def price_map(self, prices):
+        """{lowercase name: price} for every item, with the high-alch fallback."""
+        return {name: prices.get(self.ids[row], 0) or self.highalch[row] for name, row in self.by_name.items()}
+
+    # --- CACHE ---
+    def dump(self, path, digest):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps((CACHE_VERSION, digest, self.ids, self.names, self.members, self.values,
+                                   self.highalch, self.limits)))
+        os.replace(tmp, path)
+
+
+def _parse(buf):
+    ids, names, members, values, highalch, limits = [], [], [], [], [], []
+    for row in csv.DictReader(buf.decode("utf-8").splitlines()):
+        ids.append(int(row['id']))
+        names.append(row['name'].strip())
+        members.append(row.get('members') == "True")
+        values.append(_int(row.get('value')))
+        highalch.append(_int(row.get('highalch')))
+        limits.append(_int(row.get('limit')))
+
+    known = set(ids)
+    for item_id, name, alch in EXTRA_ITEMS:
+        if item_id not in known:
+            ids.append(item_id)
+            names.append(name)
+            members.append(True)
+            values.append(alch)
+            highalch.append(alch)
+            limits.append(0)
+    return ItemCatalog(ids, names, members, values, highalch, limits)
+
+
+def load_catalog(csv_path=ITEMS_CSV, use_cache=True):
+    key = os.path.abspath(csv_path)
+    if key in _CATALOGS:
+        return _CATALOGS[key]
+
+    buf = b""
+    if os.path.exists(csv_path):
+        with open(csv_path, "rb") as f:
+            buf = f.read()
+    else:
+        print(f"[CATALOG] {csv_path} not found; only built-in items are known")
+    digest = hashlib.blake2b(buf + repr(EXTRA_ITEMS).encode("utf-8"), digest_size=16).hexdigest()
+    cache_path = os.path.splitext(csv_path)[0] + CACHE_EXT
+
+    catalog = None
+    if use_cache and buf and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                cached = marshal.loads(f.read())  # one read; marshal.load(f) reads in tiny chunks
+            if cached[0] == CACHE_VERSION and cached[1] == digest:
+                catalog = ItemCatalog(*cached[2:])
+        except (OSError, EOFError, ValueError, TypeError):
+            catalog = None
+
+    if catalog is None:
+        catalog = _parse(buf)
+        if use_cache and buf:
+            try:
+                catalog.dump(cache_path, digest)
+            except OSError as e:
+                print(f"[CATALOG] Could not write {cache_path}: {e}")
+
+    _CATALOGS[key] = catalog
+    return catalog
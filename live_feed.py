@@ -0,0 +1,117 @@
+"""
+LIVE FEED
+=========
+
+Server-push fan-out of live tracker state over Server-Sent Events.
+
+The tracker publishes small messages as things change:
+  * state    - only the LIVE_HP_STATE keys whose values changed (hp, phase, profit, ...)
+  * tick     - one UDP stream entry (tick_heartbeat and shadowed HTTP events)
+
+Every subscriber first receives a `snapshot` with the full state, then only
+deltas. Overlays keep a merged copy of the state themselves instead of
+re-downloading the whole dictionary every 50-100 ms.
+
+publish() is safe to call from any thread (Tk main loop, UDP thread, HTTP
+handlers); messages are handed to the ingest server's asyncio loop with
+call_soon_threadsafe and fanned out to one bounded queue per subscriber. A
+subscriber that falls SUBSCRIBER_BACKLOG messages behind is disconnected and
+is expected to reconnect (and resync from a fresh snapshot).
+"""
+
+import asyncio
+import json
+import threading
+
+SUBSCRIBER_BACKLOG = 512
+KEEPALIVE_SEC = 15.0
+
+_UNSET = object()
+
+
+class LiveFeed:
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot or (lambda: {})
+        self.loop = None
+        self.subscribers = set()
+        self.last_state = {}
+        self.state_lock = threading.Lock()
+
+    # --- PUBLISHING (any thread) ---
+    def publish(self, event, data):
+        if not self.subscribers or self.loop is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._fanout, event, data)
+        except RuntimeError:
+            # Loop already shut down
+            pass
+
+    def publish_state(self, state):
+        """Publishes only the keys of `state` that differ from what was last sent."""
+        with self.state_lock:
+            changed = {k: v for k, v in state.items() if self.last_state.get(k, _UNSET) != v}
+            self.last_state.update(changed)
+        if changed:
+            self.publish("state", changed)
+
+    def _fanout(self, event, data):
+        for q in list(self.subscribers):
+            try:
+                q.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # Slow consumer: cut it loose rather than buffer without bound.
+                # It drains what is already queued, then its stream ends.
+                self.subscribers.discard(q)
+
+    # --- SUBSCRIBING (inside the ingest server's loop) ---
+    async def subscribe(self, query=None):
+        """Async generator of (event, data) for one SSE client."""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+
+        q = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.subscribers.add(q)
+        try:
+            yield "snapshot", self.snapshot()
+            while q in self.subscribers or not q.empty():
+                try:
+                    event, data = await asyncio.wait_for(q.get(), timeout=KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    yield None, None
+                    continue
+                yield event, data
+        finally:
+            self.subscribers.discard(q)
+
+
+def format_sse(event, data):
+    if event is None:
+        return b": keepalive\n\n"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+# --- CLIENT SIDE ---
+def iter_events(url, timeout=5.0):
+    """
+    Blocking generator of (event, data) tuples from an SSE endpoint.
+    Returns when the server closes the stream; raises on connection errors.
+    """
+    import requests
+
+    with requests.get(url, stream=True, timeout=(1.0, timeout + KEEPALIVE_SEC)) as resp:
+        resp.raise_for_status()
+        event, data_lines = None, []
+        for raw in resp.iter_lines(decode_unicode=True):
+            if raw is None:
+                continue
+            if raw == "":
+                if data_lines:
+                    yield event or "message", json.loads("\n".join(data_lines))
+                event, data_lines = None, []
+            elif raw.startswith(":"):
+                continue
+            elif raw.startswith("event:"):
+                event = raw[6:].strip()
+            elif raw.startswith("data:"):
+                data_lines.append(raw[5:].lstrip())
@@ -1,5 +1,9 @@
 import tkinter as tk
-import requests
+import threading
+import time
+from live_feed import iter_events
+
+FEED_URL = "http://127.0.0.1:5000/stream"
 
 class LiveHPBar:
     def __init__(self):
@@ -25,6 +29,13 @@ class LiveHPBar:
 
         self.drag_start_x = 0
         self.drag_start_y = 0
+
+        # Live state is pushed by the tracker; the feed thread merges deltas here
+        self.state = {}
+        self.connected = False
+        self.dirty = True
+        self.state_lock = threading.Lock()
+        threading.Thread(target=self.feed_daemon, daemon=True).start()
         
         # Start the high-speed loop
         self.update_loop()
@@ -39,17 +50,43 @@ class LiveHPBar:
         y = event.y_root - self.drag_start_y
         self.root.geometry(f"+{x}+{y}")
 
+    def feed_daemon(self):
+        while True:
+            try:
+                for event, data in iter_events(FEED_URL):
+                    with self.state_lock:
+                        if event == "snapshot":
+                            self.state = data
+                            self.connected = True
+                        elif event == "state":
+                            self.state.update(data)
+                        else:
+                            continue
+                        self.dirty = True
+            except Exception:
+                pass
+            # Server not running or stream dropped; retry shortly
+            with self.state_lock:
+                self.connected = False
+                self.dirty = True
+            time.sleep(1.0)
+
     def update_loop(self):
-        try:
-            # Poll the local Flask server (extremely fast)
-            resp = requests.get("http://127.0.0.1:5000/hp", timeout=0.1)
-            data = resp.json()
-            
+        # Only repaint when the feed delivered something new
+        if self.dirty:
+            with self.state_lock:
+                data = dict(self.state)
+                connected = self.connected
+                self.dirty = False
+
             self.canvas.delete("all")
-            
-            if data.get("active"):
+
+            if not connected:
+                # Server not running or unreachable
+                self.canvas.create_text(self.width//2, self.height//2, text="DISCONNECTED", fill="red", font=("Consolas", 10))
+            elif data.get("active"):
                 curr = data.get("current", 0)
-                maximum = data.get("max", 315)
+                maximum = data.get("max", 315) or 315
                 
                 # Calculate pixel width of the green bar
                 pct = max(0.0, min(1.0, curr / maximum))
@@ -65,14 +102,9 @@ class LiveHPBar:
             else:
                 # Idle state (Invisible or minimal)
                 self.canvas.create_text(self.width//2, self.height//2, text="AWAITING COMBAT", fill="gray", font=("Consolas", 10))
-                
-        except Exception as e:
-            # Server not running or unreachable
-            self.canvas.delete("all")
-            self.canvas.create_text(self.width//2, self.height//2, text="DISCONNECTED", fill="red", font=("Consolas", 10))
 
-        # Re-run this check every 100 milliseconds
-        self.root.after(100, self.update_loop)
+        # Cheap dirty-flag check; well under one game tick (600 ms) of latency
+        self.root.after(20, self.update_loop)
 
 if __name__ == "__main__":
     LiveHPBar()
\ No newline at end of file
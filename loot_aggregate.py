@@ -0,0 +1,131 @@
+"""
+LOOT AGGREGATE
+==============
+
+Materialized all-time totals (kills + per-item loot) over every session JSON
+in bbd_data/.
+
+The tracker's All-Time tab used to json.load every session file on each
+3-second refresh. Instead, this keeps one entry per file (mtime, size, kills,
+loot) plus the running totals, persisted to CACHE_FILE between runs:
+
+  * refresh() only re-reads files whose mtime or size changed, and subtracts /
+    adds their contribution to the totals. Deleted files are subtracted.
+  * The directory is only swept when its own mtime changes (session documents
+    are written with an atomic rename, which bumps it) or every RESCAN_SEC
+    as a safety net for in-place edits by other scripts.
+  * totals(exclude=...) leaves out the live session's file so the tracker can
+    add its in-memory counters instead of a possibly stale compaction.
+"""
+
+import json
+import os
+import time
+
+CACHE_FILE = "loot_aggregate_cache.json"
+CACHE_VERSION = 1
+RESCAN_SEC = 60
+
+
+class LootAggregate:
+    def __init__(self, data_dir, cache_path=CACHE_FILE):
+        self.data_dir = data_dir
+        self.cache_path = cache_path
+        self.files = {}          # filename -> {"mtime", "size", "kills", "loot"}
+        self.kills = 0
+        self.loot = {}
+        self.dir_mtime = None
+        self.last_scan = 0.0
+        self.load()
+
+    # --- PERSISTENCE ---
+    def load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r') as f:
+                cache = json.load(f)
+            if cache.get("version") != CACHE_VERSION:
+                return
+            for name, entry in cache.get("files", {}).items():
+                self._add(name, entry)
+        except Exception as e:
+            print(f"[LOOT CACHE] Ignoring unreadable cache: {e}")
+            self.files, self.kills, self.loot = {}, 0, {}
+
+    def save(self):
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"version": CACHE_VERSION, "files": self.files}, f)
+        os.replace(tmp, self.cache_path)
+
+    # --- INCREMENTAL UPDATE ---
+    def _add(self, name, entry, sign=1):
+        if sign > 0:
+            self.files[name] = entry
+        else:
+            self.files.pop(name, None)
+        self.kills += sign * entry["kills"]
+        for item, qty in entry["loot"].items():
+            total = self.loot.get(item, 0) + sign * qty
+            if total:
+                self.loot[item] = total
+            else:
+                self.loot.pop(item, None)
+
+    def refresh(self, force=False):
+        """Re-reads changed session files. Returns True if the totals changed."""
+        try:
+            dir_mtime = os.stat(self.data_dir).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if not force and dir_mtime == self.dir_mtime and now - self.last_scan < RESCAN_SEC:
+            return False
+        self.dir_mtime = dir_mtime
+        self.last_scan = now
+
+        changed = False
+        seen = set()
+        with os.scandir(self.data_dir) as it:
+            for de in it:
+                if not de.name.endswith(".json"):
+                    continue
+                seen.add(de.name)
+                st = de.stat()
+                old = self.files.get(de.name)
+                if old and old["mtime"] == st.st_mtime_ns and old["size"] == st.st_size:
+                    continue
+                try:
+                    with open(de.path, 'r') as f:
+                        data = json.load(f)
+                except Exception:
+                    continue  # Half-written or foreign file; retried when it changes
+                entry = {
+                    "mtime": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "kills": data.get("total_kills", 0),
+                    "loot": data.get("loot_summary", {}),
+                }
+                if old:
+                    self._add(de.name, old, sign=-1)
+                self._add(de.name, entry)
+                changed = True
+
+        for name in [n for n in self.files if n not in seen]:
+            self._add(name, self.files[name], sign=-1)
+            changed = True
+
+        if changed:
+            self.save()
+        return changed
+
+    def totals(self, exclude=None):
+        """Returns (kills, loot dict) over all cached files except `exclude`."""
+        kills, loot = self.kills, dict(self.loot)
+        entry = self.files.get(exclude) if exclude else None
+        if entry:
+            kills -= entry["kills"]
+            for item, qty in entry["loot"].items():
+                loot[item] = loot.get(item, 0) - qty
+        return kills, loot
@@ -4,6 +4,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import json
+from item_catalog import load_catalog
 
 # ==========================================
 # CONFIGURATION
@@ -416,16 +417,15 @@ def build_index():
     
     # --- Map Human Readable Item Names ---
     try:
-        items_df = pd.read_csv(ITEMS_FILE)
-        # Create a dictionary for mapping item IDs to names
-        id_to_name = dict(zip(items_df['id'], items_df['name']))
-        df_comp['item_name'] = df_comp['item_id'].map(id_to_name).fillna("Unknown Item")
+        catalog = load_catalog(ITEMS_FILE)
+        id_to_name = lambda item_id: catalog.name(item_id, "Unknown Item")
+        df_comp['item_name'] = df_comp['item_id'].map(id_to_name)
         
         if not df_ad.empty:
-            df_ad['item_name'] = df_ad['item_id'].map(id_to_name).fillna("Unknown Item")
+            df_ad['item_name'] = df_ad['item_id'].map(id_to_name)
             
         if not df_diag.empty:
-            df_diag['item_name'] = df_diag['item_id'].map(id_to_name).fillna("Unknown Item")
+            df_diag['item_name'] = df_diag['item_id'].map(id_to_name)
             
     except Exception as e:
         print(f"Warning: Could not load items.csv to map names ({e})")
@@ -0,0 +1,105 @@
+"""
+METRICS
+=======
+
+Tiny in-process counters / gauges / histograms for the tracker's ingestion
+hot path, rendered in the Prometheus text exposition format by render()
+(served as GET /metrics).
+
+Metrics register themselves in REGISTRY when created. Updates take a
+per-metric lock, so they are safe from the Tk thread, the UDP thread, the
+ingest server and the telemetry writer alike. Histograms use fixed
+millisecond buckets.
+"""
+
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+REGISTRY = []
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, n=1):
+        with self.lock:
+            self.value += n
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """Sampled on scrape from `fn` (e.g. a queue's qsize)."""
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        REGISTRY.append(self)
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.fn()}"]
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS_MS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """Context manager observing the wall time of its block in ms."""
+        return _Timer(self)
+
+    def render(self):
+        with self.lock:
+            counts, total, n = list(self.counts), self.sum, self.count
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, c in zip(self.buckets, counts):
+            cumulative += c
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {n}')
+        lines.append(f"{self.name}_sum {total:.3f}")
+        lines.append(f"{self.name}_count {n}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe((time.perf_counter() - self.t0) * 1000)
+        return False
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
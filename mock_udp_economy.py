@@ -1,71 +1,320 @@
-import socket
-import time
-import threading
+"""
+BBD LOAD GENERATOR
+==================
+
+Synthetic RuneLite traffic for stress-testing bbd_tracker.py.
+
+Simulates N concurrent plugin clients. Each client runs its own game-tick loop
+and emits the plugin's event mix exactly the way BBDTrackerPlugin.java does:
+
+  UDP only         tick_heartbeat (every tick), net_profit_delta
+  HTTP + UDP echo  combat_telemetry, loot_event, player_spawn, phase_change
+                   (sendPayload: POST /event on a keep-alive connection, plus
+                   the same JSON shadowed to the UDP port)
+
+Rates are per client, in events per second, and are multiplied by
+--burst-factor for --burst-len seconds every --burst-every seconds. A burst
+also fires --burst-spawns player_spawn events at once (walking into a crowded
+zone).
+
+Measurement:
+  * Ack latency   - HTTP POST enqueue -> response, per client sender thread
+  * Server loss   - every UDP payload except net_profit_delta carries an "lg"
+                    marker {c: client, n: seq, t: send time}. The tracker
+                    republishes those on GET /stream as `tick` events, so a
+                    listener counts which markers made it through the UDP
+                    socket, udp_queue and Tk hop, and their end-to-end latency.
+  * Feed gaps     - /stream cuts a subscriber loose when it falls too far
+                    behind. Markers sent between the last one seen before
+                    such a disconnect and the reconnect are reported on
+                    their own, not as server loss.
+
+NOTE: loot_event and player_spawn go through the real handlers (loot totals,
+census.db). Point it at a scratch copy of the tracker's working directory.
+
+USAGE:
+  > python mock_udp_economy.py                                   # 1 client, plain broadcaster
+  > python mock_udp_economy.py --clients 16 --seconds 60 --hits 5 --spawns 2
+  > python mock_udp_economy.py --clients 64 --tick-rate 0.06 --burst-every 10 --burst-factor 5
+"""
+
+import argparse
+import http.client
 import json
+import queue
 import random
+import socket
+import statistics
+import threading
+import time
 
 # --- CONFIGURATION ---
 HOST = '127.0.0.1'
 PORT = 5005
+HTTP_PORT = 5000
 TICK_RATE = 0.600  # 600ms OSRS tick
 DROP_RATE = 5.0    # 5 seconds between mock kills
+DRAIN_SEC = 3.0    # Wait for stragglers on /stream after the last send
 
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-def send_payload(payload):
+
+def send_payload(payload, verbose=True):
     try:
         message = json.dumps(payload).encode('utf-8')
         sock.sendto(message, (HOST, PORT))
-        print(f"[TX] {payload}")
+        if verbose:
+            print(f"[TX] {payload}")
     except Exception as e:
         print(f"[Error] Failed to send: {e}")
 
-def tick_daemon():
-    print("[Thread] Tick Heartbeat Started")
-    tick_count = 1000
-    while True:
-        payload = {
-            "event": "tick_heartbeat",
-            "tick": tick_count,
-            "state": "idle" 
-        }
-        send_payload(payload)
-        tick_count += 1
-        time.sleep(TICK_RATE)
-
-def economy_daemon():
-    print("[Thread] Economy Drops Started")
-    # Wait a moment for the matrix to initialize before dropping gold
-    time.sleep(2) 
-    
-    while True:
-        # 80% chance for a standard base drop, 20% chance for a rune/rare drop
-        is_rare = random.random() > 0.8
-        
-        if is_rare:
-            gp_val = random.randint(65000, 105000)
-        else:
-            gp_val = random.randint(18000, 26000)
-            
-        payload = {
-            "event": "net_profit_delta",
-            "value": gp_val
-        }
-        send_payload(payload)
-        time.sleep(DROP_RATE)
 
-if __name__ == "__main__":
-    print(f"--- BBD UDP Mock Broadcaster ---")
-    print(f"Targeting {HOST}:{PORT}")
-    
-    t_tick = threading.Thread(target=tick_daemon, daemon=True)
-    t_econ = threading.Thread(target=economy_daemon, daemon=True)
-    
-    t_tick.start()
-    t_econ.start()
-    
-    try:
+# --- MEASUREMENT ---
+class LoadStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = {}              # event -> count (UDP datagrams)
+        self.http_sent = 0
+        self.http_status = {}
+        self.http_errors = 0
+        self.ack_ms = []
+        self.tracked = {}           # (client, n) -> send time, markers sent over UDP
+        self.received = set()       # markers seen on /stream
+        self.e2e_ms = []
+        self.feed_connects = 0
+        self.feed_disconnects = 0   # Streams that ended while the run was still going
+        self.feed_gaps = []         # (last marker time before a disconnect, reconnect time)
+        self.gap_start = None       # Set while the listener is disconnected
+
+    def count(self, event):
+        with self.lock:
+            self.sent[event] = self.sent.get(event, 0) + 1
+
+
+def pct(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def feed_listener(stats, url, stop):
+    from live_feed import iter_events
+    last_t = None   # Send time of the newest marker seen
+    while not stop.is_set():
+        try:
+            stats.feed_connects += 1
+            for event, data in iter_events(url):
+                if stats.gap_start is not None:
+                    # First message after a reconnect closes the gap
+                    with stats.lock:
+                        stats.feed_gaps.append((stats.gap_start, time.time()))
+                        stats.gap_start = None
+                if event == "tick" and isinstance(data, dict) and "lg" in data:
+                    mark = data["lg"]
+                    last_t = mark["t"] if last_t is None else max(last_t, mark["t"])
+                    with stats.lock:
+                        stats.received.add((mark["c"], mark["n"]))
+                        stats.e2e_ms.append((time.time() - mark["t"]) * 1000)
+                if stop.is_set():
+                    return
+        except Exception as e:
+            if stats.feed_connects <= 3:
+                print(f"[FEED] {e}")
+            time.sleep(0.5)
+        if not stop.is_set() and stats.gap_start is None:
+            # Cut loose as a slow consumer (or the connection broke)
+            with stats.lock:
+                stats.feed_disconnects += 1
+                stats.gap_start = last_t if last_t is not None else time.time()
+
+
+# --- CLIENT ---
+class MockClient:
+    def __init__(self, cid, args, stats):
+        self.cid = cid
+        self.args = args
+        self.stats = stats
+        self.rng = random.Random(cid)
+        self.n = 0
+        self.tick = 1000
+        self.in_zone = False
+        self.http_jobs = queue.Queue()
+
+    def marker(self):
+        self.n += 1
+        mark = {"c": self.cid, "n": self.n, "t": time.time()}
+        with self.stats.lock:
+            self.stats.tracked[(self.cid, self.n)] = mark["t"]
+        return mark
+
+    def send_udp(self, payload, tracked=True):
+        if tracked:
+            payload["lg"] = self.marker()
+        send_payload(payload, verbose=self.args.verbose)
+        self.stats.count(payload["event"])
+
+    def send_event(self, event, body):
+        # Mirrors the plugin's sendPayload(): UDP shadow + HTTP POST
+        payload = {"event": event, "payload": body}
+        self.send_udp(payload)
+        self.http_jobs.put((time.perf_counter(), json.dumps(payload)))
+
+    def http_sender(self):
+        conn = http.client.HTTPConnection(HOST, self.args.http_port, timeout=5)
         while True:
-            time.sleep(1)
+            job = self.http_jobs.get()
+            if job is None:
+                break
+            queued_at, body = job
+            try:
+                conn.request("POST", "/event", body=body, headers={"Content-Type": "application/json"})
+                resp = conn.getresponse()
+                resp.read()
+                with self.stats.lock:
+                    self.stats.http_sent += 1
+                    self.stats.http_status[resp.status] = self.stats.http_status.get(resp.status, 0) + 1
+                    self.stats.ack_ms.append((time.perf_counter() - queued_at) * 1000)
+            except (OSError, http.client.HTTPException):
+                with self.stats.lock:
+                    self.stats.http_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(HOST, self.args.http_port, timeout=5)
+        conn.close()
+
+    def chance(self, rate, tick_sec, mult):
+        return self.rng.random() < rate * tick_sec * mult
+
+    def run(self, start, deadline):
+        a = self.args
+        sender = threading.Thread(target=self.http_sender, daemon=True)
+        sender.start()
+        next_burst = start + a.burst_every if a.burst_every else None
+        burst_until = 0.0
+        next_tick = time.perf_counter()
+
+        while time.time() < deadline:
+            now = time.time()
+            if next_burst and now >= next_burst:
+                burst_until = now + a.burst_len
+                next_burst += a.burst_every
+                for _ in range(a.burst_spawns):
+                    self.spawn()
+            mult = a.burst_factor if now < burst_until else 1.0
+
+            self.tick += 1
+            attacking = self.chance(a.hits, a.tick_rate, mult)
+            self.send_udp({"event": "tick_heartbeat", "tick": self.tick, "state": "attack" if attacking else "idle"})
+            if attacking:
+                self.send_event("combat_telemetry", {"damage": self.rng.randint(0, 40), "hp_before": self.rng.randint(1, 315)})
+            if self.chance(a.gp, a.tick_rate, mult):
+                value = self.rng.randint(65000, 105000) if self.rng.random() > 0.8 else self.rng.randint(18000, 26000)
+                self.send_udp({"event": "net_profit_delta", "value": value}, tracked=False)
+            if self.chance(a.kills, a.tick_rate, mult):
+                self.send_event("loot_event", {"npc": "Brutal Black Dragon", "items": [{"id": 536, "qty": 1}, {"id": 1747, "qty": 2}]})
+            if self.chance(a.spawns, a.tick_rate, mult):
+                self.spawn()
+            if self.chance(a.phases, a.tick_rate, mult):
+                self.in_zone = not self.in_zone
+                self.send_event("phase_change", {"in_zone": self.in_zone})
+
+            next_tick += a.tick_rate
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.http_jobs.put(None)
+        sender.join()
+
+    def spawn(self):
+        name = f"lg_{self.cid}_{self.rng.randint(0, self.args.players - 1)}"
+        self.send_event("player_spawn", {"name": name, "combat": self.rng.randint(60, 126), "world": 301 + self.cid % 3, "gear": []})
+
+
+# --- REPORT ---
+def report(stats, elapsed, clients):
+    total_udp = sum(stats.sent.values())
+    print(f"\n--- LOAD REPORT ({clients} clients, {elapsed:.1f}s) ---")
+    for event, n in sorted(stats.sent.items()):
+        print(f"  {event:<18} {n:>9}  ({n / elapsed:,.0f}/s)")
+    print(f"  UDP total          {total_udp:>9}  ({total_udp / elapsed:,.0f}/s)")
+
+    ack = sorted(stats.ack_ms)
+    print(f"  HTTP acks          {stats.http_sent:>9}  status {stats.http_status} errors {stats.http_errors}")
+    if ack:
+        print(f"  Ack latency        p50 {statistics.median(ack):.2f}ms  p99 {pct(ack, 0.99):.2f}ms  max {ack[-1]:.2f}ms")
+
+    if stats.feed_connects:
+        with stats.lock:
+            gaps = list(stats.feed_gaps)
+            if stats.gap_start is not None:
+                gaps.append((stats.gap_start, float("inf")))
+            missing = [t for key, t in stats.tracked.items() if key not in stats.received]
+        in_gap = sum(1 for t in missing if any(start < t <= end for start, end in gaps))
+        lost = len(missing) - in_gap
+        e2e = sorted(stats.e2e_ms)
+        print(f"  Server loss        {lost}/{len(stats.tracked)} tracked UDP payloads "
+              f"({lost / max(1, len(stats.tracked)) * 100:.2f}%), feed connects {stats.feed_connects}")
+        print(f"  Feed disconnects   {stats.feed_disconnects:>9}  ({in_gap} markers sent while reconnecting, not counted as loss)")
+        if e2e:
+            print(f"  UDP -> /stream     p50 {statistics.median(e2e):.1f}ms  p99 {pct(e2e, 0.99):.1f}ms  max {e2e[-1]:.1f}ms")
+
+
+def main():
+    global HOST, PORT
+    parser = argparse.ArgumentParser(description="Synthetic RuneLite load generator for bbd_tracker.py")
+    parser.add_argument('--clients', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=0, help="Run time (0 = until Ctrl+C)")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--udp-port', type=int, default=PORT)
+    parser.add_argument('--http-port', type=int, default=HTTP_PORT)
+    parser.add_argument('--tick-rate', type=float, default=TICK_RATE, help="Seconds per game tick per client")
+    parser.add_argument('--hits', type=float, default=0.0, help="combat_telemetry per second")
+    parser.add_argument('--gp', type=float, default=1 / DROP_RATE, help="net_profit_delta per second")
+    parser.add_argument('--kills', type=float, default=0.0, help="loot_event per second")
+    parser.add_argument('--spawns', type=float, default=0.0, help="player_spawn per second")
+    parser.add_argument('--phases', type=float, default=0.0, help="phase_change per second")
+    parser.add_argument('--players', type=int, default=200, help="Distinct synthetic player names per client")
+    parser.add_argument('--burst-every', type=float, default=0.0, help="Seconds between bursts (0 = none)")
+    parser.add_argument('--burst-len', type=float, default=2.0)
+    parser.add_argument('--burst-factor', type=float, default=4.0, help="Rate multiplier during a burst")
+    parser.add_argument('--burst-spawns', type=int, default=0, help="player_spawn events fired at each burst start")
+    parser.add_argument('--no-feed', action='store_true', help="Don't subscribe to /stream (no loss / E2E stats)")
+    parser.add_argument('--verbose', action='store_true', help="Print every datagram")
+    args = parser.parse_args()
+
+    HOST, PORT = args.host, args.udp_port
+    if args.clients == 1 and not args.seconds:
+        args.verbose = True
+
+    print(f"--- BBD Load Generator ---")
+    print(f"Targeting UDP {HOST}:{PORT}, HTTP {HOST}:{args.http_port} with {args.clients} client(s)")
+
+    stats = LoadStats()
+    stop = threading.Event()
+    if not args.no_feed:
+        threading.Thread(target=feed_listener, args=(stats, f"http://{HOST}:{args.http_port}/stream", stop), daemon=True).start()
+        time.sleep(0.5)
+
+    start = time.time()
+    deadline = start + args.seconds if args.seconds else float("inf")
+    clients = [MockClient(i, args, stats) for i in range(args.clients)]
+    threads = [threading.Thread(target=c.run, args=(start, deadline), daemon=True) for c in clients]
+    for t in threads:
+        t.start()
+
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
     except KeyboardInterrupt:
-        print("\nShutting down broadcaster.")
\ No newline at end of file
+        print("\nShutting down load generator.")
+        for c in clients:
+            c.http_jobs.put(None)
+    elapsed = time.time() - start
+
+    if not args.no_feed:
+        time.sleep(DRAIN_SEC)
+    stop.set()
+    report(stats, elapsed, args.clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 import os
-import json
 import csv
 import glob
 import pandas as pd
+from item_catalog import load_catalog
+import session_store
 from datetime import datetime, timedelta
 
 # --- CONFIG ---
@@ -90,18 +91,8 @@ DROP_TABLE = {
 
 def build_static_prices():
     """Builds a comprehensive dictionary of all items (Drops + Supplies) at the Anchor Date."""
-    name_to_id = {}
-    fallback_alch = {}
-    
-    # 1. Map Names to IDs
-    if os.path.exists(ITEMS_CSV):
-        with open(ITEMS_CSV, 'r', encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                i_id = int(row['id'])
-                name = row['name'].strip().lower()
-                if name not in name_to_id or "note" not in name:
-                    name_to_id[name] = i_id
-                fallback_alch[name] = int(row['highalch']) if row.get('highalch') else 0
+    # 1. Names, IDs and high-alch fallbacks come from the shared catalog
+    catalog = load_catalog(ITEMS_CSV)
 
     # 2. Gather Price Snapshots from Anchor Date Forward
     prices_by_id = {}
@@ -129,14 +120,7 @@ def build_static_prices():
                         prices_by_id[item_id] = price
 
     # 3. Create final Name -> Price mapping for EVERY item we might encounter
-    final_prices = {'coins': 1}
-    for name, i_id in name_to_id.items():
-        if i_id in prices_by_id:
-            final_prices[name] = prices_by_id[i_id]
-        else:
-            final_prices[name] = fallback_alch.get(name, 0)
-            
-    return final_prices
+    return catalog.price_map(prices_by_id)
 
 def unpack_singletons(obj):
     if isinstance(obj, list):
@@ -169,34 +153,30 @@ def main():
     
     dataset =[]
 
-    # 3. Process all JSON Sessions
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            data = unpack_singletons(data)
-            
-        start_time = pd.to_datetime(data.get('start_time'))
-        end_time = pd.to_datetime(data.get('end_time', pd.Timestamp.now().isoformat()))
-        kills = data.get('total_kills', 0)
-        active_sec = data.get('active_seconds', 0)
+    # 3. Process all sessions (session store, synced from the JSON documents)
+    conn = session_store.open_store(data_dir=DATA_DIR)
+    try:
+        summaries = session_store.list_sessions(conn)
+        configs = session_store.load_config(conn)
+        loot = session_store.load_loot(conn)
+        phases = session_store.load_events(conn, types=["phase"])
+    finally:
+        conn.close()
+
+    for data in summaries:
+        sid = data['session_id']
+        config = unpack_singletons(configs.get(sid, {}))
+
+        start_time = pd.to_datetime(data['start_time'])
+        end_time = pd.to_datetime(data['end_time'] or pd.Timestamp.now().isoformat())
+        kills = data['total_kills'] or 0
+        active_sec = data['active_seconds'] or 0
         
         duration_hrs = (end_time - start_time).total_seconds() / 3600.0
         if duration_hrs <= 0 or kills == 0: continue
         
         # Calculate Bank/Away Time
-        bank_sec = 0
-        trips = 0
-        away_ts = None
-        for e in data.get('event_timeline', []):
-            if e['type'] == 'phase':
-                ts = pd.to_datetime(e['timestamp'])
-                if "AWAY" in e['value']: away_ts = ts
-                elif "KILLING" in e['value'] and away_ts:
-                    bank_sec += (ts - away_ts).total_seconds()
-                    trips += 1
-                    away_ts = None
+        bank_sec, trips = session_store.bank_trips(phases.get(sid, []))
                     
         # Extract Actual Supply Cost from GPPH plugin
         actual_supply_cost = 0
@@ -217,22 +197,22 @@ def main():
         
         # Option A: The Phantom Wealth Fix
         # If Bonecrusher is equipped, we never loot the bones, so we subtract their market value from the expected drop.
-        if data.get("config", {}).get("bones") == "Bonecrusher necklace":
+        if config.get("bones") == "Bonecrusher necklace":
             session_kill_value -= static_prices.get("dragon bones", 0)
 
         expected_revenue = kills * session_kill_value
         t_ngp_hr = (expected_revenue - actual_supply_cost) / duration_hrs
         
         # Determine raw actual revenue just for variance calculation
-        actual_revenue = sum(qty * static_prices.get(item.lower(), 0) for item, qty in data.get('loot_summary', {}).items())
+        actual_revenue = sum(qty * static_prices.get(item.lower(), 0) for item, qty in loot.get(sid, {}).items())
         rng_variance_gp = actual_revenue - expected_revenue
 
         astb = (bank_sec / trips) if trips > 0 else 0
         
-        total_attacks = data.get("total_attacks")
+        total_attacks = data['total_attacks']
         
         # Use dynamic weapon tick speed to perfectly calculate missed attacks and Active TTK
-        weapon = data.get("config", {}).get("weapon", "Unknown")
+        weapon = config.get("weapon", "Unknown")
         
         # Crossbows and T-Bow attack every 6 ticks standard, 5 ticks (3.0s) on Rapid.
         # Assuming Rapid is always used.
@@ -257,7 +237,7 @@ def main():
                 if actual_active_ttk > 0:
                     actual_kph = 3600.0 / actual_active_ttk
                     
-                    theoretical_ttk = data.get("theoretical_stats", {}).get("ttk", 0)
+                    theoretical_ttk = data['theoretical_stats'].get("ttk", 0)
                     if theoretical_ttk > 0:
                         theoretical_kph = 3600.0 / theoretical_ttk
                         delta_kph = actual_kph - theoretical_kph
@@ -266,7 +246,7 @@ def main():
             miss_per_hr = None 
 
         row_data = {
-            "session_id": data.get("session_id"),
+            "session_id": sid,
             "date": start_time.strftime("%Y-%m-%d"),
             "duration_hrs": duration_hrs,
             "active_hrs": active_sec / 3600.0,
@@ -283,7 +263,6 @@ def main():
         }
         
         # Flatten Gear Config for MLR
-        config = data.get("config", {})
         for key, val in config.items():
             if key not in["experiment_name", "mode"]: 
                 row_data[f"config_{key}"] = val
@@ -10,7 +10,8 @@ PIPELINE_SCRIPTS =[
     "wealth_engine.py",
     "normalize_sessions.py",
     "daily_report.py",  # <--- NEW ADDITION
-    "market_index_builder.py"
+    "market_index_builder.py",
+    "analytics_store.py"
 ]
 
 def run_pipeline():
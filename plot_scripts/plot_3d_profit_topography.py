@@ -1,10 +1,12 @@
 import os
 import shutil
-import json
 import pandas as pd
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 NORMALIZED_CSV = "../normalized_sessions.csv"
@@ -25,28 +27,25 @@ def main():
     
     # 2. Extract Stats & Loadout Strings from JSONs
     json_data =[]
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            config = data.get("config", {})
-            theo = data.get("theoretical_stats", {})
-            
-            # Create a clean, readable loadout string for the hover tooltip
-            loadout = f"Wep: {config.get('weapon', '')}<br>"
-            loadout += f"Ammo: {config.get('ammo', '')}<br>"
-            loadout += f"Boots: {config.get('feet', '')}<br>"
-            loadout += f"Back: {config.get('back', '')}<br>"
-            loadout += f"Ring: {config.get('ring', '')}<br>"
-            loadout += f"Bones: {config.get('bones', '')}"
-            
-            json_data.append({
-                "session_id": data.get("session_id"),
-                "pray_bonus": theo.get("pray_bonus", 0),
-                "theo_dps": theo.get("dps", 0),
-                "loadout": loadout
-            })
-            
+    for session in load_sessions(DATA_DIR):
+        config = session.config
+        theo = session.theoretical_stats
+        
+        # Create a clean, readable loadout string for the hover tooltip
+        loadout = f"Wep: {config.get('weapon', '')}<br>"
+        loadout += f"Ammo: {config.get('ammo', '')}<br>"
+        loadout += f"Boots: {config.get('feet', '')}<br>"
+        loadout += f"Back: {config.get('back', '')}<br>"
+        loadout += f"Ring: {config.get('ring', '')}<br>"
+        loadout += f"Bones: {config.get('bones', '')}"
+        
+        json_data.append({
+            "session_id": session.session_id,
+            "pray_bonus": theo.get("pray_bonus", 0),
+            "theo_dps": theo.get("dps", 0),
+            "loadout": loadout
+        })
+        
     df_json = pd.DataFrame(json_data)
     
     # 3. Merge and Filter
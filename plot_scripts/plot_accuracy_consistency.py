@@ -1,12 +1,14 @@
 import os
 import shutil
-import json
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -15,12 +17,6 @@ OUTPUT_DIR = "../analytics_output"
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-def parse_iso_time(ts_str):
-    try:
-        return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-    except:
-        return None
-
 def main():
     print("--- Generating The Consistency Paradox Chart ---")
     
@@ -30,37 +26,32 @@ def main():
     plot_data =[]
 
     # 1. Parse JSONs for exact kill deltas and theoretical accuracy
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            
-        theo = data.get("theoretical_stats", {})
+    for session in load_sessions(DATA_DIR):
+        theo = session.theoretical_stats
         acc = theo.get("accuracy", 0)
         
         # We need the accuracy stat to map this session
         if acc <= 0: continue
             
-        timeline = data.get('event_timeline', [])
+        timeline = session.events
         
         ttk_data =[]
         in_killing_phase = False
         last_event_time = None
         
         for e in timeline:
-            e_time = parse_iso_time(e['timestamp'])
+            e_time = e.time
             if not e_time: continue
                 
-            if e['type'] == 'phase':
-                if "KILLING" in e['value']:
+            if e.type == 'phase':
+                if "KILLING" in e.value:
                     in_killing_phase = True
                     last_event_time = e_time
                 else:
                     in_killing_phase = False
                     last_event_time = None
                     
-            elif e['type'] == 'kill':
+            elif e.type == 'kill':
                 if in_killing_phase and last_event_time is not None:
                     ttk = (e_time - last_event_time).total_seconds()
                     
@@ -77,7 +68,7 @@ def main():
             mean_ttk = np.mean(ttk_data)
             
             plot_data.append({
-                "session_id": data.get("session_id"),
+                "session_id": session.session_id,
                 "accuracy": acc,
                 "std_dev": std_dev,
                 "mean_ttk": mean_ttk,
@@ -1,11 +1,13 @@
 import os
 import shutil
-import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -14,12 +16,6 @@ OUTPUT_DIR = "../analytics_output"
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-def parse_iso_time(ts_str):
-    try:
-        return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-    except:
-        return None
-
 def main():
     print("--- Generating Bank Trip (Away Time) Histogram ---")
     
@@ -29,23 +25,18 @@ def main():
     bank_times =[]
 
     # 1. Parse JSONs for Away -> Killing deltas
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            
-        timeline = data.get('event_timeline',[])
+    for session in load_sessions(DATA_DIR):
+        timeline = session.events
         
         has_started_killing = False
         away_start = None
         
         for e in timeline:
-            e_time = parse_iso_time(e['timestamp'])
+            e_time = e.time
             if not e_time: continue
                 
-            if e['type'] == 'phase':
-                if "KILLING" in e['value']:
+            if e.type == 'phase':
+                if "KILLING" in e.value:
                     has_started_killing = True
                     if away_start is not None:
                         trip_time = (e_time - away_start).total_seconds()
@@ -55,7 +46,7 @@ def main():
                             bank_times.append(trip_time)
                             
                         away_start = None
-                elif "AWAY" in e['value']:
+                elif "AWAY" in e.value:
                     if has_started_killing:
                         away_start = e_time
 
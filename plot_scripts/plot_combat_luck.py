@@ -1,11 +1,13 @@
 import os
 import shutil
-import json
 import sqlite3
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -23,21 +25,19 @@ def main():
 
     # 1. Get theoretical DPS from JSONs
     session_theos = {}
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            s_id = data.get("session_id")
-            theo = data.get("theoretical_stats", {})
-            if theo.get("dps", 0) > 0:
-                session_theos[s_id] = {
-                    "name": data.get("config", {}).get("experiment_name", s_id),
-                    "theo_dps": theo["dps"]
-                }
+    for session in load_sessions(DATA_DIR):
+        s_id = session.session_id
+        theo = session.theoretical_stats
+        if theo.get("dps", 0) > 0:
+            session_theos[s_id] = {
+                "name": session.config.get("experiment_name", s_id),
+                "theo_dps": theo["dps"]
+            }
 
     # 2. Get actual DPS from SQLite
     conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT session_id, SUM(damage) as total_dmg, COUNT(*) as bolts_fired FROM hitsplats GROUP BY session_id", conn)
+    # Per-session totals are maintained by the telemetry writer (see hit_summary.py)
+    df = pd.read_sql_query("SELECT session_id, damage_sum as total_dmg, hits as bolts_fired FROM session_hit_summary", conn)
     conn.close()
 
     if df.empty:
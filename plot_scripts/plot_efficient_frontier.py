@@ -1,12 +1,14 @@
 import os
 import shutil
-import json
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as path_effects
 from matplotlib.colors import ListedColormap, BoundaryNorm
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 NORMALIZED_CSV = "../normalized_sessions.csv"
@@ -31,21 +33,18 @@ def main():
     # 2. Extract Theoretical DPS and Gear Configs directly from JSONs
     # (Since we didn't add DPS to the normalizer script, we just pull it fresh here!)
     json_data =[]
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            config = data.get("config", {})
-            theo = data.get("theoretical_stats", {})
-            
-            json_data.append({
-                "session_id": data.get("session_id"),
-                "theo_dps": theo.get("dps", 0),
-                "cape": config.get("back", ""),
-                "boots": config.get("feet", ""),
-                "ring": config.get("ring", "")
-            })
-            
+    for session in load_sessions(DATA_DIR):
+        config = session.config
+        theo = session.theoretical_stats
+        
+        json_data.append({
+            "session_id": session.session_id,
+            "theo_dps": theo.get("dps", 0),
+            "cape": config.get("back", ""),
+            "boots": config.get("feet", ""),
+            "ring": config.get("ring", "")
+        })
+        
     df_json = pd.DataFrame(json_data)
     
     # 3. Merge them together
@@ -1,12 +1,14 @@
 import os
 import shutil
-import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -15,12 +17,6 @@ OUTPUT_DIR = "../analytics_output"
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-def parse_iso_time(ts_str):
-    try:
-        return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-    except:
-        return None
-
 def main():
     print("--- Generating The Fatigue Chart ---")
     
@@ -30,28 +26,23 @@ def main():
     trip_data =[]
 
     # 1. Parse all JSON timelines
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            
-        t_start = parse_iso_time(data.get('start_time'))
-        t_end = parse_iso_time(data.get('end_time'))
+    for session in load_sessions(DATA_DIR):
+        t_start = session.start
+        t_end = session.end
         if not t_start or not t_end: continue
         
-        timeline = data.get('event_timeline',[])
+        timeline = session.events
         
         has_started_killing = False
         away_start = None
         
         for e in timeline:
-            e_time = parse_iso_time(e['timestamp'])
+            e_time = e.time
             if not e_time: continue
                 
-            e_type = e['type']
+            e_type = e.type
             if e_type == 'phase':
-                if "KILLING" in e['value']:
+                if "KILLING" in e.value:
                     has_started_killing = True
                     # If we were away, the trip just ended!
                     if away_start is not None:
@@ -67,7 +58,7 @@ def main():
                             })
                         away_start = None
                 
-                elif "AWAY" in e['value']:
+                elif "AWAY" in e.value:
                     # Only count AWAY phases if we actually reached the dragons first
                     if has_started_killing:
                         away_start = e_time
@@ -1,9 +1,11 @@
 import os
 import shutil
-import json
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -14,12 +16,6 @@ SESSIONS_PER_GROUP = 3       # How many lines to show per category
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-def parse_iso_time(ts_str):
-    try:
-        return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-    except:
-        return None
-
 def main():
     print("--- Generating Curated Session Heartbeat ---")
     
@@ -29,22 +25,17 @@ def main():
     raw_sessions =[]
 
     # 1. Parse all JSON timelines
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            
-        t_start = parse_iso_time(data.get('start_time'))
-        t_end = parse_iso_time(data.get('end_time'))
+    for session in load_sessions(DATA_DIR):
+        t_start = session.start
+        t_end = session.end
         if not t_start or not t_end: continue
         
         dur_mins = (t_end - t_start).total_seconds() / 60.0
-        if dur_mins < 10 or data.get('total_kills', 0) == 0:
+        if dur_mins < 10 or session.total_kills == 0:
             continue
             
-        bones_method = data.get('config', {}).get('bones', 'Unknown')
-        timeline = data.get('event_timeline', [])
+        bones_method = session.config.get('bones', 'Unknown')
+        timeline = session.events
         
         intervals = []
         kill_times =[]
@@ -53,13 +44,13 @@ def main():
         phase_start = t_start
         
         for e in timeline:
-            e_time = parse_iso_time(e['timestamp'])
+            e_time = e.time
             if not e_time: continue
                 
-            e_type = e['type']
+            e_type = e.type
             if e_type == 'phase':
                 intervals.append((phase_start, e_time, current_phase))
-                current_phase = "KILLING" if "KILLING" in e['value'] else "AWAY"
+                current_phase = "KILLING" if "KILLING" in e.value else "AWAY"
                 phase_start = e_time
             elif e_type == 'kill':
                 kill_times.append(e_time)
@@ -76,7 +67,7 @@ def main():
         min_kills =[(k - t_start).total_seconds() / 60.0 for k in kill_times]
         
         raw_sessions.append({
-            "id": data.get("session_id"),
+            "id": session.session_id,
             "duration": dur_mins,
             "bones_method": bones_method,
             "intervals": min_intervals,
@@ -1,12 +1,14 @@
 import os
 import shutil
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.colors import LinearSegmentedColormap
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -26,14 +28,11 @@ def main():
     
     # 1. Extract exact timestamps from JSONs
     time_data =[]
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            time_data.append({
-                "session_id": data.get("session_id"),
-                "start_time": pd.to_datetime(data.get("start_time"))
-            })
+    for session in load_sessions(DATA_DIR):
+        time_data.append({
+            "session_id": session.session_id,
+            "start_time": pd.to_datetime(session.start_time)
+        })
             
     df_times = pd.DataFrame(time_data)
     
@@ -1,12 +1,15 @@
 import os
 import shutil
-import json
 import csv
 import glob
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as path_effects
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from item_catalog import load_catalog
+from session_loader import load_sessions
 from datetime import datetime, timedelta
 
 # --- CONFIG ---
@@ -24,16 +27,7 @@ for d in [OUTPUT_DIR, SESSION_DIR]:
 
 def build_static_prices():
     """Builds the frozen economy dictionary."""
-    name_to_id = {}
-    fallback_alch = {}
-    if os.path.exists(ITEMS_CSV):
-        with open(ITEMS_CSV, 'r', encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                i_id = int(row['id'])
-                name = row['name'].strip().lower()
-                if name not in name_to_id or "note" not in name:
-                    name_to_id[name] = i_id
-                fallback_alch[name] = int(row['highalch']) if row.get('highalch') else 0
+    catalog = load_catalog(ITEMS_CSV)
 
     prices_by_id = {}
     files = glob.glob(os.path.join(PRICES_DIR, "prices_*.csv"))
@@ -53,9 +47,7 @@ def build_static_prices():
     def get_price(name):
         name_lower = str(name).lower().strip()
         if name_lower == 'coins': return 1
-        i_id = name_to_id.get(name_lower)
-        if i_id and i_id in prices_by_id: return prices_by_id[i_id]
-        return fallback_alch.get(name_lower, 0)
+        return catalog.price(name_lower, prices_by_id)
         
     return get_price
 
@@ -244,14 +236,10 @@ def main():
     # 2. GENERATE INDIVIDUAL SESSION WATERFALLS
     # ----------------------------------------------------
     session_count = 0
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            
-        s_id = data.get("session_id", filename.replace(".json", ""))
-        start_t = pd.to_datetime(data.get("start_time"))
-        end_t = pd.to_datetime(data.get("end_time", pd.Timestamp.now().isoformat()))
+    for session in load_sessions(DATA_DIR):
+        s_id = session.session_id
+        start_t = pd.to_datetime(session.start_time)
+        end_t = pd.to_datetime(session.end_time or pd.Timestamp.now().isoformat())
         
         # Filter GPPH data exactly to this session (2 min buffer)
         mask = (df['local_start_time'] >= start_t - timedelta(minutes=2)) & \
@@ -1,12 +1,14 @@
 import os
 import shutil
-import json
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 NORMALIZED_CSV = "../normalized_sessions.csv"
@@ -27,18 +29,15 @@ def main():
     
     # 2. Extract Theoretical Stats from JSONs
     json_data =[]
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            theo = data.get("theoretical_stats", {})
-            
-            json_data.append({
-                "session_id": data.get("session_id"),
-                "max_hit": theo.get("max_hit", 0),
-                "theo_ttk": theo.get("ttk", 0)
-            })
-            
+    for session in load_sessions(DATA_DIR):
+        theo = session.theoretical_stats
+        
+        json_data.append({
+            "session_id": session.session_id,
+            "max_hit": theo.get("max_hit", 0),
+            "theo_ttk": theo.get("ttk", 0)
+        })
+        
     df_json = pd.DataFrame(json_data)
     
     # 3. Merge and Filter
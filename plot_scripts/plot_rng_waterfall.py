@@ -1,12 +1,15 @@
 import os
 import shutil
-import json
 import csv
 import glob
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import matplotlib.patheffects as path_effects
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from item_catalog import load_catalog
+from session_loader import load_sessions
 from datetime import datetime
 
 # --- CONFIG ---
@@ -98,19 +101,8 @@ DROP_TABLE = {
 
 def build_static_prices():
     """Reads items.csv, then rolls forward through snapshot files to find missing GE prices."""
-    name_to_id = {}
-    fallback_alch = {}
-    
-    # 1. Load Dictionary
-    if os.path.exists(ITEMS_CSV):
-        with open(ITEMS_CSV, 'r', encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                i_id = int(row['id'])
-                name = row['name'].strip().lower()
-                # Ignore noted versions to ensure we grab the base item ID
-                if name not in name_to_id or "note" not in name:
-                    name_to_id[name] = i_id
-                fallback_alch[name] = int(row['highalch']) if row.get('highalch') else 0
+    # 1. Names, IDs and high-alch fallbacks come from the shared catalog
+    catalog = load_catalog(ITEMS_CSV)
                 
     # 2. Get target files at or after Anchor Date
     prices_by_id = {}
@@ -145,12 +137,8 @@ def build_static_prices():
         name_lower = item.lower()
         if name_lower == 'coins': continue
         
-        i_id = name_to_id.get(name_lower)
-        if i_id and i_id in prices_by_id:
-            final_prices[name_lower] = prices_by_id[i_id]
-        else:
-            # Fallback for untradeables (Ancient shard, Totem pieces) or missing items
-            final_prices[name_lower] = fallback_alch.get(name_lower, 0)
+        # Falls back to high alch for untradeables (Ancient shard, Totem pieces) or missing items
+        final_prices[name_lower] = catalog.price(name_lower, prices_by_id)
             
     return final_prices
 
@@ -162,14 +150,11 @@ def main():
     actual_loot = {}
 
     # 1. Aggregate All Data
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            total_kills += data.get("total_kills", 0)
-            
-            for item, qty in data.get("loot_summary", {}).items():
-                actual_loot[item] = actual_loot.get(item, 0) + qty
+    for session in load_sessions(DATA_DIR):
+        total_kills += session.total_kills
+        
+        for item, qty in session.loot.items():
+            actual_loot[item] = actual_loot.get(item, 0) + qty
 
     if total_kills == 0:
         return print("No kills found in dataset. Aborting.")
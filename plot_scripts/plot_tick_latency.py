@@ -25,15 +25,15 @@ def main():
     # 1. Fetch Telemetry Data
     conn = sqlite3.connect(DB_PATH)
     # Order strictly by session and time to calculate accurate time deltas
-    df_hits = pd.read_sql_query("SELECT session_id, timestamp, dragon_hp_before FROM hitsplats ORDER BY session_id, timestamp", conn)
+    df_hits = pd.read_sql_query("SELECT session_id, ts_ms, dragon_hp_before FROM hitsplats ORDER BY session_id, ts_ms", conn)
     conn.close()
 
     if df_hits.empty or len(df_hits) < 100:
         return print("Not enough telemetry data for tick analysis.")
 
     # 2. Calculate the exact time between shots (Delta T)
-    df_hits['timestamp'] = pd.to_datetime(df_hits['timestamp'])
-    df_hits['delta_s'] = df_hits.groupby('session_id')['timestamp'].diff().dt.total_seconds()
+    # ts_ms is integer epoch milliseconds, so this is a plain integer diff
+    df_hits['delta_s'] = df_hits.groupby('session_id')['ts_ms'].diff() / 1000.0
 
     # FILTERING: We only want to look at back-to-back attacks ON THE SAME DRAGON.
     # If the dragon_hp_before is near 315, it's a new dragon, meaning the time gap includes running/looting.
@@ -1,12 +1,14 @@
 import os
 import shutil
-import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import gaussian_kde
 import matplotlib.patheffects as path_effects
 from datetime import datetime
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from session_loader import load_sessions
 
 # --- CONFIG ---
 DATA_DIR = "../bbd_data"
@@ -15,12 +17,6 @@ OUTPUT_DIR = "../analytics_output"
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
-def parse_iso_time(ts_str):
-    try:
-        return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-    except:
-        return None
-
 def main():
     print("--- Generating Advanced TTK KDE Chart ---")
     
@@ -30,30 +26,25 @@ def main():
     ttk_data =[]
 
     # 1. Parse JSONs for exact kill deltas
-    for filename in os.listdir(DATA_DIR):
-        if not filename.endswith(".json"): continue
-        
-        with open(os.path.join(DATA_DIR, filename), 'r') as f:
-            data = json.load(f)
-            
-        timeline = data.get('event_timeline',[])
+    for session in load_sessions(DATA_DIR):
+        timeline = session.events
         
         in_killing_phase = False
         last_event_time = None
         
         for e in timeline:
-            e_time = parse_iso_time(e['timestamp'])
+            e_time = e.time
             if not e_time: continue
                 
-            if e['type'] == 'phase':
-                if "KILLING" in e['value']:
+            if e.type == 'phase':
+                if "KILLING" in e.value:
                     in_killing_phase = True
                     last_event_time = e_time
                 else:
                     in_killing_phase = False
                     last_event_time = None
                     
-            elif e['type'] == 'kill':
+            elif e.type == 'kill':
                 if in_killing_phase and last_event_time is not None:
                     ttk = (e_time - last_event_time).total_seconds()
                     
@@ -0,0 +1,133 @@
+"""
+TELEMETRY REPLAYER
+==================
+
+Plays a capture file (see capture.py, `bbd_tracker.py --capture`) back against
+a running tracker, the same way mock_udp_economy.py fakes the plugin, but with
+the exact bytes and timing of a real session.
+
+  * UDP datagrams are sent from the scheduler thread at their recorded offset.
+  * HTTP bodies are POSTed to their recorded path by a sender thread over one
+    keep-alive connection (like OkHttp in RuneLite), so a slow handler delays
+    HTTP but never the UDP timeline. Recorded order is kept per channel.
+
+Speed: 1 = real time, 10 = ten times faster, 0 = as fast as possible.
+
+At the end it reports how far the scheduler fell behind, HTTP status counts
+and latency, so ingestion throughput and end-of-session persistence can be
+compared between builds from the same capture.
+
+USAGE:
+  > python replay_capture.py session.bbdcap
+  > python replay_capture.py session.bbdcap --speed 10
+  > python replay_capture.py session.bbdcap --speed 0 --channels udp
+"""
+
+import argparse
+import http.client
+import queue
+import socket
+import statistics
+import threading
+import time
+
+from capture import read_capture, CH_HTTP, CH_UDP
+
+HOST = '127.0.0.1'
+HTTP_PORT = 5000
+UDP_PORT = 5005
+
+
+def http_sender(jobs, host, port, stats):
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        path, body = job
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            stats["status"][resp.status] = stats["status"].get(resp.status, 0) + 1
+        except (OSError, http.client.HTTPException) as e:
+            stats["errors"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            if stats["errors"] <= 3:
+                print(f"[HTTP Error] {path}: {e}")
+            continue
+        stats["latency_ms"].append((time.perf_counter() - t0) * 1000)
+    conn.close()
+
+
+def replay(path, speed=1.0, host=HOST, http_port=HTTP_PORT, udp_port=UDP_PORT, channels=("http", "udp"), limit=None):
+    records = list(read_capture(path))
+    if limit:
+        records = records[:limit]
+    if not records:
+        print("[REPLAY] Capture is empty.")
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    jobs = queue.Queue()
+    stats = {"status": {}, "errors": 0, "latency_ms": []}
+    sender = threading.Thread(target=http_sender, args=(jobs, host, http_port, stats), daemon=True)
+    sender.start()
+
+    sent = {CH_HTTP: 0, CH_UDP: 0}
+    max_lag = 0.0
+    t_first = records[0][0]
+    print(f"[REPLAY] {len(records)} records spanning {records[-1][0] - t_first:.1f}s at "
+          f"{'max' if not speed else f'{speed:g}x'} speed")
+
+    start = time.perf_counter()
+    for t, channel, route, body in records:
+        if speed:
+            due = start + (t - t_first) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+
+        if channel == CH_UDP and "udp" in channels:
+            sock.sendto(body, (host, udp_port))
+            sent[CH_UDP] += 1
+        elif channel == CH_HTTP and "http" in channels:
+            jobs.put((route, body))
+            sent[CH_HTTP] += 1
+
+    jobs.put(None)
+    sender.join()
+    elapsed = time.perf_counter() - start
+
+    span = records[-1][0] - t_first
+    print(f"[REPLAY] Sent {sent[CH_HTTP]} HTTP + {sent[CH_UDP]} UDP in {elapsed:.2f}s "
+          f"(effective {span / elapsed if elapsed else 0:.1f}x, max scheduler lag {max_lag * 1000:.1f}ms)")
+    lat = sorted(stats["latency_ms"])
+    if lat:
+        print(f"[REPLAY] HTTP status {stats['status']} errors {stats['errors']} | "
+              f"p50 {statistics.median(lat):.2f}ms  p99 {lat[int(len(lat) * 0.99)]:.2f}ms  max {lat[-1]:.2f}ms")
+    elif stats["errors"]:
+        print(f"[REPLAY] HTTP errors {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a BBD telemetry capture against the tracker")
+    parser.add_argument('capture', help="Capture file written by bbd_tracker.py --capture")
+    parser.add_argument('--speed', type=float, default=1.0, help="Playback speed multiplier (0 = as fast as possible)")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--http-port', type=int, default=HTTP_PORT)
+    parser.add_argument('--udp-port', type=int, default=UDP_PORT)
+    parser.add_argument('--channels', default="http,udp", help="Comma-separated subset of http,udp")
+    parser.add_argument('--limit', type=int, help="Only replay the first N records")
+    args = parser.parse_args()
+
+    replay(args.capture, speed=args.speed, host=args.host, http_port=args.http_port, udp_port=args.udp_port,
+           channels=tuple(args.channels.split(",")), limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
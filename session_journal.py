@@ -0,0 +1,128 @@
+"""
+SESSION JOURNAL
+===============
+
+Append-only write-ahead log for the live session document.
+
+Instead of rewriting bbd_data/<session_id>.json every few seconds, the tracker
+appends one small JSON line per change to bbd_data/<session_id>.journal:
+
+  start     session_id, start_time, tape sidecar name
+  config    gear config + theoretical stats (only when they change)
+  event     one event_timeline entry
+  loot      item, qty (one per add_loot)
+  kill      kill counter +1
+  counters  total_attacks / active_seconds / ticks_received checkpoint
+  udp_loss  tick loss block (see tick_loss.py), only when it changes
+  tape      a tape chunk was spilled to the sidecar (rows so far)
+  end       final net profit
+
+Every COMPACT_SEC (and at session end) the journal is compacted into the
+regular session JSON with an atomic replace, so readers keep seeing the same
+document format. The journal is deleted once the final document is written;
+a journal still on disk at startup therefore means the tracker crashed, and
+replay() rebuilds the session state from it.
+"""
+
+import datetime
+import json
+import os
+import time
+
+JOURNAL_EXT = ".journal"
+COMPACT_SEC = 60          # Full JSON rewrite at most this often during a session
+RESUME_WINDOW_SEC = 900   # Crashed sessions younger than this are resumed, older ones finalized
+
+
+class SessionJournal:
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def append(self, kind, **fields):
+        fields["t"] = kind
+        fields["ts"] = time.time()
+        self.file.write(json.dumps(fields, separators=(",", ":")) + "\n")
+        # Flush to the OS on every record: survives a process crash without an fsync per event
+        self.file.flush()
+
+    def close(self, delete=False):
+        if not self.file.closed:
+            self.file.close()
+        if delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def journal_path(data_dir, session_id):
+    return os.path.join(data_dir, f"{session_id}{JOURNAL_EXT}")
+
+
+def find_journals(data_dir):
+    return sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(JOURNAL_EXT))
+
+
+def replay(path):
+    """
+    Rebuilds the session document from a journal. Returns (document, last_record_ts).
+    A torn final line (crash mid-write) is ignored.
+    """
+    doc = {
+        "session_id": os.path.basename(path)[:-len(JOURNAL_EXT)],
+        "start_time": None,
+        "end_time": None,
+        "total_kills": 0,
+        "total_attacks": 0,
+        "active_seconds": 0.0,
+        "config": {},
+        "theoretical_stats": {},
+        "loot_summary": {},
+        "event_timeline": [],
+    }
+    last_ts = None
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            kind = rec.get("t")
+            last_ts = rec.get("ts", last_ts)
+
+            if kind == "start":
+                doc["session_id"] = rec["session_id"]
+                doc["start_time"] = rec["start_time"]
+                if rec.get("sidecar"):
+                    doc["game_tape_sidecar"] = rec["sidecar"]
+            elif kind == "config":
+                doc["config"] = rec.get("config", {})
+                doc["theoretical_stats"] = rec.get("theoretical_stats", {})
+            elif kind == "event":
+                doc["event_timeline"].append({"timestamp": rec["timestamp"], "type": rec["type"], "value": rec["value"]})
+            elif kind == "loot":
+                loot = doc["loot_summary"]
+                loot[rec["item"]] = loot.get(rec["item"], 0) + rec["qty"]
+            elif kind == "kill":
+                doc["total_kills"] += 1
+            elif kind == "counters":
+                doc["total_attacks"] = rec.get("total_attacks", doc["total_attacks"])
+                doc["active_seconds"] = rec.get("active_seconds", doc["active_seconds"])
+                if "ticks_received" in rec:
+                    doc.setdefault("udp_loss", {})["ticks_received"] = rec["ticks_received"]
+            elif kind == "udp_loss":
+                loss = doc.setdefault("udp_loss", {})
+                loss.update({k: v for k, v in rec.items() if k not in ("t", "ts")})
+            elif kind == "end":
+                doc["loot_summary"]["_final_net_profit"] = rec.get("final_net_profit", 0)
+
+    if last_ts is not None:
+        doc["end_time"] = datetime.datetime.fromtimestamp(last_ts).isoformat()
+    return doc, last_ts
+
+
+def write_document(path, doc):
+    """Atomically replaces the session JSON so readers never see a half-written file."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(doc, f, indent=4)
+    os.replace(tmp, path)
@@ -0,0 +1,211 @@
+"""
+SESSION LOADER
+==============
+
+One shared way to read every session document in bbd_data/ into compact,
+typed Session objects.
+
+  load_sessions(data_dir)   -> [Session, ...] oldest first
+  Session                   session_id, start / end (datetime), start_ms / end_ms,
+                            total_kills, total_attacks, active_seconds, config,
+                            theoretical_stats, loot (no bookkeeping keys),
+                            final_net_profit, events, extra (any other top-level keys)
+  Event                     ts_ms, type, value; .time is the local datetime
+
+Parsed documents are cached in sessions.cache inside each data folder
+(marshal, like items.catalog), so separate folders never evict each other.
+There is one entry per file, keyed on its path, mtime and size. A warm load
+only stats the directory and unmarshals the cache; new or changed files are
+re-parsed and written back, deleted ones dropped. Cold loads of large
+histories parse in a process pool.
+
+game_tape is skipped (it is by far the largest key and nothing that loads
+whole histories reads it); use session_store.load_session() or the JSON for
+it. Scripts that rewrite documents (patch_*, backfill_cdps) still read the
+raw JSON.
+
+USAGE:
+  > python session_loader.py          # load bbd_data, print timings
+  > python session_loader.py --cold   # ignore the cache
+"""
+
+import argparse
+import json
+import marshal
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from telemetry_schema import iso_to_ms
+
+DATA_DIR = "bbd_data"
+CACHE_FILE = "sessions.cache"
+CACHE_VERSION = 1
+POOL_MIN_FILES = 64   # Below this a pool costs more to start than it saves
+SKIPPED_KEYS = ("game_tape",)
+FINAL_PROFIT_KEY = "_final_net_profit"
+
+_MEMO = {}
+
+
+class Event:
+    __slots__ = ("ts_ms", "type", "value")
+
+    def __init__(self, ts_ms, type_, value):
+        self.ts_ms = ts_ms
+        self.type = type_
+        self.value = value
+
+    @property
+    def time(self):
+        return datetime.fromtimestamp(self.ts_ms / 1000) if self.ts_ms is not None else None
+
+    def __repr__(self):
+        return f"Event({self.ts_ms}, {self.type!r}, {self.value!r})"
+
+
+class Session:
+    __slots__ = ("session_id", "path", "start_time", "end_time", "start_ms", "end_ms", "total_kills", "total_attacks",
+                 "active_seconds", "config", "theoretical_stats", "loot", "final_net_profit", "events", "extra")
+
+    def __init__(self, path, record):
+        (self.session_id, self.start_time, self.end_time, self.total_kills, self.total_attacks, self.active_seconds,
+         self.config, self.theoretical_stats, self.loot, self.final_net_profit, ts, types, values, self.extra) = record
+        self.path = path
+        self.start_ms = iso_to_ms(self.start_time)
+        self.end_ms = iso_to_ms(self.end_time)
+        self.events = [Event(*e) for e in zip(ts, types, values)]
+
+    @property
+    def start(self):
+        return datetime.fromisoformat(self.start_time) if self.start_time else None
+
+    @property
+    def end(self):
+        return datetime.fromisoformat(self.end_time) if self.end_time else None
+
+    @property
+    def duration_sec(self):
+        if self.start_ms is None or self.end_ms is None:
+            return 0.0
+        return (self.end_ms - self.start_ms) / 1000.0
+
+    @property
+    def experiment_name(self):
+        return self.config.get("experiment_name")
+
+    def events_of(self, *types):
+        return [e for e in self.events if e.type in types]
+
+    def __repr__(self):
+        return f"Session({self.session_id!r}, {self.total_kills} kills, {len(self.events)} events)"
+
+
+# --- PARSING ---
+def parse_file(path):
+    """One JSON document -> marshal-able record tuple, or None if it isn't a session."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[LOADER] Skipping unreadable {path}: {e}")
+        return None
+    if isinstance(doc, list) and len(doc) == 1:   # a few early documents were saved wrapped in a list
+        doc = doc[0]
+    if not isinstance(doc, dict) or not doc.get("session_id"):
+        return None
+
+    loot = dict(doc.get("loot_summary") or {})
+    final_profit = loot.pop(FINAL_PROFIT_KEY, None)
+    timeline = doc.get("event_timeline") or []
+    known = ("session_id", "start_time", "end_time", "total_kills", "total_attacks", "active_seconds", "config",
+             "theoretical_stats", "loot_summary", "event_timeline") + SKIPPED_KEYS
+    return (doc["session_id"], doc.get("start_time"), doc.get("end_time"), doc.get("total_kills", 0),
+            doc.get("total_attacks"), doc.get("active_seconds", 0), doc.get("config") or {},
+            doc.get("theoretical_stats") or {}, loot, final_profit,
+            [iso_to_ms(e.get("timestamp")) for e in timeline], [e.get("type") for e in timeline],
+            [e.get("value") for e in timeline], {k: v for k, v in doc.items() if k not in known})
+
+
+def _parse_many(paths, workers):
+    if workers != 0 and len(paths) >= POOL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parse_file, paths, chunksize=16))
+    return [parse_file(p) for p in paths]
+
+
+# --- CACHE ---
+def _read_cache(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "rb") as f:
+            cached = marshal.loads(f.read())
+        if cached[0] == CACHE_VERSION:
+            return cached[1]
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        pass
+    return {}
+
+
+def _write_cache(path, entries):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps((CACHE_VERSION, entries)))
+        os.replace(tmp, path)
+    except (OSError, ValueError) as e:
+        print(f"[LOADER] Could not write {path}: {e}")
+
+
+def load_sessions(data_dir=DATA_DIR, use_cache=True, workers=None):
+    """Every session document in data_dir, oldest first. workers=0 never starts a pool."""
+    if not os.path.isdir(data_dir):
+        return []
+    key = os.path.abspath(data_dir)
+    cache_path = os.path.join(key, CACHE_FILE)
+    stats = {}
+    with os.scandir(key) as it:
+        for entry in it:
+            if entry.name.endswith(".json") and entry.is_file():
+                st = entry.stat()
+                stats[entry.path] = (st.st_mtime_ns, st.st_size)
+
+    memo = _MEMO.get(key)
+    if memo and memo[0] == stats:
+        return memo[1]
+
+    entries = _read_cache(cache_path) if use_cache else {}
+    stale = [p for p, sig in stats.items() if p not in entries or tuple(entries[p][:2]) != sig]
+    for path, record in zip(stale, _parse_many(stale, workers)):
+        entries[path] = (*stats[path], record)
+    dropped = [p for p in entries if p not in stats]
+    for path in dropped:
+        del entries[path]
+    if use_cache and (stale or dropped):
+        _write_cache(cache_path, entries)
+
+    sessions = [Session(path, entry[2]) for path, entry in entries.items() if entry[2] is not None]
+    sessions.sort(key=lambda s: (s.start_ms is None, s.start_ms or 0))
+    _MEMO[key] = (stats, sessions)
+    return sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load bbd_data session documents through the parse cache")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--cold', action='store_true', help="Ignore (and don't write) the cache")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size (0 = parse in this process)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sessions = load_sessions(args.data_dir, use_cache=not args.cold, workers=args.workers)
+    elapsed = (time.perf_counter() - start) * 1000
+    events = sum(len(s.events) for s in sessions)
+    print(f"[LOADER] {len(sessions)} sessions, {events:,} events in {elapsed:.1f}ms "
+          f"({'cold' if args.cold else 'cache'})")
+
+
+if __name__ == "__main__":
+    main()
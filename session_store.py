@@ -0,0 +1,324 @@
+"""
+SESSION STORE
+=============
+
+bbd_sessions.db: the session documents from bbd_data/session_*.json in
+normalized, indexed SQLite tables, so readers can query sessions instead of
+parsing the whole directory.
+
+  sessions        one row per session: times (ISO and epoch ms), counters,
+                  final net profit, experiment name / mode, theoretical stats
+                  and any other top-level keys as JSON, finished flag
+  session_config  (session_id, key) -> JSON value
+  session_loot    (session_id, item) -> qty
+  session_events  (session_id, seq) -> ts_ms, timestamp, type, value
+  session_tapes   zlib-compressed game_tape JSON, kept apart so summary
+                  queries never page it in
+
+The tracker writes each session here when it is saved for the last time
+(and when a crashed session is finalized from its journal). The JSON files
+stay the crash-recovery format and the compatibility export.
+
+import_json() folds bbd_data/*.json into the store, re-importing a file only
+when its mtime or size changed (so edits by the patch_* / backfill_* scripts
+are picked up); open_store() does this before handing out a connection, so
+readers always see the directory's current contents. export_json() writes
+the documents back out in the tracker's JSON layout.
+
+USAGE:
+  > python session_store.py import [--force]
+  > python session_store.py export --out exported_sessions
+  > python session_store.py stats
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from session_journal import JOURNAL_EXT, write_document
+from telemetry_schema import iso_to_ms, run_migrations
+
+# --- CONFIG ---
+DB_FILE = "bbd_sessions.db"
+DATA_DIR = "bbd_data"
+BUSY_TIMEOUT_SEC = 10   # The tracker, the overlay and pipeline scripts may all write
+
+# Top-level document keys with a column of their own; anything else goes to extra_json
+SESSION_KEYS = ("session_id", "start_time", "end_time", "total_kills", "total_attacks", "active_seconds",
+                "config", "theoretical_stats", "loot_summary", "event_timeline", "game_tape")
+FINAL_PROFIT_KEY = "_final_net_profit"
+
+MIGRATIONS = [
+    (1, "normalized session tables", [
+        '''CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY, start_time TEXT, end_time TEXT, start_ms INTEGER, end_ms INTEGER,
+            total_kills INTEGER, total_attacks INTEGER, active_seconds REAL, final_net_profit INTEGER,
+            experiment_name TEXT, mode TEXT, theoretical_json TEXT, extra_json TEXT,
+            finished INTEGER, source_mtime_ns INTEGER, source_size INTEGER)''',
+        '''CREATE TABLE IF NOT EXISTS session_config (
+            session_id TEXT, key TEXT, value TEXT, PRIMARY KEY (session_id, key)) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS session_loot (
+            session_id TEXT, item TEXT, qty INTEGER, PRIMARY KEY (session_id, item)) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS session_events (
+            session_id TEXT, seq INTEGER, ts_ms INTEGER, timestamp TEXT, type TEXT, value,
+            PRIMARY KEY (session_id, seq)) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS session_tapes (
+            session_id TEXT PRIMARY KEY, tape BLOB) WITHOUT ROWID''',
+        # Date-range listings, per-experiment history, "every phase / kill event", loot by item
+        "CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions (start_ms)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_experiment ON sessions (experiment_name, start_ms)",
+        "CREATE INDEX IF NOT EXISTS idx_events_type ON session_events (type, session_id, ts_ms, value)",
+        "CREATE INDEX IF NOT EXISTS idx_loot_item ON session_loot (item, session_id, qty)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def connect(db_path=DB_FILE):
+    """Migrated connection with a busy timeout (the store is WAL, see telemetry_schema.run_migrations)."""
+    run_migrations(db_path, MIGRATIONS, quiet=True)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SEC)
+    return conn
+
+
+def open_store(db_path=DB_FILE, data_dir=DATA_DIR):
+    """connect() after syncing any new or changed JSON documents from data_dir."""
+    conn = connect(db_path)
+    if os.path.isdir(data_dir):
+        import_json(conn, data_dir, quiet=True)
+    return conn
+
+
+# --- WRITES ---
+def save_session(conn, doc, finished=True, source=None):
+    """Replaces one session (all tables) with `doc`, in one transaction. source = (mtime_ns, size) of its JSON."""
+    sid = doc["session_id"]
+    loot = dict(doc.get("loot_summary") or {})
+    final_profit = loot.pop(FINAL_PROFIT_KEY, None)
+    config = doc.get("config") or {}
+    extra = {k: v for k, v in doc.items() if k not in SESSION_KEYS}
+    mtime_ns, size = source or (None, None)
+
+    with conn:
+        for table in ("session_config", "session_loot", "session_events", "session_tapes"):
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (sid,))
+        conn.execute("""INSERT OR REPLACE INTO sessions (session_id, start_time, end_time, start_ms, end_ms, total_kills,
+                            total_attacks, active_seconds, final_net_profit, experiment_name, mode, theoretical_json,
+                            extra_json, finished, source_mtime_ns, source_size)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                     (sid, doc.get("start_time"), doc.get("end_time"), iso_to_ms(doc.get("start_time")),
+                      iso_to_ms(doc.get("end_time")), doc.get("total_kills"), doc.get("total_attacks"),
+                      doc.get("active_seconds"), final_profit, config.get("experiment_name"), config.get("mode"),
+                      json.dumps(doc.get("theoretical_stats") or {}), json.dumps(extra) if extra else None,
+                      int(finished), mtime_ns, size))
+        conn.executemany("INSERT INTO session_config (session_id, key, value) VALUES (?, ?, ?)",
+                         [(sid, k, json.dumps(v)) for k, v in config.items()])
+        conn.executemany("INSERT INTO session_loot (session_id, item, qty) VALUES (?, ?, ?)",
+                         [(sid, item, qty) for item, qty in loot.items()])
+        conn.executemany("INSERT INTO session_events (session_id, seq, ts_ms, timestamp, type, value) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(sid, i, iso_to_ms(e.get("timestamp")), e.get("timestamp"), e.get("type"), e.get("value"))
+                          for i, e in enumerate(doc.get("event_timeline") or [])])
+        if doc.get("game_tape") is not None:
+            conn.execute("INSERT INTO session_tapes (session_id, tape) VALUES (?, ?)",
+                         (sid, zlib.compress(json.dumps(doc["game_tape"]).encode(), 6)))
+
+
+def delete_session(conn, session_id):
+    with conn:
+        for table in ("sessions", "session_config", "session_loot", "session_events", "session_tapes"):
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+
+# --- READS ---
+_SUMMARY_COLUMNS = ("session_id", "start_time", "end_time", "start_ms", "end_ms", "total_kills", "total_attacks",
+                    "active_seconds", "final_net_profit", "experiment_name", "mode", "theoretical_json", "finished")
+
+
+def list_sessions(conn, since_ms=None, until_ms=None, experiment=None, min_kills=None, finished=None):
+    """Summary dicts (no config / loot / events), oldest first; theoretical_json is decoded to theoretical_stats."""
+    where, params = [], []
+    for clause, value in (("start_ms >= ?", since_ms), ("start_ms <= ?", until_ms), ("experiment_name = ?", experiment),
+                          ("total_kills >= ?", min_kills), ("finished = ?", None if finished is None else int(finished))):
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    sql = f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM sessions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    out = []
+    for row in conn.execute(sql + " ORDER BY start_ms", params):
+        summary = dict(zip(_SUMMARY_COLUMNS, row))
+        summary["theoretical_stats"] = json.loads(summary.pop("theoretical_json") or "{}")
+        out.append(summary)
+    return out
+
+
+def load_config(conn, session_id=None):
+    """{session_id: config dict} for every session (or one)."""
+    where, params = ("WHERE session_id = ?", (session_id,)) if session_id else ("", ())
+    out = {}
+    for sid, key, value in conn.execute(f"SELECT session_id, key, value FROM session_config {where}", params):
+        out.setdefault(sid, {})[key] = json.loads(value)
+    return out
+
+
+def load_loot(conn, session_id=None):
+    """{session_id: {item: qty}} for every session (or one)."""
+    where, params = ("WHERE session_id = ?", (session_id,)) if session_id else ("", ())
+    out = {}
+    for sid, item, qty in conn.execute(f"SELECT session_id, item, qty FROM session_loot {where}", params):
+        out.setdefault(sid, {})[item] = qty
+    return out
+
+
+def load_events(conn, session_id=None, types=None):
+    """{session_id: [(ts_ms, timestamp, type, value), ...]} in timeline order, optionally only some event types."""
+    where, params = [], []
+    if types:
+        where.append(f"type IN ({', '.join('?' * len(types))})")
+        params.extend(types)
+    if session_id:
+        where.append("session_id = ?")
+        params.append(session_id)
+    sql = "SELECT session_id, ts_ms, timestamp, type, value FROM session_events"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    out = {}
+    for sid, ts_ms, ts, type_, value in conn.execute(sql + " ORDER BY session_id, seq", params):
+        out.setdefault(sid, []).append((ts_ms, ts, type_, value))
+    return out
+
+
+def bank_trips(events):
+    """(seconds away from the dragons, completed trips) from one session's phase events."""
+    bank_ms, trips, away_ms = 0, 0, None
+    for ts_ms, _, type_, value in events:
+        if type_ != "phase" or ts_ms is None:
+            continue
+        if "AWAY" in value:
+            away_ms = ts_ms
+        elif "KILLING" in value and away_ms is not None:
+            bank_ms += ts_ms - away_ms
+            trips += 1
+            away_ms = None
+    return bank_ms / 1000.0, trips
+
+
+def load_session(conn, session_id, include_tape=True):
+    """One session in the tracker's JSON layout, or None."""
+    row = conn.execute("""SELECT start_time, end_time, total_kills, total_attacks, active_seconds, final_net_profit,
+                                 theoretical_json, extra_json FROM sessions WHERE session_id = ?""", (session_id,)).fetchone()
+    if row is None:
+        return None
+    start, end, kills, attacks, active, final_profit, theo, extra = row
+    loot = load_loot(conn, session_id).get(session_id, {})
+    if final_profit is not None:
+        loot[FINAL_PROFIT_KEY] = final_profit
+    doc = {
+        "session_id": session_id,
+        "start_time": start,
+        "end_time": end,
+        "total_kills": kills,
+        "total_attacks": attacks,
+        "active_seconds": active,
+        "config": load_config(conn, session_id).get(session_id, {}),
+        "theoretical_stats": json.loads(theo or "{}"),
+        "loot_summary": loot,
+        "event_timeline": [{"timestamp": ts, "type": type_, "value": value}
+                           for _, ts, type_, value in load_events(conn, session_id).get(session_id, [])],
+    }
+    doc.update(json.loads(extra) if extra else {})
+    if include_tape:
+        tape = conn.execute("SELECT tape FROM session_tapes WHERE session_id = ?", (session_id,)).fetchone()
+        if tape:
+            doc["game_tape"] = json.loads(zlib.decompress(tape[0]))
+    return doc
+
+
+# --- JSON IMPORT / EXPORT ---
+def _unwrap(doc):
+    # A few early documents were saved wrapped in a one-element list
+    return doc[0] if isinstance(doc, list) and len(doc) == 1 else doc
+
+
+def import_json(conn, data_dir=DATA_DIR, force=False, quiet=False):
+    """Imports new or changed bbd_data/*.json documents and drops every row whose source file is gone.
+    Only rows saved without a source (source_mtime_ns IS NULL) are kept; tracker_core always passes
+    the JSON's stat, so its rows are pruned too. Returns the number (re)imported."""
+    known = {sid: (mtime, size) for sid, mtime, size in
+             conn.execute("SELECT session_id, source_mtime_ns, source_size FROM sessions")}
+    start = time.perf_counter()
+    imported = 0
+    present = set()
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(data_dir, name)
+        st = os.stat(path)
+        source = (st.st_mtime_ns, st.st_size)
+        # Documents are named after their session
+        sid = name[:-len(".json")]
+        present.add(sid)
+        if not force and known.get(sid) == source:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                doc = _unwrap(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"[STORE] Skipping unreadable {path}: {e}")
+            continue
+        if not isinstance(doc, dict) or not doc.get("session_id"):
+            continue
+        present.add(doc["session_id"])
+        live = os.path.exists(os.path.join(data_dir, doc["session_id"] + JOURNAL_EXT))
+        save_session(conn, doc, finished=not live, source=source)
+        imported += 1
+
+    removed = [sid for sid, (mtime, _) in known.items() if mtime is not None and sid not in present]
+    for sid in removed:
+        delete_session(conn, sid)
+    if (imported or removed) and not quiet:
+        print(f"[STORE] Imported {imported} session document(s), removed {len(removed)} deleted one(s) "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return imported
+
+
+def export_json(conn, out_dir, session_ids=None):
+    """Writes each session back out as <out_dir>/<session_id>.json. Returns the number written."""
+    os.makedirs(out_dir, exist_ok=True)
+    if session_ids is None:
+        session_ids = [r[0] for r in conn.execute("SELECT session_id FROM sessions ORDER BY start_ms")]
+    for sid in session_ids:
+        write_document(os.path.join(out_dir, f"{sid}.json"), load_session(conn, sid))
+    return len(session_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalized SQLite store for BBD session documents")
+    parser.add_argument('action', choices=["import", "export", "stats"])
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--out', default="exported_sessions", help="Export destination")
+    parser.add_argument('--force', action='store_true', help="Re-import every document")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.action == "import":
+            n = import_json(conn, args.data_dir, force=args.force, quiet=True)
+            print(f"[STORE] Imported {n} document(s) into {args.db}")
+        elif args.action == "export":
+            n = export_json(conn, args.out)
+            print(f"[STORE] Exported {n} session(s) to {args.out}")
+        for table in ("sessions", "session_config", "session_loot", "session_events", "session_tapes"):
+            print(f"  {table:<16} {conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]:>8,} rows")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
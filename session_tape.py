@@ -0,0 +1,259 @@
+"""
+SESSION TAPE
+============
+
+Columnar, array-backed replacement for the old {tick: {"state", "gp"}} dict.
+
+Each tick is one row across three parallel typed arrays (tick number, state
+code, gp delta), so appends are O(1) and a row costs 17 bytes instead of two
+boxed dicts. Only the open window (ticks that can still receive a late state
+or gp update) lives in RAM:
+
+  * A tick becomes *closed* once it is `commit_lag` ticks behind the newest
+    heartbeat. Closed ticks are streamed to combat_ticks / profit_deltas
+    through the TelemetryWriter.
+  * Every `chunk_ticks` closed ticks are spilled as one binary chunk to a
+    sidecar file (bbd_data/<session_id>.tape) and dropped from memory.
+  * A tick outside the open window and more than `reset_window` ticks behind
+    the newest heartbeat is a plugin restart (its counter starts over at 0),
+    the same rule TickLoss uses: the open window is closed and spilled and
+    the horizon restarts at the new tick. Ticks the optional `was_lost`
+    callable (TickLoss.was_lost) reports as lost are late arrivals, not
+    restarts, exactly as TickLoss counts them.
+
+read_tape() / SessionTape.to_numpy() rebuild the whole session as NumPy
+arrays for analytics; to_dict() re-inflates the legacy JSON layout for the
+final session document.
+
+Sidecar layout: b"BBDTAPE1" magic, then repeated chunks of
+  <u32 n_rows><u32 names_len> names_json  i8[n] ticks  i1[n] states  i8[n] gp
+"""
+
+import json
+import os
+import struct
+from array import array
+
+import numpy as np
+
+from tick_loss import REORDER_WINDOW
+
+MAGIC = b"BBDTAPE1"
+CHUNK_HEADER = struct.Struct("<II")
+
+# A tick stays open while TickLoss may still call it out_of_order (newest - REORDER_WINDOW and up),
+# so every reordered heartbeat it counts as recovered also lands on the tape
+COMMIT_LAG = REORDER_WINDOW + 1   # Ticks behind the newest heartbeat before a tick is closed
+CHUNK_TICKS = 600     # Closed ticks per spilled chunk (~6 minutes of game time)
+RESET_WINDOW = REORDER_WINDOW     # Jump back behind the newest tick by more than this = the plugin's counter restarted
+
+DEFAULT_STATES = ["idle", "attack", "away"]
+
+
+class SessionTape:
+    def __init__(self, session_id, sidecar_path=None, writer=None, commit_lag=COMMIT_LAG, chunk_ticks=CHUNK_TICKS,
+                 resume=False, on_spill=None, reset_window=RESET_WINDOW, was_lost=None):
+        self.session_id = session_id
+        self.sidecar_path = sidecar_path
+        self.writer = writer
+        self.commit_lag = commit_lag
+        self.chunk_ticks = chunk_ticks
+        self.reset_window = reset_window
+        self.was_lost = was_lost
+        self.on_spill = on_spill
+
+        self.state_names = list(DEFAULT_STATES)
+        self.state_codes = {name: i for i, name in enumerate(self.state_names)}
+
+        # Open window (in RAM)
+        self.ticks = array("q")
+        self.states = array("b")
+        self.gp = array("q")
+        self.index = {}          # tick -> position in the open window
+        self.closed = 0          # positions [0, closed) are closed but not yet spilled
+
+        self.spilled_rows = 0
+        self.late_updates = 0
+        self.resets = 0
+        self.newest_tick = None
+
+        if self.sidecar_path and resume and os.path.exists(self.sidecar_path):
+            # Continue an existing sidecar (crash recovery): everything in it is already closed.
+            # A torn final chunk is cut off so new chunks append onto a clean boundary.
+            with open(self.sidecar_path, "r+b") as f:
+                ticks, _, _, names, valid_len = _parse(f.read(), self.sidecar_path)
+                f.truncate(valid_len)
+            self.spilled_rows = len(ticks)
+            for name in names:
+                self.code_for(name)
+            if len(ticks):
+                self.newest_tick = int(ticks.max())
+        elif self.sidecar_path:
+            with open(self.sidecar_path, "wb") as f:
+                f.write(MAGIC)
+
+    def __len__(self):
+        return self.spilled_rows + len(self.ticks)
+
+    # --- WRITES ---
+    def code_for(self, state):
+        code = self.state_codes.get(state)
+        if code is None:
+            code = len(self.state_names)
+            self.state_names.append(state)
+            self.state_codes[state] = code
+        return code
+
+    def _row(self, tick):
+        pos = self.index.get(tick)
+        if pos is None:
+            pos = len(self.ticks)
+            self.ticks.append(tick)
+            self.states.append(0)
+            self.gp.append(0)
+            self.index[tick] = pos
+        return pos
+
+    def _check_reset(self, tick):
+        if self.newest_tick is None or tick >= self.newest_tick - self.reset_window:
+            return
+        pos = self.index.get(tick)
+        if pos is not None and pos >= self.closed:
+            return   # Still in the open window
+        if self.was_lost and self.was_lost(tick):
+            return   # A lost heartbeat arriving late
+        # Far behind the horizon: the plugin restarted, so start a fresh window at this tick
+        self.resets += 1
+        self.close()
+        self.index = {}   # Without a sidecar the closed rows stay in RAM; the new counter may reuse their ticks
+        self.newest_tick = None
+
+    def _is_closed(self, tick):
+        pos = self.index.get(tick)
+        if pos is not None:
+            return pos < self.closed   # Already emitted, only waiting to be spilled
+        return self.newest_tick is not None and tick <= self.newest_tick - self.commit_lag
+
+    def mark(self, tick, state):
+        """Records the heartbeat state for a tick, then closes anything past the horizon."""
+        self._check_reset(tick)
+        if self._is_closed(tick):
+            self.late_updates += 1
+            return
+        self.states[self._row(tick)] = self.code_for(state)
+        if self.newest_tick is None or tick > self.newest_tick:
+            self.newest_tick = tick
+        self.close_through(self.newest_tick - self.commit_lag)
+
+    def add_gp(self, tick, value):
+        """Attaches gold to a tick (creating it as idle if its heartbeat hasn't arrived yet)."""
+        self._check_reset(tick)
+        if self._is_closed(tick):
+            self.late_updates += 1
+            return
+        self.gp[self._row(tick)] += value
+
+    # --- CLOSING & SPILLING ---
+    def close_through(self, horizon):
+        start = self.closed
+        pos = start
+        n = len(self.ticks)
+        while pos < n and self.ticks[pos] <= horizon:
+            pos += 1
+        if pos == start:
+            return
+        self._emit(start, pos)
+        self.closed = pos
+        if self.closed >= self.chunk_ticks:
+            self.spill()
+
+    def close(self):
+        """Closes every open tick and spills the remainder (end of session)."""
+        if self.closed < len(self.ticks):
+            self._emit(self.closed, len(self.ticks))
+            self.closed = len(self.ticks)
+        self.spill()
+
+    def _emit(self, start, stop):
+        if not self.writer:
+            return
+        for pos in range(start, stop):
+            tick = self.ticks[pos]
+            self.writer.write_tick(self.session_id, tick, self.state_names[self.states[pos]])
+            if self.gp[pos] != 0:
+                self.writer.write_profit(self.session_id, tick, self.gp[pos])
+
+    def spill(self):
+        """Moves the closed prefix of the open window into the sidecar file."""
+        n = self.closed
+        if n == 0 or not self.sidecar_path:
+            return
+        names = json.dumps(self.state_names).encode("utf-8")
+        with open(self.sidecar_path, "ab") as f:
+            f.write(CHUNK_HEADER.pack(n, len(names)))
+            f.write(names)
+            f.write(self.ticks[:n].tobytes())
+            f.write(self.states[:n].tobytes())
+            f.write(self.gp[:n].tobytes())
+
+        del self.ticks[:n]
+        del self.states[:n]
+        del self.gp[:n]
+        self.index = {tick: i for i, tick in enumerate(self.ticks)}
+        self.closed = 0
+        self.spilled_rows += n
+        if self.on_spill:
+            self.on_spill(n, self.spilled_rows)
+
+    # --- READS ---
+    def to_numpy(self):
+        """Returns (ticks int64, state codes int8, gp int64, state_names) for the whole session."""
+        if self.sidecar_path and os.path.exists(self.sidecar_path):
+            ticks, states, gp, _ = read_tape(self.sidecar_path)
+        else:
+            ticks, states, gp = np.empty(0, np.int64), np.empty(0, np.int8), np.empty(0, np.int64)
+        return (np.concatenate([ticks, np.frombuffer(self.ticks, dtype=np.int64)]),
+                np.concatenate([states, np.frombuffer(self.states, dtype=np.int8)]),
+                np.concatenate([gp, np.frombuffer(self.gp, dtype=np.int64)]),
+                list(self.state_names))
+
+    def to_dict(self):
+        """Legacy JSON layout: {tick: {"state": name, "gp": int}}."""
+        return tape_to_dict(*self.to_numpy())
+
+
+def tape_to_dict(ticks, states, gp, names):
+    return {t: {"state": names[s], "gp": g} for t, s, g in zip(ticks.tolist(), states.tolist(), gp.tolist())}
+
+
+def read_tape(path):
+    """Reads a .tape sidecar into (ticks int64, state codes int8, gp int64, state_names)."""
+    with open(path, "rb") as f:
+        buf = f.read()
+    ticks, states, gp, names, _ = _parse(buf, path)
+    return ticks, states, gp, names
+
+
+def _parse(buf, path=""):
+    if not buf.startswith(MAGIC):
+        raise ValueError(f"{path} is not a BBD tape file")
+
+    ticks, states, gp = [], [], []
+    names = list(DEFAULT_STATES)
+    offset = len(MAGIC)
+    while offset + CHUNK_HEADER.size <= len(buf):
+        n, names_len = CHUNK_HEADER.unpack_from(buf, offset)
+        body = CHUNK_HEADER.size + names_len + n * 17
+        if offset + body > len(buf):
+            break  # Torn final chunk (crash mid-write); keep what is complete
+        offset += CHUNK_HEADER.size
+        # Codes only ever get appended, so the newest chunk's table covers all earlier ones
+        names = json.loads(buf[offset:offset + names_len])
+        offset += names_len
+        ticks.append(np.frombuffer(buf, dtype=np.int64, count=n, offset=offset)); offset += n * 8
+        states.append(np.frombuffer(buf, dtype=np.int8, count=n, offset=offset)); offset += n
+        gp.append(np.frombuffer(buf, dtype=np.int64, count=n, offset=offset)); offset += n * 8
+
+    if not ticks:
+        return np.empty(0, np.int64), np.empty(0, np.int8), np.empty(0, np.int64), names, offset
+    return np.concatenate(ticks), np.concatenate(states), np.concatenate(gp), names, offset
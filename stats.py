@@ -1,6 +1,54 @@
+import numpy as np
 from scipy.stats import binom
 
+LUCK_CACHE_SIZE = 20000
+
+
+class LuckEngine:
+    """
+    Binomial luck percentiles for a whole drop table at once.
+    Results are memoized by (kills, observed, rate); the misses of one refresh
+    are computed in a single vectorized binom.cdf call, so a new kill costs one
+    call for the table instead of one per item.
+    """
+    def __init__(self, max_entries=LUCK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def percentiles(self, kills, observed, rates):
+        """
+        observed / rates: {item: drop events} / {item: per-kill rate}.
+        Returns {item: cumulative percentile (0-100)}.
+        """
+        result = {}
+        missing = []
+        for item, rate in rates.items():
+            key = (kills, observed.get(item, 0), rate)
+            pct = self.cache.get(key)
+            if pct is None:
+                missing.append((item, key))
+            else:
+                result[item] = pct
+        self.hits += len(result)
+
+        if missing:
+            self.misses += len(missing)
+            obs = np.array([key[1] for _, key in missing])
+            rate_arr = np.array([key[2] for _, key in missing], dtype=float)
+            cdf = binom.cdf(obs, kills, rate_arr) * 100
+            if len(self.cache) + len(missing) > self.max_entries:
+                self.cache.clear()
+            for (item, key), pct in zip(missing, cdf.tolist()):
+                self.cache[key] = pct
+                result[item] = pct
+        return result
+
+
+luck_engine = LuckEngine()
+
+
 def calculate_luck(drop_rate, total_kills, actual_drops):
     # Calculate cumulative probability
-    percentile = binom.cdf(actual_drops, total_kills, drop_rate)
-    return percentile * 100
\ No newline at end of file
+    return luck_engine.percentiles(total_kills, {"_": actual_drops}, {"_": drop_rate})["_"]
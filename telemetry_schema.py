@@ -0,0 +1,187 @@
+"""
+TELEMETRY SCHEMA
+================
+
+Versioned migrations for combat_telemetry.db.
+
+Each entry in MIGRATIONS is (version, description, steps). A step is either
+an SQL string or a callable taking the connection (for data migrations).
+migrate() applies every migration newer than the database's
+PRAGMA user_version, each in its own transaction together with the version
+bump, so an interrupted upgrade resumes from the last completed version.
+
+The database is switched to WAL on every open (the mode is persistent, so
+this only does work the first time), letting bbd_gui and the analytics
+scripts read while the telemetry writer commits.
+
+  v1  baseline tables (what init_telemetry_db used to create)
+  v2  covering indexes for the per-session reads: every reader filters by
+      session_id and orders by tick or timestamp
+  v3  combat_runs: finished sessions' ticks as one run-length encoded row
+      each (see tick_runs.py); existing combat_ticks rows are compacted
+  v4  integer epoch-ms columns next to the ISO text ones (hitsplats.ts_ms,
+      sessions.start_ms / end_ms) plus hitsplats.tick, the newest heartbeat
+      tick when the hitsplat arrived; existing rows are converted
+  v5  session_hit_summary, the per-session hitsplat aggregates the writer
+      keeps current (see hit_summary.py), backfilled from hitsplats
+
+Compaction frees pages inside the file; run with --vacuum afterwards to hand
+them back to the filesystem.
+
+run_migrations() is the same runner for any migration list; session_store.py
+uses it for bbd_sessions.db.
+
+Run `python telemetry_schema.py` to upgrade a database by hand and print its
+version; the tracker calls migrate() at startup.
+"""
+
+import argparse
+import sqlite3
+import time
+from datetime import datetime
+
+import hit_summary
+import tick_runs
+
+DB_FILE = "combat_telemetry.db"
+
+def iso_to_ms(text):
+    """ISO text from datetime.now().isoformat() (naive local time) -> epoch milliseconds."""
+    if not text:
+        return None
+    try:
+        return int(datetime.fromisoformat(text).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def _register_functions(conn):
+    conn.create_function("iso_to_ms", 1, iso_to_ms, deterministic=True)
+
+
+MIGRATIONS = [
+    (1, "baseline tables", [
+        '''CREATE TABLE IF NOT EXISTS hitsplats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT,
+            timestamp DATETIME, damage INTEGER, dragon_hp_before INTEGER)''',
+        '''CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY, start_time DATETIME, end_time DATETIME,
+            duration_sec REAL, active_sec REAL, total_attacks INTEGER,
+            total_kills INTEGER, net_profit INTEGER)''',
+        '''CREATE TABLE IF NOT EXISTS combat_ticks (
+            session_id TEXT, tick_number INTEGER, state TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS profit_deltas (
+            session_id TEXT, tick_number INTEGER, delta_gp INTEGER)''',
+        # UDP loss accounting (see tick_loss.py)
+        '''CREATE TABLE IF NOT EXISTS udp_loss (
+            session_id TEXT PRIMARY KEY, ticks_received INTEGER, ticks_lost INTEGER, gaps INTEGER,
+            out_of_order INTEGER, late INTEGER, duplicates INTEGER, resets INTEGER, queue_dropped INTEGER)''',
+        '''CREATE TABLE IF NOT EXISTS tick_gaps (
+            session_id TEXT, start_tick INTEGER, end_tick INTEGER)''',
+    ]),
+    (2, "covering per-session indexes", [
+        # bbd_gui damage list, plot_combat_luck sums, plot_tick_latency ordering
+        "CREATE INDEX IF NOT EXISTS idx_hitsplats_session ON hitsplats (session_id, timestamp, damage, dragon_hp_before)",
+        # analytics_markov / downtime / distraction / efficiency
+        "CREATE INDEX IF NOT EXISTS idx_combat_ticks_session ON combat_ticks (session_id, tick_number, state)",
+        # analytics_profit_density
+        "CREATE INDEX IF NOT EXISTS idx_profit_deltas_session ON profit_deltas (session_id, tick_number, delta_gp)",
+        "CREATE INDEX IF NOT EXISTS idx_tick_gaps_session ON tick_gaps (session_id, start_tick, end_tick)",
+        "ANALYZE",
+    ]),
+    (3, "run-length encoded combat ticks", [
+        # combat_ticks stays as the per-tick staging table for the live session
+        '''CREATE TABLE IF NOT EXISTS combat_runs (
+            session_id TEXT PRIMARY KEY, first_tick INTEGER, last_tick INTEGER,
+            n_ticks INTEGER, n_runs INTEGER, states TEXT, runs BLOB) WITHOUT ROWID''',
+        tick_runs.compact_all,
+    ]),
+    (4, "integer epoch-ms and tick columns", [
+        _register_functions,
+        "ALTER TABLE hitsplats ADD COLUMN ts_ms INTEGER",
+        "ALTER TABLE hitsplats ADD COLUMN tick INTEGER",   # NULL for rows recorded before v4
+        "UPDATE hitsplats SET ts_ms = iso_to_ms(timestamp)",
+        "ALTER TABLE sessions ADD COLUMN start_ms INTEGER",
+        "ALTER TABLE sessions ADD COLUMN end_ms INTEGER",
+        "UPDATE sessions SET start_ms = iso_to_ms(start_time), end_ms = iso_to_ms(end_time)",
+        # New hitsplats only carry ts_ms, so the timeline index moves over to it
+        "DROP INDEX IF EXISTS idx_hitsplats_session",
+        "CREATE INDEX idx_hitsplats_session ON hitsplats (session_id, ts_ms, tick, damage, dragon_hp_before)",
+    ]),
+    (5, "per-session hit summary", [
+        hit_summary.CREATE_SQL,
+        hit_summary.BACKFILL_SQL,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path=DB_FILE, target=LATEST_VERSION, quiet=False):
+    """Upgrades db_path to `target` and returns the resulting schema version."""
+    return run_migrations(db_path, MIGRATIONS, target, quiet)
+
+
+def run_migrations(db_path, migrations, target=None, quiet=False):
+    """Applies every entry of `migrations` newer than db_path's user_version (up to `target`)."""
+    latest = migrations[-1][0]
+    target = latest if target is None else target
+    conn = sqlite3.connect(db_path, isolation_level=None)  # transactions are explicit below
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        version = schema_version(conn)
+        if version > latest:
+            print(f"[SCHEMA] {db_path} is at v{version}, newer than this code (v{latest}); leaving it alone")
+            return version
+
+        for number, description, steps in migrations:
+            if number <= version or number > target:
+                continue
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                print(f"[SCHEMA] Migration v{number} ({description}) failed; {db_path} stays at v{version}")
+                raise
+            version = number
+            if not quiet:
+                print(f"[SCHEMA] {db_path} -> v{number}: {description} ({(time.perf_counter() - start) * 1000:.0f}ms)")
+        return version
+    finally:
+        conn.close()
+
+
+def vacuum(db_path=DB_FILE):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade combat_telemetry.db to the current schema")
+    parser.add_argument('db', nargs='?', default=DB_FILE)
+    parser.add_argument('--target', type=int, default=LATEST_VERSION, help="Stop at this schema version")
+    parser.add_argument('--vacuum', action='store_true', help="Rebuild the file afterwards to reclaim freed space")
+    args = parser.parse_args()
+    version = migrate(args.db, args.target)
+    if args.vacuum:
+        vacuum(args.db)
+    print(f"[SCHEMA] {args.db} is at v{version} (latest v{LATEST_VERSION})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+TELEMETRY WRITER
+================
+
+Dedicated group-commit thread for combat_telemetry.db.
+
+Producers (the HTTP handler, the UDP tape) call write_hitsplat / write_tick /
+write_profit, which only push a tuple onto a bounded queue. The writer thread
+owns the single SQLite connection and commits pending rows in one transaction
+whenever BATCH_ROWS rows are waiting or FLUSH_MS has passed since the first
+pending row, whichever comes first.
+
+Each group commit also upserts the touched sessions' session_hit_summary
+rows in the same transaction, so the summary never disagrees with hitsplats.
+
+The connection runs in WAL mode with synchronous=NORMAL so readers (bbd_gui,
+analytics scripts) never block the writer. Every INSERT uses one fixed SQL
+string, so sqlite3's statement cache keeps them prepared for the life of the
+connection.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from hit_summary import UPSERT_SQL as HIT_SUMMARY_SQL, aggregate as aggregate_hits
+from metrics import Histogram
+
+DB_FILE = "combat_telemetry.db"
+
+BATCH_ROWS = 500      # Commit once this many rows are pending...
+FLUSH_MS = 250        # ...or once the oldest pending row is this old
+MAX_QUEUE = 50000     # Bounded queue; a row that finds it full is dropped and counted, never waited on
+
+SQL = {
+    "hitsplat": "INSERT INTO hitsplats (session_id, ts_ms, tick, damage, dragon_hp_before) VALUES (?, ?, ?, ?, ?)",
+    "tick":     "INSERT INTO combat_ticks (session_id, tick_number, state) VALUES (?, ?, ?)",
+    "profit":   "INSERT INTO profit_deltas (session_id, tick_number, delta_gp) VALUES (?, ?, ?)",
+}
+
+# Module-level so they register once with metrics.REGISTRY, however many writers are created
+insert_hist = Histogram("bbd_sqlite_insert_ms", "executemany time of one group commit (all tables)")
+commit_hist = Histogram("bbd_sqlite_commit_ms", "COMMIT time of one group commit")
+
+_FLUSH = "__flush__"
+_STOP = "__stop__"
+
+
+class TelemetryWriter(threading.Thread):
+    def __init__(self, db_path=DB_FILE, batch_rows=BATCH_ROWS, flush_ms=FLUSH_MS, max_queue=MAX_QUEUE):
+        super().__init__(name="TelemetryWriter", daemon=True)
+        self.db_path = db_path
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_ms / 1000.0
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self.stats_lock = threading.Lock()
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.max_queue_depth = 0
+
+    # --- PRODUCER API (any thread) ---
+    def write_hitsplat(self, session_id, ts_ms, tick, damage, hp_before):
+        self._put(("hitsplat", (session_id, ts_ms, tick, damage, hp_before)))
+
+    def write_tick(self, session_id, tick_number, state):
+        self._put(("tick", (session_id, tick_number, state)))
+
+    def write_profit(self, session_id, tick_number, delta_gp):
+        self._put(("profit", (session_id, tick_number, delta_gp)))
+
+    def flush(self, timeout=5.0):
+        """Blocks until every row queued before this call has been committed. False on timeout."""
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self.queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            print(f"[TELEMETRY] Flush timed out: queue still full after {timeout:.1f}s")
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    def stop(self, timeout=5.0):
+        """Commits what is queued and ends the thread. False if it did not finish within timeout."""
+        deadline = time.monotonic() + timeout
+        try:
+            self.queue.put((_STOP, None), timeout=timeout)
+        except queue.Full:
+            print(f"[TELEMETRY] Stop timed out: queue still full after {timeout:.1f}s")
+            return False
+        self.join(max(0.0, deadline - time.monotonic()))
+        return not self.is_alive()
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)   # Producers run on the asyncio loop; never block it
+        except queue.Full:
+            with self.stats_lock:
+                self.rows_dropped += 1
+            return
+        depth = self.queue.qsize()
+        with self.stats_lock:
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+
+    # --- REPORTING ---
+    def stats(self):
+        with self.stats_lock:
+            avg = self.total_flush_ms / self.flush_count if self.flush_count else 0.0
+            return {
+                "queue_depth": self.queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "rows_written": self.rows_written,
+                "rows_dropped": self.rows_dropped,
+                "flushes": self.flush_count,
+                "flush_errors": self.flush_errors,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "avg_flush_ms": round(avg, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+            }
+
+    def describe(self):
+        s = self.stats()
+        return (f"{s['rows_written']:,} rows in {s['flushes']:,} commits | "
+                f"flush avg {s['avg_flush_ms']:.2f} ms, max {s['max_flush_ms']:.2f} ms | "
+                f"queue {s['queue_depth']} (peak {s['max_queue_depth']}) | dropped {s['rows_dropped']}")
+
+    # --- WRITER THREAD ---
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    def run(self):
+        conn = self.connect()
+        pending = {kind: [] for kind in SQL}
+        n_pending = 0
+        deadline = None
+
+        while True:
+            timeout = None if not n_pending else max(0.0, deadline - time.monotonic())
+            try:
+                kind, row = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                kind, row = None, None
+
+            if kind == _FLUSH or kind == _STOP:
+                if n_pending:
+                    self._commit(conn, pending, n_pending)
+                    n_pending = 0
+                if kind == _STOP:
+                    break
+                row.set()
+                continue
+
+            if kind is not None:
+                pending[kind].append(row)
+                n_pending += 1
+                if n_pending == 1:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if n_pending and (n_pending >= self.batch_rows or time.monotonic() >= deadline):
+                self._commit(conn, pending, n_pending)
+                n_pending = 0
+
+        conn.close()
+
+    def _commit(self, conn, pending, n_pending):
+        t0 = time.perf_counter()
+        try:
+            for kind, rows in pending.items():
+                if rows:
+                    conn.executemany(SQL[kind], rows)
+            if pending["hitsplat"]:
+                # Running per-session aggregates commit atomically with the rows (see hit_summary.py)
+                conn.executemany(HIT_SUMMARY_SQL, aggregate_hits(pending["hitsplat"]))
+            t_insert = time.perf_counter()
+            conn.commit()
+            insert_hist.observe((t_insert - t0) * 1000)
+            commit_hist.observe((time.perf_counter() - t_insert) * 1000)
+            ok = True
+        except Exception as e:
+            conn.rollback()
+            print(f"[TELEMETRY ERROR] Group commit of {n_pending} rows failed: {e}")
+            ok = False
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        for rows in pending.values():
+            rows.clear()
+
+        with self.stats_lock:
+            self.flush_count += 1
+            self.last_flush_ms = elapsed_ms
+            self.total_flush_ms += elapsed_ms
+            if elapsed_ms > self.max_flush_ms:
+                self.max_flush_ms = elapsed_ms
+            if ok:
+                self.rows_written += n_pending
+            else:
+                self.flush_errors += 1
+                self.rows_dropped += n_pending
@@ -0,0 +1,150 @@
+"""
+TICK LOSS
+=========
+
+Per-session UDP loss accounting for tick_heartbeat datagrams.
+
+The plugin numbers heartbeats with its own counter, which only advances when
+a heartbeat is sent, so every hole in the sequence is a datagram that never
+reached the tracker (socket loss or a drop-oldest overflow of the core's UDP
+queue), not an idle tick.
+
+  * gap          - the next tick jumped past newest + 1; the skipped ticks are
+                   held as *pending* for REORDER_WINDOW ticks
+  * out_of_order - a pending tick arrived late and is no longer counted lost
+  * late         - a tick arrived after it left the window (already counted lost)
+  * duplicate    - a tick that was already received
+  * reset        - the counter jumped back further than the window (plugin
+                   restarted); tracking continues from the new baseline
+
+Pending ticks that age out of the window are final losses and are kept as
+inclusive [start, end] ranges, so analytics can tell dropped packets from
+real idle ticks (see analytics_markov.py).
+"""
+
+REORDER_WINDOW = 10   # Ticks a missing heartbeat may still arrive late
+
+
+class TickLoss:
+    def __init__(self, window=REORDER_WINDOW):
+        self.window = window
+        self.newest = None
+        self.first = None        # Lowest tick seen since the baseline (nothing is known before it)
+        self.pending = set()
+        self.lost_ranges = []    # finalized [start, end] ranges, in tick order
+        self.received = 0
+        self.gaps = 0
+        self.out_of_order = 0
+        self.late = 0
+        self.duplicates = 0
+        self.resets = 0
+
+    def observe(self, tick):
+        """Accounts one heartbeat tick number."""
+        self.received += 1
+        if self.newest is None:
+            self.newest = self.first = tick
+            return
+
+        if tick > self.newest:
+            if tick > self.newest + 1:
+                self.gaps += 1
+                if tick - self.newest - 1 > self.window:
+                    # Most of a long hole can never be reordered back in; finalize it now
+                    self._finalize_all()
+                    self._add_range(self.newest + 1, tick - self.window - 1)
+                    self.pending.update(range(tick - self.window, tick))
+                else:
+                    self.pending.update(range(self.newest + 1, tick))
+            self.newest = tick
+            self._finalize_through(tick - self.window - 1)
+
+        elif tick in self.pending:
+            self.pending.discard(tick)
+            self.out_of_order += 1
+
+        elif tick >= self.newest - self.window:
+            if tick < self.first:
+                # Overtaken by the very first heartbeat we saw
+                self.first = tick
+                self.out_of_order += 1
+            else:
+                self.duplicates += 1
+
+        elif self.was_lost(tick):
+            self.late += 1
+
+        else:
+            # Far behind and never missing: the plugin's counter started over
+            self.resets += 1
+            self.received -= 1
+            self._finalize_all()
+            self.newest = self.first = None
+            self.observe(tick)
+
+    # --- LOST RANGES ---
+    def _add_range(self, start, end):
+        if start > end:
+            return
+        if self.lost_ranges and self.lost_ranges[-1][1] == start - 1:
+            self.lost_ranges[-1][1] = end
+        else:
+            self.lost_ranges.append([start, end])
+
+    def _finalize_through(self, horizon):
+        if not self.pending or min(self.pending) > horizon:
+            return
+        done = sorted(t for t in self.pending if t <= horizon)
+        self.pending.difference_update(done)
+        for t in done:
+            self._add_range(t, t)
+
+    def _finalize_all(self):
+        for t in sorted(self.pending):
+            self._add_range(t, t)
+        self.pending.clear()
+
+    def was_lost(self, tick):
+        """True if tick is in a recent finalized lost range (SessionTape uses it to tell late ticks from resets)."""
+        # Only the recent ranges can hold a tick this close to newest
+        for start, end in reversed(self.lost_ranges[-8:]):
+            if start <= tick <= end:
+                return True
+        return False
+
+    # --- READS ---
+    @property
+    def lost(self):
+        return sum(end - start + 1 for start, end in self.lost_ranges) + len(self.pending)
+
+    def to_dict(self, queue_dropped=0):
+        """Session-document block; pending ticks are reported as lost."""
+        ranges = [list(r) for r in self.lost_ranges]
+        for t in sorted(self.pending):
+            if ranges and ranges[-1][1] == t - 1:
+                ranges[-1][1] = t
+            else:
+                ranges.append([t, t])
+        expected = self.received - self.duplicates - self.late + self.lost
+        return {
+            "ticks_received": self.received,
+            "ticks_lost": self.lost,
+            "loss_pct": round(self.lost / expected * 100, 3) if expected else 0.0,
+            "gaps": self.gaps,
+            "out_of_order": self.out_of_order,
+            "late": self.late,
+            "duplicates": self.duplicates,
+            "resets": self.resets,
+            "queue_dropped": queue_dropped,
+            "lost_ranges": ranges,
+        }
+
+    @classmethod
+    def from_dict(cls, data, window=REORDER_WINDOW):
+        """Restores counters from a session document (crash resume); the window starts empty."""
+        loss = cls(window)
+        loss.lost_ranges = [list(r) for r in data.get("lost_ranges", [])]
+        for key in ("gaps", "out_of_order", "late", "duplicates", "resets"):
+            setattr(loss, key, data.get(key, 0))
+        loss.received = data.get("ticks_received", 0)
+        return loss
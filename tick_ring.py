@@ -0,0 +1,63 @@
+"""
+TICK RING
+=========
+
+Fixed-size ring buffer for the rolling UDP stream shown by the matrix overlay.
+
+Every appended entry gets a monotonically increasing sequence number (stored
+on the entry as "seq"). Readers keep the last seq they saw as a cursor and ask
+for since(cursor), which costs O(new entries) instead of re-shipping and
+re-scanning the whole buffer.
+
+Appends and clears come from the TrackerCore worker thread (its publish_tick
+and clear_ticks callables), reads from the ingest server's asyncio thread
+(/hp and the /stream snapshot), so all access goes through one lock.
+"""
+
+import threading
+
+
+class TickRing:
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.seq = 0            # seq of the newest entry (0 = empty)
+        self.oldest_valid = 1   # entries below this seq were cleared
+        self.lock = threading.Lock()
+
+    def append(self, entry):
+        with self.lock:
+            self.seq += 1
+            entry["seq"] = self.seq
+            self.slots[self.seq % self.capacity] = entry
+            return self.seq
+
+    def clear(self):
+        with self.lock:
+            self.slots = [None] * self.capacity
+            # Keep counting upward so stale client cursors never look "ahead"
+            self.oldest_valid = self.seq + 1
+
+    def _oldest(self):
+        return max(self.oldest_valid, self.seq - self.capacity + 1)
+
+    def since(self, cursor):
+        """
+        Returns (entries newer than cursor, head seq, gap). `gap` is True when
+        the cursor fell behind the oldest retained entry, i.e. the client
+        missed entries that have already been overwritten. A cursor ahead of
+        the head (tracker restarted) is treated as a fresh client.
+        """
+        with self.lock:
+            oldest = self._oldest()
+            if cursor > self.seq:
+                start, gap = oldest, True
+            else:
+                start = max(cursor + 1, oldest)
+                gap = 0 < cursor < oldest - 1
+            entries = [self.slots[s % self.capacity] for s in range(start, self.seq + 1)]
+            return entries, self.seq, gap
+
+    def latest(self):
+        entries, _, _ = self.since(0)
+        return entries
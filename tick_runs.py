@@ -0,0 +1,173 @@
+"""
+TICK RUNS
+=========
+
+Run-length encoded storage for combat tick states.
+
+During a session the tape streams one combat_ticks row per closed tick (the
+staging table; a crash only loses the last COMMIT_LAG ticks). When the
+session is finalized, compact_session() folds its rows into one
+combat_runs row and deletes them:
+
+  combat_runs (session_id PK, first_tick, last_tick, n_ticks, n_runs,
+               states TEXT, runs BLOB)
+
+`states` is the JSON list of state names the codes index into. `runs` is a
+zlib-compressed concatenation of three little-endian arrays of n_runs
+entries each:
+
+  i8 start deltas (first start, then start - previous start)
+  i4 run lengths
+  i1 state codes
+
+A run is a stretch of consecutive ticks with the same state; a hole in the
+tick sequence (lost heartbeats, see tick_loss.py) always starts a new run.
+A typical session packs to well under a byte per tick.
+
+Readers never query combat_ticks directly. load_runs() / load_ticks() return
+NumPy arrays for compacted sessions merged with any staging rows (the live
+session, or one that crashed before it was finalized).
+"""
+
+import json
+import zlib
+
+import numpy as np
+
+RUN_DTYPES = (np.dtype("<i8"), np.dtype("<i4"), np.dtype("i1"))
+
+
+# --- ENCODING ---
+def encode(ticks, codes):
+    """Sorted tick numbers + per-tick state codes -> (starts, lengths, run codes)."""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    codes = np.asarray(codes, dtype=np.int8)
+    if not len(ticks):
+        return np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.int8)
+    breaks = np.flatnonzero((np.diff(ticks) != 1) | (np.diff(codes) != 0)) + 1
+    heads = np.concatenate(([0], breaks))
+    lengths = np.diff(np.concatenate((heads, [len(ticks)])))
+    return ticks[heads], lengths.astype(np.int32), codes[heads]
+
+
+def decode(starts, lengths, codes):
+    """Runs -> (ticks int64, state codes int8), one entry per tick."""
+    if not len(starts):
+        return np.empty(0, np.int64), np.empty(0, np.int8)
+    total = int(lengths.sum())
+    # Offset of each tick inside its run, added to the run's start
+    run_first = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    ticks = np.repeat(starts, lengths) + (np.arange(total, dtype=np.int64) - run_first)
+    return ticks, np.repeat(codes, lengths)
+
+
+def pack(starts, lengths, codes):
+    deltas = np.diff(starts, prepend=np.int64(0)) if len(starts) else starts
+    raw = (deltas.astype(RUN_DTYPES[0]).tobytes() + lengths.astype(RUN_DTYPES[1]).tobytes()
+           + codes.astype(RUN_DTYPES[2]).tobytes())
+    return zlib.compress(raw, 6)
+
+
+def unpack(blob, n_runs):
+    raw = zlib.decompress(blob)
+    offset = 0
+    cols = []
+    for dtype in RUN_DTYPES:
+        cols.append(np.frombuffer(raw, dtype=dtype, count=n_runs, offset=offset))
+        offset += n_runs * dtype.itemsize
+    return np.cumsum(cols[0]), cols[1], cols[2]
+
+
+# --- STAGING ROWS ---
+def _codes_for(states, names):
+    """Maps state names onto `names` (extended in place) -> int8 codes."""
+    index = {name: i for i, name in enumerate(names)}
+    out = np.empty(len(states), np.int8)
+    for i, state in enumerate(states):
+        code = index.get(state)
+        if code is None:
+            code = index[state] = len(names)
+            names.append(state)
+        out[i] = code
+    return out
+
+
+def _staged(conn, session_id, names):
+    rows = conn.execute("SELECT tick_number, state FROM combat_ticks WHERE session_id = ? ORDER BY tick_number",
+                        (session_id,)).fetchall()
+    if not rows:
+        return None
+    ticks = np.fromiter((r[0] for r in rows), np.int64, len(rows))
+    return ticks, _codes_for([r[1] for r in rows], names)
+
+
+def _merge(stored, staged):
+    """Per-tick arrays from the runs blob and the staging table; a staged tick wins on overlap."""
+    ticks = np.concatenate((staged[0], stored[0]))
+    codes = np.concatenate((staged[1], stored[1]))
+    ticks, first = np.unique(ticks, return_index=True)
+    return ticks, codes[first]
+
+
+# --- READS ---
+def _stored(conn, session_id):
+    row = conn.execute("SELECT n_runs, states, runs FROM combat_runs WHERE session_id = ?", (session_id,)).fetchone()
+    if row is None:
+        return None, []
+    return unpack(row[2], row[0]), json.loads(row[1])
+
+
+def load_ticks(conn, session_id):
+    """(ticks int64, state codes int8, state names) for one session."""
+    runs, names = _stored(conn, session_id)
+    ticks, codes = decode(*runs) if runs else (np.empty(0, np.int64), np.empty(0, np.int8))
+    staged = _staged(conn, session_id, names)
+    if staged is not None:
+        ticks, codes = _merge((ticks, codes), staged)
+    return ticks, codes, names
+
+
+def load_runs(conn, session_id=None):
+    """{session_id: (starts, lengths, codes, names)} for every session (or one)."""
+    where, params = ("WHERE session_id = ?", (session_id,)) if session_id else ("", ())
+    out = {}
+    for sid, n_runs, states, blob in conn.execute(f"SELECT session_id, n_runs, states, runs FROM combat_runs {where}", params):
+        out[sid] = unpack(blob, n_runs) + (json.loads(states),)
+
+    # Sessions still (partly) in the staging table
+    for (sid,) in conn.execute(f"SELECT DISTINCT session_id FROM combat_ticks {where}", params).fetchall():
+        names = out[sid][3] if sid in out else []
+        stored = decode(*out[sid][:3]) if sid in out else (np.empty(0, np.int64), np.empty(0, np.int8))
+        ticks, codes = _merge(stored, _staged(conn, sid, names))
+        out[sid] = encode(ticks, codes) + (names,)
+    return out
+
+
+def state_counts(runs, names):
+    """{state name: ticks} for one session's runs."""
+    starts, lengths, codes = runs
+    totals = np.bincount(codes, weights=lengths, minlength=len(names)) if len(codes) else np.zeros(len(names))
+    return {name: int(totals[i]) for i, name in enumerate(names)}
+
+
+# --- COMPACTION ---
+def compact_session(conn, session_id):
+    """Folds a session's staging rows into its combat_runs row. Runs inside the caller's transaction."""
+    runs, names = _stored(conn, session_id)
+    staged = _staged(conn, session_id, names)
+    if staged is None:
+        return 0
+    ticks, codes = _merge(decode(*runs), staged) if runs else staged
+    starts, lengths, run_codes = encode(ticks, codes)
+    conn.execute("""INSERT OR REPLACE INTO combat_runs (session_id, first_tick, last_tick, n_ticks, n_runs, states, runs)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                 (session_id, int(ticks[0]), int(ticks[-1]), len(ticks), len(starts), json.dumps(names),
+                  pack(starts, lengths, run_codes)))
+    conn.execute("DELETE FROM combat_ticks WHERE session_id = ?", (session_id,))
+    return len(ticks)
+
+
+def compact_all(conn):
+    """Compacts every session in the staging table (schema migration v3)."""
+    sessions = [r[0] for r in conn.execute("SELECT DISTINCT session_id FROM combat_ticks").fetchall()]
+    return sum(compact_session(conn, sid) for sid in sessions)
@@ -0,0 +1,724 @@
+"""
+TRACKER CORE
+============
+
+GUI-free session engine behind bbd_tracker.py.
+
+Everything that used to live inside BBDTrackerApp and only ran on the Tk main
+loop (session state machine, tick tape, loot and kill counting, census hooks,
+journal / JSON / SQLite persistence) runs here on one worker thread, fed by a
+thread-safe event queue:
+
+  submit_udp(payload)          - UDP datagrams (tick_heartbeat, net_profit_delta, ...),
+                                 buffered separately in a bounded drop-oldest deque
+  submit_event(type, payload)  - HTTP /event bodies that need session state
+  command(name, **kwargs)      - start_session / stop_session / finalize_stop /
+                                 manual_kill / set_config / log_event / recover /
+                                 shutdown
+
+Only the worker thread mutates session state, so producers never wait on the
+UI and nothing needs a display. Front-ends subscribe() to notifications
+(log lines, phase/kill changes, session lifecycle) and read view() for a
+consistent copy of the counters; bbd_tracker.py's Tk app is one such
+subscriber, --headless runs with none.
+
+Live overlay state and the rolling tick stream are reached through injected
+callables (set_live_state, publish_tick, clear_ticks) so the core itself has no
+sockets either. bench_core.py drives it directly to measure the CPU cost of
+pure event processing.
+"""
+
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from item_catalog import load_catalog
+from metrics import Counter, Histogram
+from tick_loss import TickLoss
+from tick_runs import compact_session
+from session_tape import SessionTape, read_tape, tape_to_dict
+from session_journal import SessionJournal, journal_path, find_journals, replay, write_document, COMPACT_SEC, RESUME_WINDOW_SEC
+import session_store
+
+DATA_DIR = "bbd_data"
+TELEMETRY_DB = "combat_telemetry.db"
+SESSION_DB = session_store.DB_FILE
+CHECKPOINT_SEC = 3.0   # Journal counters/config checkpoint cadence while a session runs
+UDP_QUEUE_MAX = 5000   # Buffered UDP payloads (~25s of a busy client); the oldest is dropped beyond this
+
+# --- MASTER DROP TABLE ---
+DROP_TABLE = {
+    "Dragon bones":       {"rate": 1.0, "qty": 1, "cat": "Guaranteed"},
+    "Black dragonhide":   {"rate": 1.0, "qty": 2, "cat": "Guaranteed"},
+
+    # Uniques (1/512)
+    "Dragon platelegs":   {"rate": 1/512, "qty": 1, "cat": "Unique"},
+    "Dragon plateskirt":  {"rate": 1/512, "qty": 1, "cat": "Unique"},
+    "Dragon spear":       {"rate": 1/512, "qty": 1, "cat": "Unique"},
+    "Uncut dragonstone":  {"rate": 1/512, "qty": 1, "cat": "Unique"},
+
+    # Weapons/Armor
+    "Rune spear":         {"rate": 1/12.8, "qty": 1, "cat": "Gear"},
+    "Rune platelegs":     {"rate": 1/18.29, "qty": 1, "cat": "Gear"},
+    "Rune full helm":     {"rate": 1/21.33, "qty": 2, "cat": "Gear"},
+    "Rune dart":          {"rate": 1/25.6, "qty": 20, "cat": "Gear"},
+    "Rune longsword":     {"rate": 1/25.6, "qty": 1, "cat": "Gear"},
+    "Black d'hide body":  {"rate": 1/64, "qty": 1, "cat": "Gear"},
+    "Rune knife":         {"rate": 1/64, "qty": 25, "cat": "Gear"},
+    "Rune thrownaxe":     {"rate": 1/64, "qty": 30, "cat": "Gear"},
+    "Black d'hide vambraces": {"rate": 1/128, "qty": 1, "cat": "Gear"},
+    "Rune platebody":     {"rate": 1/128, "qty": 1, "cat": "Gear"},
+    "Dragon med helm":    {"rate": 1/128, "qty": 1, "cat": "Gear"},
+    "Dragon longsword":   {"rate": 1/128, "qty": 1, "cat": "Gear"},
+    "Dragon dagger":      {"rate": 1/128, "qty": 1, "cat": "Gear"},
+
+    # Runes/Ammo
+    "Rune javelin":       {"rate": 1/16, "qty": 50, "cat": "Ammo"},
+    "Blood rune":         {"rate": 1/16, "qty": 50, "cat": "Ammo"},
+    "Soul rune":          {"rate": 1/16, "qty": 50, "cat": "Ammo"},
+    "Death rune":         {"rate": 1/18.29, "qty": 75, "cat": "Ammo"},
+    "Law rune":           {"rate": 1/18.29, "qty": 75, "cat": "Ammo"},
+    "Rune arrow":         {"rate": 1/18.29, "qty": 75, "cat": "Ammo"},
+
+    # Materials
+    "Lava scale":         {"rate": 1/32, "qty": 5, "cat": "Mats"},
+    "Dragon dart tip":    {"rate": 1/42.67, "qty": 40, "cat": "Mats"},
+    "Runite ore":         {"rate": 1/64, "qty": 3, "cat": "Mats"},
+    "Dragon arrowtips":   {"rate": 1/64, "qty": 40, "cat": "Mats"},
+    "Dragon javelin tips":{"rate": 1/64, "qty": 40, "cat": "Mats"},
+
+    # Coins
+    "Coins":              {"rate": 1/10.66, "qty": 400, "cat": "Coins"},
+
+    # Other
+    "Anglerfish":         {"rate": 1/16, "qty": 2, "cat": "Other"},
+
+    # RDT / Rare
+    "Loop half of key":    {"rate": 1/378, "qty": 1, "cat": "RDT"},
+    "Tooth half of key":   {"rate": 1/378, "qty": 1, "cat": "RDT"},
+    "Shield left half":    {"rate": 1/15738, "qty": 1, "cat": "RDT"},
+    "Uncut sapphire":      {"rate": 1/154, "qty": 1, "cat": "RDT"},
+    "Uncut emerald":       {"rate": 1/309, "qty": 1, "cat": "RDT"},
+    "Uncut ruby":          {"rate": 1/618, "qty": 1, "cat": "RDT"},
+    "Uncut diamond":       {"rate": 1/2473, "qty": 1, "cat": "RDT"},
+    "Nature talisman":     {"rate": 1/1638, "qty": 1, "cat": "RDT"},
+    "Rune battleaxe":      {"rate": 1/2731, "qty": 1, "cat": "RDT"},
+    "Rune 2h sword":       {"rate": 1/2731, "qty": 1, "cat": "RDT"},
+    "Rune sq shield":      {"rate": 1/4096, "qty": 1, "cat": "RDT"},
+    "Steel arrow":         {"rate": 1/4096, "qty": 150, "cat": "RDT"},
+    "Adamant javelin":     {"rate": 1/4096, "qty": 20, "cat": "RDT"},
+    "Dragonstone":         {"rate": 1/4096, "qty": 1, "cat": "RDT"},
+
+    # Tertiary
+    "Ensouled dragon head":{"rate": 1/20, "qty": 1, "cat": "Tertiary"},
+    "Clue scroll (hard)":  {"rate": 1/128, "qty": 1, "cat": "Tertiary"},
+    "Clue scroll (elite)": {"rate": 1/250, "qty": 1, "cat": "Tertiary"},
+    "Draconic visage":     {"rate": 1/10000, "qty": 1, "cat": "Tertiary"},
+    "Ancient shard":       {"rate": 1/123, "qty": 1, "cat": "Catacombs"},
+    "Dark totem base":     {"rate": 1/185, "qty": 1, "cat": "Catacombs"},
+    "Dark totem middle":   {"rate": 1/185, "qty": 1, "cat": "Catacombs"},
+    "Dark totem top":      {"rate": 1/185, "qty": 1, "cat": "Catacombs"}
+}
+
+# Module-level so they register once with metrics.REGISTRY (served on /metrics)
+queue_wait_hist = Histogram("bbd_core_queue_wait_ms", "Event submitted -> processed by the tracker core")
+autosave_hist = Histogram("bbd_autosave_ms", "Session JSON write (save_data) duration")
+udp_dropped_total = Counter("bbd_udp_queue_dropped_total", "UDP payloads dropped (oldest first) because the core fell behind")
+
+COMMANDS = ("start_session", "stop_session", "finalize_stop", "manual_kill", "set_config", "log_event",
+            "recover_crashed_sessions", "shutdown")
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+class TrackerCore:
+    def __init__(self, data_dir=DATA_DIR, telemetry=None, census=None, set_live_state=None, publish_tick=None,
+                 clear_ticks=None, db_path=TELEMETRY_DB, session_db=SESSION_DB, udp_queue_max=UDP_QUEUE_MAX):
+        self.data_dir = data_dir
+        self.telemetry = telemetry
+        self.census = census
+        self.set_live_state = set_live_state or _noop
+        self.publish_tick = publish_tick or _noop
+        self.clear_ticks = clear_ticks or _noop
+        self.db_path = db_path
+        self.session_db = session_db
+        self.catalog = load_catalog()   # loot IDs -> names (noted IDs resolve to the base item)
+
+        self.events = queue.Queue()
+        # UDP is lossy by nature: a bounded buffer that sheds the oldest datagram
+        # rather than blocking the socket thread or growing without limit
+        self.udp = deque()
+        self.udp_max = udp_queue_max
+        self.udp_lock = threading.Lock()
+        self.udp_signalled = False
+        self.udp_dropped = 0
+        self.lock = threading.RLock()       # Held while an event mutates state; view() copies under it
+        self.subscribers = []
+        self.thread = None
+        self.running = False
+        self.processed = 0
+
+        # Session state
+        self.is_active = False
+        self.draining = False
+        self.start_time = None
+        self.session_id = None
+        self.kill_count = 0
+        self.attack_count = 0
+        self.active_seconds_bank = 0.0
+        self.last_phase_timestamp = time.time()
+        self.current_phase = "IDLE"
+        self.current_tick = 0
+        self.total_profit = 0
+        self.event_log = []
+        self.loot_tracker = {}
+        self.session_tape = None
+        self.tick_loss = TickLoss()
+        self.dropped_at_start = 0
+        self.config = {}
+        self.theoretical_stats = {}
+
+        # Journal
+        self.journal = None
+        self.last_compact = 0.0
+        self.last_checkpoint = 0.0
+        self.last_counters = None
+        self.last_config = None
+        self.last_loss = None
+
+    # --- INPUT (any thread) ---
+    def submit(self, kind, data=None):
+        self.events.put((time.perf_counter(), kind, data))
+
+    def submit_udp(self, payload):
+        with self.udp_lock:
+            if len(self.udp) >= self.udp_max:
+                self.udp.popleft()
+                self.udp_dropped += 1
+                udp_dropped_total.inc()
+            self.udp.append((time.perf_counter(), payload))
+            wake = not self.udp_signalled
+            self.udp_signalled = True
+        if wake:
+            # One wake-up token per batch; the worker clears the flag before draining
+            self.events.put((time.perf_counter(), "udp_ready", None))
+
+    def queue_depth(self):
+        return self.events.qsize() + len(self.udp)
+
+    def submit_event(self, event_type, payload):
+        self.submit("event", (event_type, payload))
+
+    def command(self, name, **kwargs):
+        if name not in COMMANDS:
+            raise ValueError(f"unknown tracker command: {name}")
+        self.submit("command", (name, kwargs))
+
+    # --- OUTPUT ---
+    def subscribe(self, fn):
+        """fn(event, data) is called on the core thread; keep it cheap (e.g. queue.put)."""
+        self.subscribers.append(fn)
+
+    def notify(self, event, data=None):
+        for fn in self.subscribers:
+            fn(event, data)
+
+    def view(self):
+        """Consistent copy of the counters a front-end renders."""
+        with self.lock:
+            return {
+                "is_active": self.is_active,
+                "draining": self.draining,
+                "session_id": self.session_id,
+                "start_time": self.start_time,
+                "kill_count": self.kill_count,
+                "attack_count": self.attack_count,
+                "phase": self.current_phase,
+                "loot": dict(self.loot_tracker),
+            }
+
+    # --- EVENT LOOP ---
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run_forever, name="TrackerCore", daemon=True)
+        self.thread.start()
+
+    def run_forever(self):
+        while self.running:
+            try:
+                item = self.events.get(timeout=CHECKPOINT_SEC)
+            except queue.Empty:
+                item = None
+            if item is not None:
+                self.dispatch(*item)
+            if self.is_active and time.time() - self.last_checkpoint >= CHECKPOINT_SEC:
+                with self.lock:
+                    self.checkpoint()
+
+    def drain(self):
+        """Processes everything queued so far on the calling thread (benchmarks, headless shutdown)."""
+        n = 0
+        try:
+            while True:
+                self.dispatch(*self.events.get_nowait())
+                n += 1
+        except queue.Empty:
+            pass
+        return n
+
+    def join(self, timeout=None):
+        if self.thread:
+            self.thread.join(timeout)
+
+    def dispatch(self, submitted_at, kind, data):
+        if kind == "udp_ready":
+            self.drain_udp()
+            return
+        queue_wait_hist.observe((time.perf_counter() - submitted_at) * 1000)
+        with self.lock:
+            try:
+                if kind == "event":
+                    self.process_event(*data)
+                elif kind == "command":
+                    name, kwargs = data
+                    getattr(self, name)(**kwargs)
+            except Exception as e:
+                print(f"[CORE Error] {kind}: {e}")
+            self.processed += 1
+
+    def drain_udp(self):
+        with self.udp_lock:
+            batch, self.udp = self.udp, deque()
+            self.udp_signalled = False
+        now = time.perf_counter()
+        with self.lock:
+            for received_at, payload in batch:
+                queue_wait_hist.observe((now - received_at) * 1000)
+                try:
+                    self.process_udp(payload)
+                except Exception as e:
+                    print(f"[CORE Error] udp: {e}")
+            self.processed += len(batch)
+
+    def shutdown(self):
+        if self.census:
+            self.census.flush()
+        self.running = False
+
+    # --- UDP PIPE ---
+    def process_udp(self, payload):
+        ev_type = payload.get("event")
+
+        # --- PHASE 6: THE IRON GATE & RAM BUFFER ---
+        if self.is_active:
+            if ev_type == "tick_heartbeat":
+                self.current_tick = payload.get("tick", self.current_tick)
+                state = payload.get("state", "idle")
+                self.tick_loss.observe(self.current_tick)
+
+                # Initialize or update the state (closes + streams ticks past the horizon)
+                self.session_tape.mark(self.current_tick, state)
+
+            elif ev_type == "net_profit_delta":
+                val = payload.get("value", 0)
+                self.total_profit += val
+                self.set_live_state(total_profit=self.total_profit)
+
+                # Attach gold to the current tick (handling UDP race conditions)
+                self.session_tape.add_gp(self.current_tick, val)
+
+        # --- THE ROLLING STREAM (For the Matrix UI) ---
+        if ev_type != "net_profit_delta":
+            self.publish_tick(payload)
+
+    # --- HTTP EVENTS ---
+    def process_event(self, event_type, payload):
+        if not self.is_active: return
+
+        # --- NEW: Catch Attack ---
+        if event_type == "player_attack":
+            self.attack_count += 1
+            self.set_live_state(last_attack=time.time())
+
+        elif event_type == "phase_change":
+            in_zone = payload.get("in_zone")
+            phase = "KILLING" if in_zone else "AWAY"
+            if phase != self.current_phase:
+
+                # --- Calculate elapsed time before switching phases ---
+                now = time.time()
+                if self.current_phase == "KILLING":
+                    self.active_seconds_bank += (now - self.last_phase_timestamp)
+                self.last_phase_timestamp = now
+                # -----------------------------------------------------------
+
+                self.current_phase = phase
+                self.set_live_state(phase=phase)
+                self.notify("phase", phase)
+                self.log_event("phase", f"Phase Changed: {phase}")
+                self.checkpoint() # Journal quietly on phase change
+
+        elif event_type == "loot_event":
+            self.process_kill(loot_items=payload.get("items", []))
+
+        elif event_type == "player_spawn" and self.census:
+            # --- CENSUS INTEGRATION ---
+            result = self.census.log_sighting(
+                self.session_id,
+                payload['name'],
+                payload['combat'],
+                payload['world'],
+                payload.get('gear', [])
+            )
+
+            if result['status'] == 'logged':
+                if result['roster_status'] == 'NEW':
+                    self.log_event("census", f"New Player: {payload['name']}")
+
+    def manual_kill(self):
+        if self.is_active and not self.draining:
+            self.process_kill(manual=True)
+
+    def process_kill(self, loot_items=None, manual=False):
+        self.kill_count += 1
+        if self.journal:
+            self.journal.append("kill")
+        self.notify("kills", self.kill_count)
+        source = "Manual" if manual else "Auto"
+
+        self.log_event("kill", f"Kill Confirmed ({source})")
+
+        # Guaranteed
+        self.add_loot("Dragon bones", 1)
+        self.add_loot("Black dragonhide", 2)
+
+        # Variable
+        if loot_items:
+            for item in loot_items:
+                i_id = item.get('id')
+                qty = item.get('qty')
+                name = self.catalog.name(i_id, f"Item {i_id}")
+
+                if name not in ["Dragon bones", "Black dragonhide"]:
+                    self.add_loot(name, qty)
+                    self.log_event("loot", f"-> {qty}x {name}")
+
+    def add_loot(self, item_name, qty):
+        self.loot_tracker[item_name] = self.loot_tracker.get(item_name, 0) + qty
+        if self.journal:
+            self.journal.append("loot", item=item_name, qty=qty)
+
+    def log_event(self, type_, val):
+        now = datetime.datetime.now()
+        ts_iso = now.isoformat()
+        self.event_log.append({"timestamp": ts_iso, "type": type_, "value": val})
+        if self.journal:
+            self.journal.append("event", timestamp=ts_iso, type=type_, value=val)
+        self.notify("log", f"[{now.strftime('%H:%M:%S')}] {val}")
+
+    # --- SESSION LIFECYCLE ---
+    def set_config(self, config, theoretical_stats=None):
+        self.config = dict(config)
+        self.theoretical_stats = dict(theoretical_stats or {})
+        if self.journal:
+            self.journal_config()
+
+    def start_session(self, config=None, theoretical_stats=None):
+        if self.is_active: return
+        if config is not None:
+            self.set_config(config, theoretical_stats)
+
+        self.is_active = True
+        self.draining = False
+        self.start_time = time.time()
+        self.kill_count = 0
+        self.loot_tracker = {}
+        self.event_log = []
+        self.current_tick = 0
+        self.total_profit = 0
+
+        # --- PHASE 6 FIX: Force initial transit state & economy reset ---
+        self.current_phase = "AWAY"
+        # Hard-reset the economy accumulators so we always start clean
+        self.clear_ticks()
+        self.set_live_state(phase="AWAY", total_profit=0, session_running=True)
+
+        self.session_id = f"session_{int(self.start_time)}"
+        # Unified tick tape: columnar arrays in RAM, closed chunks spilled to a .tape sidecar
+        self.session_tape = SessionTape(self.session_id, sidecar_path=f"{self.data_dir}/{self.session_id}.tape",
+                                        writer=self.telemetry, on_spill=self.journal_tape_chunk,
+                                        was_lost=lambda tick: self.tick_loss.was_lost(tick))
+
+        self.attack_count = 0
+        self.active_seconds_bank = 0.0
+        self.last_phase_timestamp = time.time()
+        self.tick_loss = TickLoss()
+        self.dropped_at_start = self.udp_dropped
+
+        # Append-only journal: every change is one line, compacted into the JSON every COMPACT_SEC
+        self.journal = SessionJournal(journal_path(self.data_dir, self.session_id))
+        self.journal.append("start", session_id=self.session_id,
+                            start_time=datetime.datetime.fromtimestamp(self.start_time).isoformat(),
+                            sidecar=os.path.basename(self.session_tape.sidecar_path))
+        self.last_counters = None
+        self.last_config = None
+        self.last_loss = None
+        self.last_compact = time.time()
+        self.last_checkpoint = time.time()
+        self.journal_config()
+
+        self.notify("session_started", {"session_id": self.session_id})
+        self.log_event("session_start", f"Session Started ({self.config.get('mode', 'Experimental')})")
+
+    def stop_session(self):
+        if not self.is_active or self.draining: return
+
+        # 1. Signal the GUI overlay to begin the sweep
+        self.draining = True
+        self.set_live_state(drain_triggered=True)
+        self.notify("draining")
+        self.log_event("system", "Initiating Conveyor Drain...")
+
+    def finalize_stop(self, final_vault_gp=0):
+        if not self.is_active: return
+
+        # 2. Execute the save once the GUI confirms the vaults are full
+        self.is_active = False
+        self.draining = False
+
+        # Reset server accumulator for next session
+        self.set_live_state(drain_triggered=False, total_profit=0, session_running=False)
+
+        # --- PHASE 5: SQLITE PERSISTENCE ---
+        end_time = time.time()
+        duration_sec = end_time - self.start_time if self.start_time else 0
+
+        # Ticks still inside the commit horizon go to the writer now; everything
+        # older has already been streamed during the session.
+        self.session_tape.close()
+        if self.telemetry and not self.telemetry.flush():
+            self.log_event("error", "Telemetry writer did not drain in time")
+
+        loss = self.loss_summary()
+        try:
+            conn = sqlite3.connect(self.db_path)
+            c = conn.cursor()
+            c.execute("""INSERT INTO sessions (session_id, start_time, end_time, start_ms, end_ms, duration_sec, active_sec,
+                                                total_attacks, total_kills, net_profit)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                      (self.session_id, datetime.datetime.fromtimestamp(self.start_time).isoformat(),
+                       datetime.datetime.fromtimestamp(end_time).isoformat(),
+                       int(self.start_time * 1000), int(end_time * 1000), duration_sec,
+                       self.active_seconds_bank, self.attack_count, self.kill_count, final_vault_gp))
+            # Loss accounting next to the ticks, so analytics can skip transitions across a hole
+            c.execute("""INSERT OR REPLACE INTO udp_loss (session_id, ticks_received, ticks_lost, gaps, out_of_order, late, duplicates, resets, queue_dropped)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                      (self.session_id, loss["ticks_received"], loss["ticks_lost"], loss["gaps"], loss["out_of_order"],
+                       loss["late"], loss["duplicates"], loss["resets"], loss["queue_dropped"]))
+            c.executemany("INSERT INTO tick_gaps (session_id, start_tick, end_tick) VALUES (?, ?, ?)",
+                          [(self.session_id, start, end) for start, end in loss["lost_ranges"]])
+            # Per-tick staging rows -> one run-length encoded combat_runs row (see tick_runs.py)
+            compact_session(conn, self.session_id)
+            conn.commit()
+            conn.close()
+            self.log_event("system", f"SQLite Vault Saved: {final_vault_gp:,} GP")
+        except Exception as e:
+            self.log_event("error", f"SQLite Save Failed: {e}")
+
+        if self.telemetry:
+            self.log_event("system", f"Telemetry writer: {self.telemetry.describe()}")
+        self.log_event("system", f"UDP ticks: {loss['ticks_received']} received, {loss['ticks_lost']} lost "
+                                 f"({loss['loss_pct']}%) in {loss['gaps']} gaps, {loss['out_of_order']} out of order, "
+                                 f"{loss['queue_dropped']} dropped by the queue")
+
+        # Inject final GP into the JSON payload before saving
+        self.loot_tracker["_final_net_profit"] = final_vault_gp
+        if self.journal:
+            self.journal.append("end", final_net_profit=final_vault_gp)
+
+        self.log_event("session_end", "Session Ended (Conveyor Swept)")
+        self.save_data()
+
+        # Final document is on disk; the journal has nothing left to recover
+        if self.journal:
+            self.journal.close(delete=True)
+            self.journal = None
+        self.notify("session_ended", {"session_id": self.session_id, "final_gp": final_vault_gp})
+
+    # --- JOURNAL & RECOVERY ---
+    def journal_config(self):
+        if (self.config, self.theoretical_stats) != self.last_config:
+            self.journal.append("config", config=self.config, theoretical_stats=self.theoretical_stats)
+            self.last_config = (dict(self.config), dict(self.theoretical_stats))
+
+    def journal_tape_chunk(self, rows, total_rows):
+        if self.journal:
+            self.journal.append("tape", rows=rows, total_rows=total_rows)
+
+    def checkpoint(self):
+        # Cheap periodic persistence: counters/config lines in the journal,
+        # with a full JSON compaction only every COMPACT_SEC.
+        self.last_checkpoint = time.time()
+        if not self.journal: return
+        counters = (self.attack_count, round(self.get_active_seconds(), 1), self.tick_loss.received)
+        if counters != self.last_counters:
+            self.journal.append("counters", total_attacks=counters[0], active_seconds=counters[1], ticks_received=counters[2])
+            self.last_counters = counters
+        self.journal_config()
+        self.journal_loss()
+
+        if time.time() - self.last_compact >= COMPACT_SEC:
+            self.save_data(silent=True)
+
+    def journal_loss(self):
+        # Ranges only change when a tick goes missing, so this is rare on a healthy link
+        loss = self.loss_summary()
+        key = (loss["ticks_lost"], loss["gaps"], loss["out_of_order"], loss["late"], loss["duplicates"],
+               loss["resets"], loss["queue_dropped"])
+        if key != self.last_loss:
+            loss.pop("ticks_received")
+            self.journal.append("udp_loss", **loss)
+            self.last_loss = key
+
+    def loss_summary(self):
+        return self.tick_loss.to_dict(queue_dropped=self.udp_dropped - self.dropped_at_start)
+
+    def recover_crashed_sessions(self):
+        # A journal left on disk means the tracker died before finalize_stop
+        for path in find_journals(self.data_dir):
+            try:
+                doc, last_ts = replay(path)
+            except Exception as e:
+                print(f"[JOURNAL] Could not replay {path}: {e}")
+                continue
+
+            if not doc.get("start_time"):
+                os.remove(path)
+                continue
+
+            if not self.is_active and last_ts and time.time() - last_ts < RESUME_WINDOW_SEC:
+                self.resume_session(doc, path)
+                continue
+
+            # Too old to resume: compact it into a finished session document
+            sidecar = doc.pop("game_tape_sidecar", None)
+            sidecar_path = os.path.join(self.data_dir, sidecar) if sidecar else None
+            if sidecar_path and os.path.exists(sidecar_path):
+                doc["game_tape"] = tape_to_dict(*read_tape(sidecar_path))
+            doc_path = os.path.join(self.data_dir, f"{doc['session_id']}.json")
+            write_document(doc_path, doc)
+            os.remove(path)
+            self.compact_ticks(doc["session_id"])
+            self.store_session(doc, doc_path)
+            print(f"[JOURNAL] Finalized crashed session {doc['session_id']} ({len(doc['event_timeline'])} events)")
+
+    def compact_ticks(self, session_id):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                compact_session(conn, session_id)
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"[JOURNAL] Could not compact ticks for {session_id}: {e}")
+
+    def resume_session(self, doc, path):
+        self.session_id = doc["session_id"]
+        self.start_time = datetime.datetime.fromisoformat(doc["start_time"]).timestamp()
+        self.kill_count = doc["total_kills"]
+        self.attack_count = doc["total_attacks"]
+        self.active_seconds_bank = doc["active_seconds"]
+        self.loot_tracker = dict(doc["loot_summary"])
+        self.event_log = list(doc["event_timeline"])
+        self.config = dict(doc["config"])
+        self.theoretical_stats = dict(doc["theoretical_stats"])
+        self.current_phase = "AWAY"
+        self.last_phase_timestamp = time.time()
+        self.current_tick = 0
+        self.total_profit = 0
+        loss = doc.get("udp_loss", {})
+        self.tick_loss = TickLoss.from_dict(loss)
+        self.dropped_at_start = self.udp_dropped - loss.get("queue_dropped", 0)
+
+        self.session_tape = SessionTape(self.session_id, sidecar_path=f"{self.data_dir}/{self.session_id}.tape",
+                                        writer=self.telemetry, resume=True, on_spill=self.journal_tape_chunk,
+                                        was_lost=lambda tick: self.tick_loss.was_lost(tick))
+        self.journal = SessionJournal(path, resume=True)
+        self.last_counters = (self.attack_count, round(self.active_seconds_bank, 1), self.tick_loss.received)
+        self.last_config = (dict(self.config), dict(self.theoretical_stats))
+        self.last_loss = None
+        self.last_compact = time.time()
+        self.last_checkpoint = time.time()
+
+        self.is_active = True
+        self.draining = False
+        self.clear_ticks()
+        self.set_live_state(phase="AWAY", total_profit=0, session_running=True)
+
+        self.notify("session_resumed", {"session_id": self.session_id, "config": dict(self.config)})
+        self.log_event("system", f"Recovered {self.session_id} from journal ({len(self.event_log)} events, {self.kill_count} kills)")
+
+    # --- PERSISTENCE ---
+    def get_active_seconds(self):
+        # --- Calculate current active time if we are currently KILLING ---
+        current_active_bonus = 0.0
+        if self.current_phase == "KILLING":
+            current_active_bonus = time.time() - self.last_phase_timestamp
+        return self.active_seconds_bank + current_active_bonus
+
+    def save_data(self, silent=False, include_tape=None):
+        if not self.session_id: return
+        save_start = time.perf_counter()
+
+        data = {
+            "session_id": self.session_id,
+            "start_time": datetime.datetime.fromtimestamp(self.start_time).isoformat(),
+            "end_time": datetime.datetime.now().isoformat(),
+            "total_kills": self.kill_count,
+            "total_attacks": self.attack_count,
+            "active_seconds": self.get_active_seconds(),
+            "config": self.config,
+            "theoretical_stats": self.theoretical_stats,
+            "loot_summary": self.loot_tracker,
+            "event_timeline": self.event_log,
+            "udp_loss": self.loss_summary(),
+        }
+
+        # The tape already persists itself incrementally to its sidecar; only the
+        # final (non-silent) save inflates it back into the JSON document.
+        if include_tape is None:
+            include_tape = not silent
+        if include_tape and self.session_tape is not None:
+            data["game_tape"] = self.session_tape.to_dict()
+        elif self.session_tape is not None:
+            data["game_tape_sidecar"] = os.path.basename(self.session_tape.sidecar_path)
+
+        doc_path = f"{self.data_dir}/{self.session_id}.json"
+        write_document(doc_path, data)
+        self.last_compact = time.time()
+        autosave_hist.observe((time.perf_counter() - save_start) * 1000)
+
+        if not silent:
+            # Autosaves only refresh the JSON; the store gets the final document
+            if not self.store_session(data, doc_path, finished=not self.is_active):
+                self.log_event("error", "Session store write failed (JSON saved; `session_store.py import` will pick it up)")
+            self.log_event("system", "Data Saved Successfully.")
+
+    def store_session(self, doc, doc_path, finished=True):
+        # Keyed on the JSON's stat so import_json() doesn't re-import what was just written
+        try:
+            st = os.stat(doc_path)
+            conn = session_store.connect(self.session_db)
+            try:
+                session_store.save_session(conn, doc, finished=finished, source=(st.st_mtime_ns, st.st_size))
+            finally:
+                conn.close()
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"[STORE] Could not write {doc.get('session_id')} to {self.session_db}: {e}")
+            return False
@@ -5,6 +5,7 @@ import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
 import glob
+from item_catalog import load_catalog
 
 # --- CONFIG ---
 CURRENT_STATE_FILE = "current_state.json"
@@ -28,19 +29,7 @@ GENESIS = {
 
 class WealthEngine:
     def __init__(self):
-        self.item_map_id_to_name = {}
-        self.item_map_name_to_id = {}
-        self.load_item_maps()
-
-    def load_item_maps(self):
-        if os.path.exists(ITEMS_CSV):
-            with open(ITEMS_CSV, 'r', encoding='utf-8') as f:
-                for row in csv.DictReader(f):
-                    i_id = int(row['id'])
-                    name = row['name'].strip()
-                    self.item_map_id_to_name[i_id] = name
-                    if name.lower() not in self.item_map_name_to_id or "note" not in name.lower():
-                        self.item_map_name_to_id[name.lower()] = i_id
+        self.catalog = load_catalog(ITEMS_CSV)
 
     def load_current_state(self):
         with open(CURRENT_STATE_FILE, 'r') as f:
@@ -123,7 +112,7 @@ class WealthEngine:
             # Find kills AFTER our snapshot, but BEFORE our target time
             mask = (df_enriched['local_start_time'] > snapshot_date) & (df_enriched['local_start_time'] <= now)
             for _, row in df_enriched.loc[mask].iterrows():
-                item_name = row['item_name'] if pd.notna(row['item_name']) else self.item_map_id_to_name.get(row['item_id'], f"Item {row['item_id']}")
+                item_name = row['item_name'] if pd.notna(row['item_name']) else self.catalog.name(row['item_id'], f"Item {row['item_id']}")
                 key = str(item_name).lower().strip()
                 cat = "Drops" if row['qty_delta'] > 0 else "Supplies"
                 
@@ -136,7 +125,7 @@ class WealthEngine:
             # Mask to only include trades before our target time
             mask = (ge_df['timestamp'] > snapshot_date) & (ge_df['timestamp'] <= now)
             for _, row in ge_df.loc[mask].iterrows():
-                item_name = self.item_map_id_to_name.get(row['item'], f"Item {row['item']}")
+                item_name = self.catalog.name(row['item'], f"Item {row['item']}")
                 key = item_name.lower().strip()
                 if key not in inventory["GE"]: inventory["GE"][key] = {"name": item_name, "qty": 0.0}
                 
@@ -157,7 +146,7 @@ class WealthEngine:
                 if qty == 0: continue
                 if key == "coins": totals[cat] += qty
                 else:
-                    item_id = self.item_map_name_to_id.get(key, 0)
+                    item_id = self.catalog.id(key, 0)
                     totals[cat] += (qty * prices.get(item_id, 0))
 
         return totals, prices.get(20997, 1600000000), now